@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Pilote batch : normalise et découpe tous les rapports d'un build en parallèle
+
+Remplace les appels normalize-reports.py / split_reports.py lancés un par un
+dans chaque stage Jenkins (un interpréteur par rapport) par un seul processus
+qui répartit les rapports sur un pool de workers.
+
+Les rapports sont pris dans un manifeste JSON, ou découverts dans le build :
+    <build_dir>/<tool>/scans/<tool>-<service>[-<scan_type>]-raw.json
+avec, si présent, les métadonnées dans <tool>-<service>[-<scan_type>]-metadata.json.
+
+Manifeste (liste d'entrées, `raw` relatif au build_dir) :
+    [
+      {"service": "backend", "tool": "trivy", "scan_type": "container",
+       "raw": "trivy/scans/trivy-backend-raw.json",
+       "metadata": {"scan_start_time": 1700000000000, "scan_end_time": 1700000060000}}
+    ]
+
+Usage:
+    python3 batch_normalize.py <build_dir> [--manifest manifest.json] [--workers N]
+                               [--metadata '{"git_commit": "..."}'] [--stream]
+                               [--skip-normalized] [--results-json results.json]
+                               [--es-url http://elasticsearch:9200] [--delta] [--state-dir DIR] [--dedup]
+                               [--cache-dir DIR] [--profile [--profile-cpu] [--profile-memory]]
+                               [--shard-docs N] [--shard-mb MB] [--gzip] [--ref-dictionary]
+                               [--lean-parent] [--projection rules.json] [--rollups]
+
+Avec --es-url, chaque worker envoie ses documents à Elasticsearch (_bulk, cf.
+es_bulk.py) au lieu d'écrire le *-split.ndjson.
+Avec --shard-docs/--shard-mb/--gzip, le *-split.ndjson est écrit en shards (cf. shard_sink.py).
+Avec --ref-dictionary, les références des findings sont encodées par dictionnaire (cf. ref_dictionary.py).
+Avec --rollups, agrégats par paquet/cible/CWE/type/fixable, un document par dimension (cf. rollups.py).
+Avec --lean-parent/--projection, parent allégé et champs émis filtrés par outil (cf. projection.py).
+Avec --profile, chaque worker écrit le profil de son rapport (<base>-normalized-perf.ndjson, cf. perf.py).
+Avec --dedup, les rapports Snyk et Trivy d'un même service sont découpés en
+seconde passe, une fois tous normalisés : chaque finding remonté par les deux
+outils n'est émis qu'une fois (finding canonique avec `sources`, cf. dedup.py)
+et le summary de chaque parent compte les findings bruts et dédupliqués.
+
+Code de sortie : 0 si tous les rapports sont traités, 1 sinon.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import re
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from es_bulk import add_bulk_arguments
+from shard_sink import add_shard_arguments, shard_options_from_args
+from ref_dictionary import add_dictionary_argument
+from rollups import add_rollup_argument
+from projection import add_projection_arguments, check_lean_parent
+import perf
+
+NORMALIZER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "normalize-reports.py")
+
+# scan_type par défaut quand le nom du fichier n'en porte pas (cf. Jenkinsfile)
+DEFAULT_SCAN_TYPES = {
+    "sonarqube": "sast",
+    "trivy": "container",
+    "snyk": "code",
+    "codeql": "sast",
+    "semgrep": "sast",
+    "gitleaks": "secrets",
+    "sarif": "sast"
+}
+
+# Outils dédupliqués entre eux par service (--dedup), dans l'ordre de priorité des findings canoniques
+CROSS_TOOL_DEDUP = ("snyk", "trivy")
+
+RAW_SUFFIX = "-raw.json"
+METADATA_SUFFIX = "-metadata.json"
+
+_normalizer_module = None
+
+
+def load_normalizer():
+    """Charge normalize-reports.py (nom non importable) une fois par processus"""
+    global _normalizer_module
+    if _normalizer_module is None:
+        spec = importlib.util.spec_from_file_location("normalize_reports", NORMALIZER_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _normalizer_module = module
+    return _normalizer_module
+
+
+def build_id_from_dir(build_dir: str) -> str:
+    match = re.search(r'build-(\w+)$', os.path.basename(os.path.normpath(build_dir)))
+    return match.group(1) if match else "unknown"
+
+
+def report_entry(build_dir: str, tool: str, name: str) -> Optional[Dict[str, Any]]:
+    """Entrée d'un rapport <tool>/scans/<tool>-<service>[-<scan_type>]-raw.json (None si le nom ne correspond pas)"""
+    if not (name.startswith(f"{tool}-") and name.endswith(RAW_SUFFIX)):
+        return None
+    scans_dir = os.path.join(build_dir, tool, "scans")
+    parts = name[len(tool) + 1:-len(RAW_SUFFIX)].split("-", 1)
+    metadata_file = os.path.join(scans_dir, name[:-len(RAW_SUFFIX)] + METADATA_SUFFIX)
+    metadata = {}
+    if os.path.exists(metadata_file):
+        with open(metadata_file, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+    return {
+        "service": parts[0],
+        "tool": tool,
+        "scan_type": parts[1] if len(parts) > 1 else DEFAULT_SCAN_TYPES.get(tool, "unknown"),
+        "raw": os.path.relpath(os.path.join(scans_dir, name), build_dir),
+        "metadata": metadata
+    }
+
+
+def discover_reports(build_dir: str) -> List[Dict[str, Any]]:
+    """Découvre les rapports bruts <tool>/scans/<tool>-<service>[-<scan_type>]-raw.json"""
+    entries = []
+    for tool in sorted(os.listdir(build_dir)):
+        scans_dir = os.path.join(build_dir, tool, "scans")
+        if not os.path.isdir(scans_dir):
+            continue
+        for name in sorted(os.listdir(scans_dir)):
+            entry = report_entry(build_dir, tool, name)
+            if entry is not None:
+                entries.append(entry)
+    return entries
+
+
+def load_manifest(manifest_file: str) -> List[Dict[str, Any]]:
+    with open(manifest_file, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, list):
+        raise ValueError("Le manifeste doit être une liste d'entrées")
+    return manifest
+
+
+def _default_raw_file(build_dir: str, tool: str, service: str, scan_type: str) -> str:
+    scans_dir = os.path.join(build_dir, tool, "scans")
+    candidate = os.path.join(scans_dir, f"{tool}-{service}-{scan_type}{RAW_SUFFIX}")
+    if os.path.exists(candidate):
+        return candidate
+    return os.path.join(scans_dir, f"{tool}-{service}{RAW_SUFFIX}")
+
+
+def build_jobs(build_dir: str, entries: List[Dict[str, Any]], base_metadata: Dict[str, Any],
+               stream: bool, skip_normalized: bool,
+               bulk_options: Optional[Dict[str, Any]] = None, delta: bool = False,
+               state_dir: Optional[str] = None, dedup: bool = False,
+               cache_options: Optional[Dict[str, Any]] = None,
+               profile_options: Optional[Dict[str, Any]] = None,
+               shard_options: Optional[Dict[str, Any]] = None,
+               ref_dictionary: bool = False, projection: Optional[str] = None,
+               lean_parent: bool = False, rollups: bool = False) -> List[Dict[str, Any]]:
+    """Transforme les entrées (manifeste ou découverte) en travaux autonomes pour les workers"""
+    jobs = []
+    for entry in entries:
+        tool = entry["tool"].lower()
+        service = entry["service"]
+        scan_type = entry.get("scan_type") or DEFAULT_SCAN_TYPES.get(tool, "unknown")
+        if entry.get("raw"):
+            raw_file = os.path.join(build_dir, entry["raw"])
+        else:
+            raw_file = _default_raw_file(build_dir, tool, service, scan_type)
+        base = raw_file[:-len(RAW_SUFFIX)] if raw_file.endswith(RAW_SUFFIX) else os.path.splitext(raw_file)[0]
+
+        metadata = dict(base_metadata)
+        metadata.update(entry.get("metadata") or {})
+        metadata.update({"tool": tool, "service": service, "scan_type": scan_type})
+        metadata.setdefault("build_id", build_id_from_dir(build_dir))
+        # normalize() calcule scan_end_time - scan_start_time : à défaut, date du rapport brut
+        if os.path.exists(raw_file):
+            raw_time = int(os.path.getmtime(raw_file) * 1000)
+            metadata.setdefault("scan_end_time", raw_time)
+            metadata.setdefault("scan_start_time", metadata["scan_end_time"])
+
+        jobs.append({
+            "service": service,
+            "tool": tool,
+            "scan_type": scan_type,
+            "input_file": raw_file,
+            "output_file": f"{base}-normalized.json",
+            "split_output": f"{base}-split.ndjson",
+            "metadata": metadata,
+            "stream": stream,
+            "skip_normalized": skip_normalized,
+            "bulk_options": bulk_options,
+            "delta_previous": "auto" if delta else None,
+            "state_dir": state_dir,
+            "dedup": dedup,
+            # Découpage différé en seconde passe (fusion inter-outils, cf. split_report)
+            "deferred_split": dedup and tool in CROSS_TOOL_DEDUP,
+            "cache_options": cache_options,
+            "profile_options": profile_options,
+            "shard_options": shard_options,
+            "ref_dictionary": ref_dictionary,
+            "projection": projection,
+            "lean_parent": lean_parent,
+            "rollups": rollups
+        })
+    return jobs
+
+
+def process_report(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Worker : normalise + découpe un rapport (normalise seulement si deferred_split), journal capturé"""
+    result = {
+        "service": job["service"],
+        "tool": job["tool"],
+        "scan_type": job["scan_type"],
+        "input_file": job["input_file"],
+        "output_file": job["output_file"],
+        "split_output": job["split_output"],
+        "status": "error"
+    }
+    start = time.monotonic()
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            if not os.path.exists(job["input_file"]):
+                raise FileNotFoundError(f"Fichier d'entrée introuvable: {job['input_file']}")
+            deferred = job.get("deferred_split", False)
+            sink = None
+            if job.get("bulk_options") and not deferred:
+                from es_bulk import BulkSink
+                sink = BulkSink(**job["bulk_options"])
+            normalizer = load_normalizer()
+            if job.get("profile_options"):
+                perf.start("batch_normalize", **job["profile_options"])
+            cache = None
+            if job.get("cache_options"):
+                cache = normalizer.NormalizationCache(**job["cache_options"])
+            normalized = normalizer.run_normalization(
+                job["input_file"], job["output_file"], job["tool"], job["metadata"],
+                stream=job["stream"],
+                split_output=None if sink or deferred else job["split_output"],
+                skip_normalized=job["skip_normalized"],
+                sink=sink,
+                delta_previous=job.get("delta_previous"),
+                state_dir=job.get("state_dir"),
+                dedup=job.get("dedup", False),
+                cache=cache,
+                shard_options=None if sink else job.get("shard_options"),
+                ref_dictionary=job.get("ref_dictionary", False),
+                projection=job.get("projection"),
+                lean_parent=job.get("lean_parent", False),
+                rollups=job.get("rollups", False)
+            )
+            if cache is not None:
+                result["cache"] = "hit" if cache.hits else "miss"
+            if job.get("profile_options"):
+                mode = ("stream" if job["stream"] else "memory") + ("" if deferred else "+split")
+                perf.finish(normalized, job["output_file"], mode)
+                result["perf_output"] = perf.perf_output_path(job["output_file"])
+            if sink is not None and sink.failed:
+                raise RuntimeError(f"{sink.sent - sink.indexed} documents rejetés par Elasticsearch")
+        result["status"] = "ok"
+        result["total_vulnerabilities"] = normalized["summary"]["total_vulnerabilities"]
+        if "raw_total_vulnerabilities" in normalized["summary"]:
+            result["raw_total_vulnerabilities"] = normalized["summary"]["raw_total_vulnerabilities"]
+    except Exception as e:
+        perf.abort()
+        result["error"] = str(e)
+        log.write(traceback.format_exc())
+    result["duration_ms"] = round((time.monotonic() - start) * 1000, 1)
+    result["log"] = log.getvalue()
+    return result
+
+
+def split_report(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Worker de seconde passe (--dedup) : découpe un rapport normalisé Snyk/Trivy à
+    travers l'index inter-outils de son service (job["cross_tool_reports"]).
+    """
+    result = {key: job[key] for key in ("service", "tool", "scan_type")}
+    result["status"] = "error"
+    start = time.monotonic()
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            from dedup import CrossToolIndex
+            from split_reports import split_and_write
+            from shard_sink import ShardedNdjsonSink
+
+            cross_index = CrossToolIndex(job["cross_tool_reports"])
+            result["cross_tool"] = cross_index.cross_tool
+            sink = None
+            if job.get("bulk_options"):
+                from es_bulk import BulkSink
+                sink = BulkSink(**job["bulk_options"])
+            elif job.get("shard_options"):
+                sink = ShardedNdjsonSink(job["split_output"], **job["shard_options"])
+            try:
+                report = split_and_write(job["output_file"], job["split_output"], job["stream"], sink,
+                                         job.get("delta_previous"), job.get("ref_dictionary", False),
+                                         job.get("projection"), job.get("lean_parent", False),
+                                         cross_index.view(job["output_file"]))
+            except SystemExit:
+                # split_and_write termine le processus en cas d'erreur (usage en ligne de commande)
+                raise RuntimeError("Découpage du rapport normalisé impossible (cf. journal)")
+            if sink is not None and getattr(sink, "failed", False):
+                raise RuntimeError(f"{sink.sent - sink.indexed} documents rejetés par Elasticsearch")
+        result["status"] = "ok"
+        result["total_vulnerabilities"] = report["summary"]["total_vulnerabilities"]
+        result["raw_total_vulnerabilities"] = report["summary"]["raw_total_vulnerabilities"]
+    except Exception as e:
+        result["error"] = str(e)
+        log.write(traceback.format_exc())
+    result["duration_ms"] = round((time.monotonic() - start) * 1000, 1)
+    result["log"] = log.getvalue()
+    return result
+
+
+def cross_tool_jobs(jobs: List[Dict[str, Any]], results: List[Dict[str, Any]]
+                    ) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Travaux de seconde passe (--dedup) : (position du rapport, travail) pour chaque
+    rapport normalisé dont le découpage a été différé, avec les rapports de son
+    service à fusionner (Snyk avant Trivy).
+    """
+    by_service: Dict[str, List[Tuple[str, str]]] = {}
+    deferred = []
+    for position, (job, result) in enumerate(zip(jobs, results)):
+        if job.get("deferred_split") and result["status"] == "ok":
+            by_service.setdefault(job["service"], []).append((job["tool"], job["output_file"]))
+            deferred.append(position)
+    for reports in by_service.values():
+        reports.sort(key=lambda report: (CROSS_TOOL_DEDUP.index(report[0]), report[1]))
+    return [(position, dict(jobs[position], cross_tool_reports=by_service[jobs[position]["service"]]))
+            for position in deferred]
+
+
+def run_batch(jobs: List[Dict[str, Any]], workers: Optional[int] = None,
+              worker: Callable[[Dict[str, Any]], Dict[str, Any]] = process_report) -> List[Dict[str, Any]]:
+    """Exécute les travaux sur un pool de processus (résultats dans l'ordre des travaux)"""
+    if not jobs:
+        return []
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(worker, job): index for index, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            state = "OK" if result["status"] == "ok" else "ÉCHEC"
+            print(f" [{state}] {result['tool']}/{result['service']}/{result['scan_type']} "
+                  f"({result['duration_ms']} ms)")
+    return results
+
+
+def merge_split_result(result: Dict[str, Any], split_result: Dict[str, Any]) -> None:
+    """Résultat de seconde passe reporté sur celui du rapport (statut, compteurs, journal)"""
+    result["status"] = split_result["status"]
+    result["duration_ms"] = round(result["duration_ms"] + split_result["duration_ms"], 1)
+    result["log"] += split_result["log"]
+    for key in ("total_vulnerabilities", "raw_total_vulnerabilities", "cross_tool", "error"):
+        if key in split_result:
+            result[key] = split_result[key]
+
+
+def cross_tool_stats(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Compteurs de la fusion inter-outils par service (rapports découpés en seconde passe)"""
+    stats: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        if result["status"] != "ok" or "cross_tool" not in result:
+            continue
+        service = stats.setdefault(result["service"], {"raw_total_vulnerabilities": 0,
+                                                       "total_vulnerabilities": 0,
+                                                       "cross_tool": result["cross_tool"]})
+        service["raw_total_vulnerabilities"] += result["raw_total_vulnerabilities"]
+        service["total_vulnerabilities"] += result["total_vulnerabilities"]
+    return dict(sorted(stats.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalisation batch des rapports d'un build")
+    parser.add_argument("build_dir", help="Répertoire du build (ex: /shared/build-123)")
+    parser.add_argument("--manifest", help="Manifeste JSON des rapports (sinon découverte automatique)")
+    parser.add_argument("--workers", type=int, help="Taille du pool (défaut: nb de CPU)")
+    parser.add_argument("--metadata", default="{}", help="Métadonnées communes (git, environment...) en JSON")
+    parser.add_argument("--stream", action="store_true", help="Lecture/écriture en flux (Snyk/Trivy)")
+    parser.add_argument("--skip-normalized", action="store_true", help="Ne pas écrire les JSON normalisés")
+    parser.add_argument("--results-json", help="Écrire les résultats par rapport dans ce fichier")
+    parser.add_argument("--verbose", action="store_true", help="Afficher le journal de chaque rapport")
+    parser.add_argument("--delta", action="store_true",
+                        help="Mode delta : findings nouveaux/corrigés depuis le build précédent uniquement")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Fusion des doublons par rapport, puis entre Snyk et Trivy par service (seconde passe)")
+    parser.add_argument("--cache-dir", default=os.environ.get("NORMALIZER_CACHE_DIR"),
+                        help="Cache de normalisation des rapports inchangés (défaut: $NORMALIZER_CACHE_DIR)")
+    parser.add_argument("--cache-max-mb", type=int, default=2048, help="Taille maximale du cache (LRU)")
+    parser.add_argument("--state-dir", default=os.environ.get("NORMALIZER_STATE_DIR"),
+                        help="Base de cycle de vie des findings (défaut: $NORMALIZER_STATE_DIR)")
+    add_dictionary_argument(parser)
+    add_rollup_argument(parser)
+    add_projection_arguments(parser)
+    add_shard_arguments(parser)
+    add_bulk_arguments(parser)
+    perf.add_profile_arguments(parser)
+    args = parser.parse_args()
+    if args.delta and args.skip_normalized:
+        parser.error("--delta est incompatible avec --skip-normalized")
+    check_lean_parent(parser, args)
+    if args.dedup and args.skip_normalized:
+        # La seconde passe (fusion inter-outils) découpe les JSON normalisés
+        parser.error("--dedup est incompatible avec --skip-normalized")
+
+    try:
+        base_metadata = json.loads(args.metadata)
+        entries = load_manifest(args.manifest) if args.manifest else discover_reports(args.build_dir)
+    except (OSError, ValueError) as e:
+        print(f" Entrées invalides: {e}")
+        sys.exit(1)
+
+    bulk_options = None
+    if args.es_url:
+        bulk_options = {"es_url": args.es_url, "index": args.es_index, "pipeline": args.es_pipeline,
+                        "max_docs": args.es_batch_docs, "max_bytes": args.es_batch_bytes}
+    jobs = build_jobs(args.build_dir, entries, base_metadata, args.stream, args.skip_normalized, bulk_options,
+                      args.delta, args.state_dir, args.dedup,
+                      {"directory": args.cache_dir, "max_mb": args.cache_max_mb} if args.cache_dir else None,
+                      {"cpu_profile": args.profile_cpu, "memory_profile": args.profile_memory}
+                      if args.profile else None,
+                      shard_options_from_args(args), args.ref_dictionary, args.projection, args.lean_parent,
+                      args.rollups)
+    if not jobs:
+        print(f" Aucun rapport trouvé dans {args.build_dir}")
+        sys.exit(1)
+
+    print(f" {len(jobs)} rapport(s) à traiter dans {args.build_dir}")
+    start = time.monotonic()
+    results = run_batch(jobs, args.workers)
+    second_pass = cross_tool_jobs(jobs, results)
+    if second_pass:
+        print(f" Seconde passe : découpage de {len(second_pass)} rapport(s) Snyk/Trivy dédupliqués entre outils")
+        for (position, _), split_result in zip(second_pass, run_batch([job for _, job in second_pass], args.workers,
+                                                                      split_report)):
+            merge_split_result(results[position], split_result)
+    elapsed = time.monotonic() - start
+
+    failures = [r for r in results if r["status"] != "ok"]
+    for result in results:
+        if args.verbose or result["status"] != "ok":
+            print(f"\n--- {result['tool']}/{result['service']}/{result['scan_type']} ---")
+            print(result["log"].rstrip())
+
+    print(f"\n Statistiques batch:")
+    print(f"  • Rapports traités: {len(results) - len(failures)}/{len(results)}")
+    print(f"  • Durée totale: {elapsed:.1f} s")
+    for result in results:
+        detail = result.get("total_vulnerabilities", result.get("error"))
+        print(f"  • {result['tool']}/{result['service']}/{result['scan_type']}: {result['status']} ({detail})")
+
+    cached = [r["cache"] for r in results if "cache" in r]
+    if cached:
+        print(f"  • Cache de normalisation: {cached.count('hit')} hit(s), {cached.count('miss')} miss(es)")
+
+    dedup_stats = cross_tool_stats(results)
+    for service, stats in dedup_stats.items():
+        print(f"  • {service} (Snyk + Trivy): {stats['raw_total_vulnerabilities']} findings bruts → "
+              f"{stats['total_vulnerabilities']} uniques, {stats['cross_tool']} remontés par plusieurs outils")
+        for result in results:
+            if result["service"] == service and "cross_tool" in result:
+                result["service_dedup"] = stats
+
+    if args.results_json:
+        with open(args.results_json, "w", encoding="utf-8") as f:
+            json.dump([{k: v for k, v in r.items() if k != "log"} for r in results], f, indent=2, ensure_ascii=False)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
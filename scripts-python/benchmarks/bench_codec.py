@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark : sérialisation JSON par backend de json_codec.py
+
+Pour chaque backend installé (orjson, msgspec, json), et pour l'écriture
+d'origine (json.dumps → str + "\\n" dans un fichier texte) :
+- findings : documents findings aplatis écrits en NDJSON (fichier binaire, tampon 1 Mo)
+- rapport  : rapport normalisé complet sérialisé puis écrit d'un bloc
+- lecture  : rapport normalisé relu depuis ses bytes
+
+Usage:
+    python3 benchmarks/bench_codec.py [--findings 20000] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_flatten import make_report
+from json_codec import available_backends, get_codec
+from split_reports import ParentContext, build_finding_document, WRITE_BUFFER_SIZE
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def best_of(func, repeat):
+    return min(_timed(func) for _ in range(repeat))
+
+
+def write_text_lines(docs, path):
+    """Écriture d'origine : une str par document, fichier texte"""
+    with open(path, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
+        for doc in docs:
+            f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+
+
+def write_codec_lines(codec, docs, path):
+    with open(path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+        for doc in docs:
+            f.write(codec.dumpb(doc))
+            f.write(b"\n")
+
+
+def write_codec_report(codec, report, path):
+    with open(path, "wb") as f:
+        f.write(codec.dumpb(report))
+        f.write(b"\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--findings", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    report = make_report(args.findings)
+    context = ParentContext(report)
+    docs = [build_finding_document(v, "r", context) for v in report["vulnerabilities"]]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        output = os.path.join(workdir, "out.ndjson")
+        print(f"{args.findings} findings (meilleur de {args.repeat}):")
+        print(f"  {'backend':<22} {'findings/s':>12} {'Mo/s':>8} {'rapport Mo/s':>13} {'lecture Mo/s':>13}")
+
+        elapsed = best_of(lambda: write_text_lines(docs, output), args.repeat)
+        size_mb = os.path.getsize(output) / 1e6
+        reference = args.findings / elapsed
+        report_text = json.dumps(report, ensure_ascii=False)
+        report_mb = len(report_text.encode("utf-8")) / 1e6
+        report_s = best_of(lambda: write_text_lines([report], output), args.repeat)
+        load_s = best_of(lambda: json.loads(report_text), args.repeat)
+        print(f"  {'json.dumps (texte)':<22} {reference:>12,.0f} {size_mb / elapsed:>8.1f} "
+              f"{report_mb / report_s:>13.1f} {report_mb / load_s:>13.1f}")
+
+        for name in available_backends():
+            codec = get_codec(name)
+            elapsed = best_of(lambda: write_codec_lines(codec, docs, output), args.repeat)
+            size_mb = os.path.getsize(output) / 1e6
+            report_bytes = codec.dumpb(report)
+            report_mb = len(report_bytes) / 1e6
+            report_s = best_of(lambda: write_codec_report(codec, report, output), args.repeat)
+            load_s = best_of(lambda: codec.loads(report_bytes), args.repeat)
+            rate = args.findings / elapsed
+            print(f"  {name + ' (bytes)':<22} {rate:>12,.0f} {size_mb / elapsed:>8.1f} "
+                  f"{report_mb / report_s:>13.1f} {report_mb / load_s:>13.1f}   x{rate / reference:.2f}")
+
+
+if __name__ == "__main__":
+    main()
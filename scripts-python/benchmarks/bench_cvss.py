@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark : scores CVSS calculés depuis les vecteurs (cvss.py)
+
+Vecteurs v3.1 d'un gros rapport : --findings findings tirés parmi --vectors
+vecteurs distincts (chaînes distinctes, comme après décodage JSON). Compare :
+- calcul du score de base pour chaque finding (sans mémoïsation)
+- CvssScorer.score, mémorisé par vecteur (appel par finding, cas du normaliseur)
+
+Usage:
+    python3 benchmarks/bench_cvss.py [--findings 100000] [--vectors 300] [--repeat 3]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cvss import CvssScorer, base_score
+from json_codec import CODEC
+
+METRIC_VALUES = (("AV", "NALP"), ("AC", "LH"), ("PR", "NLH"), ("UI", "NR"), ("S", "UC"),
+                 ("C", "HLN"), ("I", "HLN"), ("A", "HLN"))
+
+
+def report_vectors(findings: int, distinct: int, seed: int):
+    rng = random.Random(seed)
+    combinations = list(itertools.product(*(values for _, values in METRIC_VALUES)))
+    vectors = ["CVSS:3.1/" + "/".join(f"{name}:{value}" for (name, _), value in zip(METRIC_VALUES, combo))
+               for combo in rng.sample(combinations, min(distinct, len(combinations)))]
+    # Distribution réaliste : quelques vecteurs (9.8, 7.5...) très fréquents
+    picks = [vectors[int(rng.paretovariate(1.1)) % len(vectors)] for _ in range(findings)]
+    return CODEC.loads(CODEC.dumpb(picks))
+
+
+def measure(label, func, findings, repeat):
+    best = min(_timed(func) for _ in range(repeat))
+    print(f"  {label:<40} {findings / best:>14,.0f} findings/s")
+    return findings / best
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--findings", type=int, default=100000)
+    parser.add_argument("--vectors", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    vectors = report_vectors(args.findings, args.vectors, args.seed)
+    expected = [base_score(vector) for vector in vectors]
+    scorer = CvssScorer()
+    assert [scorer.score(vector) for vector in vectors] == expected
+
+    print(f"Scores de {args.findings} findings, {len(set(vectors))} vecteurs distincts (meilleur de {args.repeat}):")
+    before = measure("calcul par finding", lambda: [base_score(v) for v in vectors], args.findings, args.repeat)
+
+    def per_finding():
+        score = CvssScorer().score
+        return [score(v) for v in vectors]
+
+    memoized = measure("CvssScorer.score (mémorisé)", per_finding, args.findings, args.repeat)
+    print(f"  gain: x{memoized / before:.1f}")
+
+
+if __name__ == "__main__":
+    main()
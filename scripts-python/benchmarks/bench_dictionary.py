@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Mesure : taille des documents avec et sans --ref-dictionary (ref_dictionary.py)
+
+Génère un rapport Trivy de taille réelle (generate_reports.py : 2 à 6 URLs par
+finding, CVE et paquets réutilisés), le normalise en mode fusionné --stream
+dans les deux modes, puis compare :
+- octets des documents vulnerability_finding (total et par finding)
+- octets des documents reference_dictionary (table publiée une fois)
+- octets du NDJSON complet et temps de la normalisation
+
+Usage:
+    python3 benchmarks/bench_dictionary.py [--findings 100000] [--seed 42]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_pipeline import METADATA, load_normalizer
+from generate_reports import DEFAULT_SEED, generate_report
+
+
+def document_bytes(ndjson_file: str) -> Counter:
+    """Octets (fin de ligne comprise) par doc_type"""
+    sizes: Counter = Counter()
+    with open(ndjson_file, "rb") as f:
+        for line in f:
+            start = line.find(b'"doc_type"')
+            doc_type = line[start:start + 60].split(b'"')[3].decode() if start >= 0 else "?"
+            sizes[doc_type] += len(line)
+    return sizes
+
+
+def run(module, raw_file: str, split_output: str, ref_dictionary: bool) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        module.run_normalization(raw_file, split_output + ".json", "trivy", dict(METADATA), stream=True,
+                                 split_output=split_output, skip_normalized=True, state_dir=None,
+                                 ref_dictionary=ref_dictionary)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--findings", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    module = load_normalizer()
+    with tempfile.TemporaryDirectory() as workdir:
+        raw_file = os.path.join(workdir, "trivy-raw.json")
+        generate_report("trivy", args.findings, raw_file, args.seed)
+        print(f"Rapport Trivy {args.findings} findings : {os.path.getsize(raw_file) / 1e6:.1f} Mo")
+        print(f"  {'mode':<16} {'findings Mo':>12} {'o/finding':>10} {'dictionnaire Mo':>16} "
+              f"{'NDJSON Mo':>10} {'temps s':>8}")
+
+        results = {}
+        for label, enabled in (("références", False), ("--ref-dictionary", True)):
+            output = os.path.join(workdir, f"split-{int(enabled)}.ndjson")
+            elapsed = run(module, raw_file, output, enabled)
+            sizes = document_bytes(output)
+            findings = sizes["vulnerability_finding"]
+            results[label] = (findings, sum(sizes.values()))
+            print(f"  {label:<16} {findings / 1e6:>12.1f} {findings / args.findings:>10.0f} "
+                  f"{sizes['reference_dictionary'] / 1e6:>16.2f} {sum(sizes.values()) / 1e6:>10.1f} {elapsed:>8.2f}")
+            os.remove(output)
+
+        (plain_findings, plain_total), (dict_findings, dict_total) = results.values()
+        print(f"Réduction : documents findings -{(1 - dict_findings / plain_findings) * 100:.1f} %, "
+              f"NDJSON complet -{(1 - dict_total / plain_total) * 100:.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark mémoire : findings compacts (findings.py) vs dicts imbriqués
+
+Normalise un rapport Trivy (ou Snyk) synthétique en mémoire, puis compare
+avec tracemalloc la mémoire retenue par la liste des findings :
+- avant : un dict par finding + dict `unified` + dict `package` (forme JSON,
+  ancienne représentation, obtenue ici par as_dict())
+- après : enregistrements à slots, valeurs énumérées internées
+
+Mesure aussi le temps de normalisation et de sérialisation JSON (la forme
+JSON n'est produite qu'à l'écriture).
+
+Usage:
+    python3 benchmarks/bench_findings.py [--findings 100000] [--tool trivy|snyk]
+"""
+
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from findings import json_default
+
+METADATA = {
+    "service": "backend", "build_id": "123", "scan_type": "container", "git_author": "dev@example.com",
+    "scan_start_time": 1700000000000, "scan_end_time": 1700000060000, "code_introduction_time": 1699990000000
+}
+SEVERITIES = ["CRITICAL", "HIGH", "MEDIUM", "LOW", "UNKNOWN"]
+
+
+def load_normalizer():
+    spec = importlib.util.spec_from_file_location("normalize_reports", os.path.join(SCRIPTS_DIR, "normalize-reports.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_trivy(findings: int):
+    vulns = [{
+        "VulnerabilityID": f"CVE-2023-{i % 5000}", "PkgName": f"pkg{i % 300}", "InstalledVersion": "1.0.0",
+        "FixedVersion": "1.0.1" if i % 2 else "", "Severity": SEVERITIES[i % 5], "Title": f"Vulnerability {i}",
+        "CweIDs": ["CWE-79"], "References": ["https://nvd.nist.gov/vuln/detail/CVE-2023-1"],
+        "PublishedDate": "2023-01-02T00:00:00Z", "LastModifiedDate": "2023-02-02T00:00:00Z",
+        "CVSS": {"nvd": {"V3Score": 7.5}}
+    } for i in range(findings)]
+    return {"SchemaVersion": 2, "ArtifactName": "babyfoot-backend:latest", "ArtifactType": "container_image",
+            "Results": [{"Target": "babyfoot-backend:latest (debian 12.4)", "Type": "debian", "Vulnerabilities": vulns}]}
+
+
+def make_snyk(findings: int):
+    vulns = [{
+        "id": f"SNYK-JAVA-X-{i}", "title": "Deserialization", "severity": ["critical", "high", "medium", "low"][i % 4],
+        "cvssScore": 7.5, "packageName": f"org.x:lib{i % 300}", "version": "1.0", "fixedIn": ["1.2"],
+        "isUpgradable": bool(i % 2), "identifiers": {"CVE": [f"CVE-2023-{i % 5000}"], "CWE": ["CWE-502"]},
+        "references": [{"url": "https://snyk.io/x"}], "publicationTime": "2023-01-01T00:00:00Z",
+        "exploitMaturity": "No Known Exploit"
+    } for i in range(findings)]
+    return {"vulnerabilities": vulns, "org": "acme", "projectName": "babyfoot", "dependencyCount": 42}
+
+
+def retained(build):
+    """(objet construit, octets alloués par build() et encore retenus)"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--findings", type=int, default=100000)
+    parser.add_argument("--tool", choices=("trivy", "snyk"), default="trivy")
+    args = parser.parse_args()
+
+    module = load_normalizer()
+    raw = make_trivy(args.findings) if args.tool == "trivy" else make_snyk(args.findings)
+
+    def normalize():
+        return module.ReportNormalizer(args.tool, METADATA).normalize(raw)["vulnerabilities"]
+
+    # Avant : mêmes valeurs, chaque finding sous forme de dicts imbriqués
+    nested, nested_bytes = retained(lambda: [vuln.as_dict() for vuln in normalize()])
+    del nested
+    compact, compact_bytes = retained(normalize)
+    nested = [vuln.as_dict() for vuln in compact]
+    assert json.dumps(compact, default=json_default) == json.dumps(nested)
+
+    count = args.findings
+    print(f"{count} findings {args.tool}, mémoire retenue par la liste (tracemalloc):")
+    print(f"  avant : dicts imbriqués            {nested_bytes / 2**20:6.1f} Mo  ({nested_bytes / count:5.0f} o/finding)")
+    print(f"  après : slots + valeurs internées  {compact_bytes / 2**20:6.1f} Mo  ({compact_bytes / count:5.0f} o/finding)")
+    print(f"  gain: -{100 * (1 - compact_bytes / nested_bytes):.0f} %")
+
+    start = time.perf_counter()
+    normalize()
+    print(f"Normalisation (sans tracemalloc)     {time.perf_counter() - start:6.2f} s")
+
+    start = time.perf_counter()
+    for vuln in nested:
+        json.dumps(vuln, ensure_ascii=False)
+    dicts_dump = time.perf_counter() - start
+    start = time.perf_counter()
+    for vuln in compact:
+        json.dumps(vuln, ensure_ascii=False, default=json_default)
+    compact_dump = time.perf_counter() - start
+    print("Sérialisation JSON :")
+    print(f"  dicts                               {dicts_dump:6.2f} s")
+    print(f"  findings compacts (default=)        {compact_dump:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
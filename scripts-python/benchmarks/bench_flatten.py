@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark : construction des documents findings de split_reports
+
+Compare l'ancienne méthode (contexte parent ré-aplati pour chaque finding,
+unified aplati deux fois) au contexte parent aplati une seule fois
+(ParentContext), avec et sans sérialisation JSON.
+
+Usage:
+    python3 benchmarks/bench_flatten.py [--findings 20000] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_codec import CODEC
+from split_reports import ParentContext, build_finding_document, serialize_finding_document, flatten, ensure_dict
+
+
+def make_report(findings: int):
+    """Rapport normalisé synthétique (forme Trivy)"""
+    report = {
+        "metadata": {
+            "tool": "trivy",
+            "tool_version": "2",
+            "service": "backend",
+            "build_id": "123",
+            "scan_type": "container",
+            "scan_start_time": 1700000000000,
+            "scan_end_time": 1700000060000,
+            "scan_duration_ms": 60000,
+            "git": {"commit": "abc123", "commit_time": 1699990000000, "author": "dev@example.com", "branch": "main"},
+            "pipeline": {"source": "jenkins", "environment": "dev"},
+            "trivy": {"schema_version": 2, "artifact_name": "babyfoot-backend:latest",
+                      "artifact_type": "container_image", "targets_analyzed": 4}
+        },
+        "vulnerabilities": []
+    }
+    for i in range(findings):
+        report["vulnerabilities"].append({
+            "id": f"CVE-2023-{i % 5000}",
+            "title": f"Vulnerability {i}",
+            "severity": "high",
+            "cvss_score": 7.5,
+            "package": {"name": f"pkg{i % 300}", "version": "1.0.0", "type": "debian"},
+            "fixed_in": ["1.0.1"],
+            "target": "babyfoot-backend:latest (debian 12.4)",
+            "cve": [f"CVE-2023-{i % 5000}"],
+            "cwe": ["CWE-79"],
+            "references": ["https://nvd.nist.gov/vuln/detail/CVE-2023-1", "https://security-tracker.debian.org/"],
+            "publication_time": "2023-01-02T00:00:00Z",
+            "last_modified_time": "2023-02-02T00:00:00Z",
+            "mitigation_recommendation": f"Update pkg{i % 300} to version 1.0.1 or later",
+            "unified": {
+                "vulnerability_id": f"CVE-2023-{i % 5000}", "type": "cve", "severity": "high",
+                "severity_score": 7.5, "is_security_issue": True, "is_vulnerability": True,
+                "category": "security", "is_fixable": True, "has_fix_available": True,
+                "fix_version": "1.0.1", "can_auto_upgrade": False, "is_exploitable": False,
+                "exploit_maturity": "not-applicable", "component": f"pkg{i % 300}@1.0.0",
+                "location": "babyfoot-backend:latest (debian)", "assignee": "dev@example.com",
+                "team": "backend-team", "status": "open", "first_seen": "2023-01-02T00:00:00Z",
+                "last_seen": "2025-01-01T00:00:00Z", "resolution_date": "1970-01-01T00:00:00Z",
+                "age_days": 0, "mttr_hours": 0.0
+            }
+        })
+    return report
+
+
+def legacy_finding_document(vuln_item, report_id, report_data):
+    """Implémentation d'origine : contexte parent ré-aplati pour chaque finding"""
+    child_doc = {"doc_type": "vulnerability_finding", "report_id": report_id}
+    flatten("vulnerability", vuln_item, child_doc)
+    flatten("vulnerability.unified", vuln_item["unified"], child_doc)
+    for key in ("metadata", "service", "tool", "build", "git", "pipeline"):
+        block = ensure_dict(report_data.get(key, {}))
+        if block:
+            flatten(key, block, child_doc)
+    child_doc["report_id"] = report_id
+    return child_doc
+
+
+def measure(label, func, findings, repeat):
+    best = min(_timed(func) for _ in range(repeat))
+    print(f"  {label:<45} {findings / best:>12,.0f} findings/s")
+    return findings / best
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--findings", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    report = make_report(args.findings)
+    vulns = report["vulnerabilities"]
+    context = ParentContext(report)
+
+    # Contrôle : même document avant/après
+    assert legacy_finding_document(vulns[0], "r", report) == build_finding_document(vulns[0], "r", context)
+    assert CODEC.dumpb(legacy_finding_document(vulns[0], "r", report)) == \
+        serialize_finding_document(vulns[0], "r", context)
+
+    print(f"Construction de {args.findings} findings (meilleur de {args.repeat}):")
+    before = measure("avant : flatten parent par finding (dict)",
+                     lambda: [legacy_finding_document(v, "r", report) for v in vulns], args.findings, args.repeat)
+    after = measure("après : ParentContext (dict)",
+                    lambda: [build_finding_document(v, "r", context) for v in vulns],
+                    args.findings, args.repeat)
+    print(f"  gain: x{after / before:.2f}")
+
+    print("Construction + sérialisation JSON:")
+    before = measure(f"avant : flatten parent + {CODEC.name}",
+                     lambda: [CODEC.dumpb(legacy_finding_document(v, "r", report)) for v in vulns],
+                     args.findings, args.repeat)
+    after = measure("après : fragment parent pré-sérialisé",
+                    lambda: [serialize_finding_document(v, "r", context) for v in vulns], args.findings, args.repeat)
+    print(f"  gain: x{after / before:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks du pipeline de normalisation
+
+Pour chaque outil (Snyk, Trivy, SonarQube) et chaque taille, un rapport brut
+synthétique est généré (generate_reports.py, graine fixe, mis en cache dans
+--workdir), puis traité dans un sous-processus dédié (RSS non pollué par les
+cas précédents). Chaque phase est chronométrée séparément :
+
+- mode memory : parse (json.load) → normalize (ReportNormalizer.normalize)
+  → write (save_normalized_report_atomic) → split (split_and_write)
+- mode stream : run_normalization(stream=True) avec --split-output, en une
+  passe (Snyk/Trivy uniquement, SonarQube n'a pas de mode flux)
+
+Mesures par phase : durée, findings/s et pic de RSS (remis à zéro entre les
+phases via /proc/self/clear_refs sous Linux, sinon pic du processus), meilleure
+valeur sur --repeat exécutions.
+
+Les résultats sont écrits en JSON (--output) et peuvent être comparés à un
+résultat précédent (--baseline) : une baisse de débit ou une hausse de RSS
+au-delà de --tolerance est signalée et la commande sort en code 1.
+Aucune dépendance réseau ni paquet tiers.
+
+Usage:
+    python3 benchmarks/bench_pipeline.py [--sizes 1000,10000,100000] [--tools snyk,trivy,sonarqube]
+                                         [--modes memory,stream] [--output bench-results.json]
+                                         [--baseline bench-baseline.json] [--tolerance 0.2] [--repeat 3]
+    python3 benchmarks/bench_pipeline.py --sizes 1000000 --modes stream
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from generate_reports import TOOLS, DEFAULT_SEED, generate_report
+
+RESULTS_FORMAT = 1
+DEFAULT_SIZES = (1000, 10000, 100000)
+MODES = ("memory", "stream")
+STREAM_TOOLS = ("snyk", "trivy", "sarif")
+DEFAULT_TOLERANCE = 0.2
+DEFAULT_REPEAT = 3
+# Phases trop courtes pour être comparées (bruit de mesure)
+DEFAULT_MIN_SECONDS = 0.05
+
+METADATA = {
+    "service": "backend", "build_id": "bench", "scan_type": "container",
+    "scan_start_time": 1737453600000, "scan_end_time": 1737453660000,
+    "code_introduction_time": 1737450000000, "git_commit": "0000000", "git_branch": "main",
+    "git_author": "bench@example.com", "environment": "bench"
+}
+
+
+# ----------------------------------------------------------------------
+# Mesure (sous-processus)
+# ----------------------------------------------------------------------
+
+def _reset_peak_rss() -> bool:
+    """Remet à zéro le pic de RSS du processus (Linux, /proc/self/clear_refs)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss : Ko sous Linux, octets sous macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class PhaseTimer:
+    def __init__(self, findings: int):
+        self.findings = findings
+        self.phases: Dict[str, Dict[str, float]] = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        _reset_peak_rss()
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        self.phases[name] = {
+            "seconds": round(elapsed, 4),
+            "findings_per_sec": round(self.findings / elapsed, 1) if elapsed > 0 else 0.0,
+            "peak_rss_mb": round(_peak_rss_mb(), 1)
+        }
+
+
+def load_normalizer():
+    spec = importlib.util.spec_from_file_location("normalize_reports", os.path.join(SCRIPTS_DIR, "normalize-reports.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_case(tool: str, findings: int, mode: str, raw_file: str, workdir: str) -> Dict[str, Any]:
+    """Exécute un cas dans le processus courant, retourne les mesures par phase"""
+    module = load_normalizer()
+    from split_reports import split_and_write
+
+    base = os.path.join(workdir, f"out-{tool}-{findings}-{mode}")
+    normalized_file = f"{base}-normalized.json"
+    split_file = f"{base}-split.ndjson"
+    timer = PhaseTimer(findings)
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        if mode == "stream":
+            with timer.phase("stream"):
+                module.run_normalization(raw_file, normalized_file, tool, METADATA, stream=True,
+                                         split_output=split_file, skip_normalized=True)
+        else:
+            with timer.phase("parse"):
+                with open(raw_file, "r", encoding="utf-8") as f:
+                    raw_data = json.load(f)
+            with timer.phase("normalize"):
+                normalized = module.ReportNormalizer(tool, METADATA).normalize(raw_data)
+            del raw_data
+            with timer.phase("write"):
+                module.save_normalized_report_atomic(normalized, normalized_file)
+            del normalized
+            with timer.phase("split"):
+                split_and_write(normalized_file, split_file)
+
+    for path in (normalized_file, split_file):
+        if os.path.exists(path):
+            os.remove(path)
+
+    total = sum(phase["seconds"] for phase in timer.phases.values())
+    return {
+        "tool": tool,
+        "findings": findings,
+        "mode": mode,
+        "phases": timer.phases,
+        "total_seconds": round(total, 4),
+        "findings_per_sec": round(findings / total, 1) if total > 0 else 0.0,
+        "peak_rss_mb": max(phase["peak_rss_mb"] for phase in timer.phases.values())
+    }
+
+
+# ----------------------------------------------------------------------
+# Pilote
+# ----------------------------------------------------------------------
+
+def raw_report(tool: str, findings: int, seed: int, workdir: str) -> str:
+    path = os.path.join(workdir, f"{tool}-{findings}-s{seed}.json")
+    if not os.path.exists(path):
+        print(f" Génération du rapport {tool} ({findings} findings)...")
+        generate_report(tool, findings, path, seed)
+    return path
+
+
+def best_of(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Meilleure mesure de chaque phase sur plusieurs exécutions d'un même cas"""
+    failed = [run for run in runs if "error" in run]
+    if failed:
+        return failed[0]
+    best = dict(runs[0])
+    best["phases"] = {}
+    for name in runs[0]["phases"]:
+        seconds = min(run["phases"][name]["seconds"] for run in runs)
+        best["phases"][name] = {
+            "seconds": seconds,
+            "findings_per_sec": round(best["findings"] / seconds, 1) if seconds > 0 else 0.0,
+            "peak_rss_mb": min(run["phases"][name]["peak_rss_mb"] for run in runs)
+        }
+    total = sum(phase["seconds"] for phase in best["phases"].values())
+    best["total_seconds"] = round(total, 4)
+    best["findings_per_sec"] = round(best["findings"] / total, 1) if total > 0 else 0.0
+    best["peak_rss_mb"] = max(phase["peak_rss_mb"] for phase in best["phases"].values())
+    best["repeat"] = len(runs)
+    return best
+
+
+def spawn_case(tool: str, findings: int, mode: str, raw_file: str, workdir: str) -> Dict[str, Any]:
+    """Lance un cas dans un sous-processus (pic de RSS isolé)"""
+    command = [sys.executable, os.path.abspath(__file__), "--run-case", tool, str(findings), mode, raw_file, workdir]
+    completed = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if completed.returncode != 0:
+        error = (completed.stderr.strip().splitlines() or ["code " + str(completed.returncode)])[-1]
+        return {"tool": tool, "findings": findings, "mode": mode, "error": error}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        completed = subprocess.run(["git", "-C", SCRIPTS_DIR, "rev-parse", "--short", "HEAD"],
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    print(f"\n{'outil':<10} {'findings':>9} {'mode':<7} {'phase':<10} {'durée (s)':>10} {'findings/s':>12} {'RSS (Mo)':>9}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['tool']:<10} {result['findings']:>9} {result['mode']:<7} ÉCHEC: {result['error']}")
+            continue
+        for name, phase in result["phases"].items():
+            print(f"{result['tool']:<10} {result['findings']:>9} {result['mode']:<7} {name:<10} "
+                  f"{phase['seconds']:>10.3f} {phase['findings_per_sec']:>12,.0f} {phase['peak_rss_mb']:>9.1f}")
+
+
+def _index(results: List[Dict[str, Any]]) -> Dict[Tuple[str, int, str, str], Dict[str, float]]:
+    index = {}
+    for result in results:
+        for name, phase in result.get("phases", {}).items():
+            index[(result["tool"], result["findings"], result["mode"], name)] = phase
+    return index
+
+
+def compare_to_baseline(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float,
+                        min_seconds: float = DEFAULT_MIN_SECONDS) -> List[str]:
+    """
+    Régressions (débit ou RSS) au-delà de la tolérance par rapport au résultat
+    de référence. Le débit des phases plus courtes que `min_seconds` n'est pas jugé.
+    """
+    reference = _index(baseline.get("results", []))
+    regressions = []
+    print(f"\nComparaison à la référence ({baseline.get('created', '?')}, commit {baseline.get('git_commit') or '?'}) :")
+    for key, phase in _index(results).items():
+        base = reference.get(key)
+        if base is None:
+            continue
+        label = "/".join(str(part) for part in key)
+        speed = phase["findings_per_sec"] / base["findings_per_sec"] if base["findings_per_sec"] else 1.0
+        memory = phase["peak_rss_mb"] / base["peak_rss_mb"] if base["peak_rss_mb"] else 1.0
+        flag = ""
+        if speed < 1 - tolerance and max(phase["seconds"], base["seconds"]) >= min_seconds:
+            flag = "  ← débit en baisse"
+            regressions.append(f"{label}: débit x{speed:.2f}")
+        if memory > 1 + tolerance:
+            flag += "  ← RSS en hausse"
+            regressions.append(f"{label}: RSS x{memory:.2f}")
+        print(f"  {label:<32} débit x{speed:5.2f}   RSS x{memory:5.2f}{flag}")
+    return regressions
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", default=",".join(TOOLS), help="Outils (défaut: snyk,trivy,sonarqube,sarif)")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Nombres de findings (ex: 1000,10000,100000,1000000)")
+    parser.add_argument("--modes", default=",".join(MODES), help="memory et/ou stream")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--workdir", default=os.path.join("/tmp", "normalizer-bench"),
+                        help="Rapports générés (réutilisés d'une exécution à l'autre) et sorties temporaires")
+    parser.add_argument("--output", default="bench-results.json", help="Résultats JSON")
+    parser.add_argument("--baseline", help="Résultats de référence (JSON produit par une exécution précédente)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Écart toléré vs la référence (0.2 = 20 %%)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="Exécutions par cas, meilleure mesure retenue (défaut: 3)")
+    parser.add_argument("--min-seconds", type=float, default=DEFAULT_MIN_SECONDS,
+                        help="Durée minimale d'une phase pour juger son débit (défaut: 0.05)")
+    parser.add_argument("--run-case", nargs=5, metavar=("TOOL", "FINDINGS", "MODE", "RAW", "WORKDIR"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        return args
+    args.tools = [tool.strip() for tool in args.tools.split(",") if tool.strip()]
+    args.modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    try:
+        args.sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    except ValueError:
+        parser.error("--sizes : liste d'entiers séparés par des virgules")
+    for tool in args.tools:
+        if tool not in TOOLS:
+            parser.error(f"outil inconnu: {tool}")
+    for mode in args.modes:
+        if mode not in MODES:
+            parser.error(f"mode inconnu: {mode}")
+    return args
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+
+    if args.run_case:
+        tool, findings, mode, raw_file, workdir = args.run_case
+        print(json.dumps(run_case(tool, int(findings), mode, raw_file, workdir)))
+        return
+
+    os.makedirs(args.workdir, exist_ok=True)
+    results = []
+    for size in args.sizes:
+        for tool in args.tools:
+            raw_file = raw_report(tool, size, args.seed, args.workdir)
+            for mode in args.modes:
+                if mode == "stream" and tool not in STREAM_TOOLS:
+                    continue
+                print(f" Benchmark {tool} / {size} findings / {mode}...")
+                runs = [spawn_case(tool, size, mode, raw_file, args.workdir) for _ in range(max(args.repeat, 1))]
+                results.append(best_of(runs))
+
+    print_results(results)
+
+    document = {
+        "format": RESULTS_FORMAT,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "seed": args.seed,
+        "host": {"python": platform.python_version(), "platform": platform.platform(),
+                 "cpu_count": os.cpu_count()},
+        "results": results
+    }
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+    print(f"\n Résultats: {args.output}")
+
+    failed = any("error" in result for result in results)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance, args.min_seconds)
+        if regressions:
+            print(f"\n {len(regressions)} régression(s) au-delà de {args.tolerance:.0%} :")
+            for regression in regressions:
+                print(f"  • {regression}")
+            failed = True
+        else:
+            print(f"\n Aucune régression au-delà de {args.tolerance:.0%}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark : recommandations de mitigation (recommendations.py)
+
+Compare les anciennes méthodes _extract_*_recommendation du normaliseur
+(description Snyk passée en minuscules et découpée à chaque finding, tests de
+sous-chaînes SonarQube) au moteur à règles compilées et cache LRU, sur :
+
+- des findings tous distincts (generate_reports.py : pire cas pour le cache)
+- des findings réalistes : chemins de dépendance Snyk qui répètent un même avis,
+  issues SonarQube dont le message dépend de la règle
+
+Les textes produits sont vérifiés identiques (règles hors duplication).
+
+Usage:
+    python3 benchmarks/bench_recommendations.py [--findings 50000] [--paths 6] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from generate_reports import DEFAULT_SEED, iter_snyk_vulnerabilities, iter_sonarqube_issues
+from json_codec import CODEC
+from recommendations import RecommendationEngine, SONARQUBE_DUPLICATION_RULES
+
+
+def legacy_snyk(vuln):
+    """Implémentation d'origine (_extract_snyk_recommendation)"""
+    if vuln.get("isUpgradable") and vuln.get("fixedIn"):
+        fixed_version = vuln["fixedIn"][0] if isinstance(vuln["fixedIn"], list) else vuln["fixedIn"]
+        pkg_name = vuln.get("packageName", "package")
+        return f"Upgrade {pkg_name} to version {fixed_version}"
+    if vuln.get("isPatchable"):
+        return "Apply available security patch"
+    description = vuln.get("description", "")
+    if "upgrade" in description.lower() or "update" in description.lower():
+        sentences = description.split('.')
+        for sentence in sentences:
+            if "upgrade" in sentence.lower() or "update" in sentence.lower():
+                return sentence.strip()
+    return "Review Snyk security advisory for remediation steps"
+
+
+def legacy_sonarqube(issue):
+    """Implémentation d'origine (_extract_sonarqube_recommendation)"""
+    issue_type = issue.get("type", "").upper()
+    message = issue.get("message", "")
+    if "duplicat" in message.lower():
+        return "Refactor code to extract duplicated logic into reusable functions or utility classes"
+    if issue_type == "BUG":
+        return f"Fix bug: {message}. Review SonarQube rule documentation for detailed guidance"
+    if issue_type == "VULNERABILITY":
+        return f"Security issue: {message}. Apply secure coding practices as per SonarQube recommendations"
+    if issue_type == "CODE_SMELL":
+        return f"Improve code quality: {message}"
+    if issue_type == "SECURITY_HOTSPOT":
+        return f"Review security hotspot: {message}. Verify if this code path is exploitable"
+    return f"Review and fix: {message}"
+
+
+def realistic_snyk(rng: random.Random, count: int, paths: int):
+    """Avis Snyk répétés pour `paths` chemins de dépendance (chaînes distinctes, comme après décodage JSON)"""
+    advisories = list(iter_snyk_vulnerabilities(rng, max(1, count // paths)))
+    for advisory in advisories:
+        # Description d'avis réaliste : remédiation en fin de texte
+        advisory["description"] = (advisory["description"] * 6).replace("## Overview", "## Details") \
+            + "\n## Remediation\nThere is no fixed version yet. Update to a patched fork when available."
+        advisory["isUpgradable"] = False
+    return CODEC.loads(CODEC.dumpb([advisories[i % len(advisories)] for i in range(count)]))
+
+
+def realistic_sonarqube(rng: random.Random, count: int):
+    """Issues dont le message est celui de leur règle (littéral variable pour un quart d'entre elles)"""
+    rules = [(f"java:S{100 + n}", rng.choice(("BUG", "VULNERABILITY", "CODE_SMELL")), f"Rule {n} message")
+             for n in range(300)]
+    issues = []
+    for i in range(count):
+        rule, issue_type, message = rules[int(rng.paretovariate(1.2)) % len(rules)]
+        if rng.random() < 0.25:
+            message = f'{message} for "field{rng.randrange(40)}".'
+        issues.append({"rule": rule, "type": issue_type, "message": message})
+    return CODEC.loads(CODEC.dumpb(issues))
+
+
+def measure(label, func, items, repeat):
+    best = min(_timed(func, items) for _ in range(repeat))
+    print(f"  {label:<42} {len(items) / best:>12,.0f} findings/s")
+    return len(items) / best
+
+
+def _timed(func, items):
+    start = time.perf_counter()
+    func(items)
+    return time.perf_counter() - start
+
+
+def compare(title, items, legacy, method_name, repeat):
+    engine = RecommendationEngine()
+    method = getattr(engine, method_name)
+    assert [legacy(item) for item in items] == [method(item) for item in items]
+    hits, misses = engine.counters()
+
+    print(f"{title} ({len(items)} findings, cache {hits / max(hits + misses, 1) * 100:.0f} % hits):")
+    before = measure("avant : analyse du texte par finding", lambda xs: [legacy(x) for x in xs], items, repeat)
+
+    def run_engine(xs):
+        # Moteur neuf à chaque passe : cache vide au début du rapport
+        recommend = getattr(RecommendationEngine(), method_name)
+        return [recommend(x) for x in xs]
+
+    after = measure("après : règles compilées + cache LRU", run_engine, items, repeat)
+    print(f"  gain: x{after / before:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--findings", type=int, default=50000)
+    parser.add_argument("--paths", type=int, default=6, help="Chemins de dépendance par avis Snyk")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    unique_snyk = CODEC.loads(CODEC.dumpb([dict(v, isUpgradable=False)
+                                           for v in iter_snyk_vulnerabilities(rng, args.findings)]))
+    unique_sonar = [issue for issue in iter_sonarqube_issues(rng, args.findings)
+                    if issue["rule"].rpartition(":")[2] not in SONARQUBE_DUPLICATION_RULES]
+
+    compare("Snyk, descriptions toutes distinctes", unique_snyk, legacy_snyk, "snyk", args.repeat)
+    compare("Snyk, avis répétés par chemin", realistic_snyk(rng, args.findings, args.paths), legacy_snyk, "snyk",
+            args.repeat)
+    compare("SonarQube, messages tous distincts", unique_sonar, legacy_sonarqube, "sonarqube", args.repeat)
+    compare("SonarQube, messages par règle", realistic_sonarqube(rng, args.findings), legacy_sonarqube, "sonarqube",
+            args.repeat)
+
+
+if __name__ == "__main__":
+    main()
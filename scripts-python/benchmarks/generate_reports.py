@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Générateur de rapports bruts synthétiques (Snyk, Trivy, SonarQube, SARIF)
+
+Rapports reproductibles (graine fixe) au format des outils, avec des
+distributions proches des builds réels : sévérités déséquilibrées, paquets
+et CVE réutilisés, correctifs disponibles pour une partie des findings,
+descriptions et références de taille réaliste. SonarQube : `detailed_issues`
+(tous statuts) + `global_measures`, comme sonar-collector. SARIF : un run
+façon CodeQL (règles avec security-severity et tags CWE, ruleIndex, quelques
+résultats supprimés).
+
+Les findings sont écrits au fil de l'eau : un rapport de 1M findings ne
+passe jamais en mémoire.
+
+Usage:
+    python3 benchmarks/generate_reports.py <snyk|trivy|sonarqube|sarif> <findings> <output.json> [--seed 42]
+"""
+
+import argparse
+import json
+import os
+import random
+from typing import Any, Dict, Iterator, TextIO
+
+TOOLS = ("snyk", "trivy", "sonarqube", "sarif")
+DEFAULT_SEED = 42
+
+# Poids des sévérités observés sur les builds (majorité medium/low)
+SNYK_SEVERITIES = (("critical", 4), ("high", 18), ("medium", 45), ("low", 33))
+TRIVY_SEVERITIES = (("CRITICAL", 3), ("HIGH", 17), ("MEDIUM", 45), ("LOW", 30), ("UNKNOWN", 5))
+SONAR_SEVERITIES = (("BLOCKER", 2), ("CRITICAL", 6), ("MAJOR", 40), ("MINOR", 37), ("INFO", 15))
+SONAR_TYPES = (("CODE_SMELL", 75), ("BUG", 12), ("VULNERABILITY", 5), ("SECURITY_HOTSPOT", 8))
+SONAR_STATUSES = (("OPEN", 80), ("CONFIRMED", 5), ("RESOLVED", 8), ("CLOSED", 7))
+EXPLOIT_MATURITIES = (("No Known Exploit", 80), ("Proof of Concept", 15), ("Mature", 5))
+CWES = ("CWE-79", "CWE-89", "CWE-20", "CWE-22", "CWE-502", "CWE-400", "CWE-787", "CWE-125", "CWE-352", "CWE-918")
+
+WORDS = ("buffer", "overflow", "remote", "attacker", "crafted", "request", "denial", "service", "injection",
+         "memory", "allows", "via", "parser", "header", "validation", "improper", "input", "leads", "to",
+         "arbitrary", "code", "execution", "when", "processing", "untrusted", "data", "in", "the", "function")
+
+TRIVY_TARGETS = (
+    ("babyfoot-backend:latest (debian 12.4)", "os-pkgs", "debian"),
+    ("app/target/babyfoot-backend.jar", "lang-pkgs", "jar"),
+    ("usr/local/lib/node_modules/npm/package-lock.json", "lang-pkgs", "node-pkg"),
+    ("usr/lib/python3/dist-packages/requirements.txt", "lang-pkgs", "python-pkg")
+)
+
+
+def _weighted(rng: random.Random, choices) -> Any:
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _date(rng: random.Random, start_year: int = 2018) -> str:
+    return (f"{rng.randint(start_year, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+            f"T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00Z")
+
+
+def _version(rng: random.Random) -> str:
+    return f"{rng.randint(0, 9)}.{rng.randint(0, 30)}.{rng.randint(0, 20)}"
+
+
+def _pool(count: int, ratio: int, minimum: int) -> int:
+    """Taille d'un pool d'identifiants partagés (paquets, CVE) : réutilisation réaliste"""
+    return max(minimum, count // ratio)
+
+
+# ----------------------------------------------------------------------
+# Snyk
+# ----------------------------------------------------------------------
+
+def iter_snyk_vulnerabilities(rng: random.Random, count: int) -> Iterator[Dict[str, Any]]:
+    packages = _pool(count, 8, 20)
+    cves = _pool(count, 3, 50)
+    for i in range(count):
+        severity = _weighted(rng, SNYK_SEVERITIES)
+        package = f"org.example.lib{rng.randrange(packages)}:core-{rng.randrange(packages) % 40}"
+        version = _version(rng)
+        fixed = [_version(rng)] if rng.random() < 0.7 else []
+        has_cve = rng.random() < 0.8
+        cve_number = rng.randrange(cves) + 1000
+        cve = f"CVE-{2015 + cve_number % 11}-{cve_number}"
+        yield {
+            "id": f"SNYK-JAVA-ORGEXAMPLE-{1000000 + i}",
+            "title": _sentence(rng, 4),
+            "severity": severity,
+            "cvssScore": round(rng.uniform(1.0, 10.0), 1) if rng.random() < 0.9 else None,
+            "CVSSv3": "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H",
+            "packageName": package,
+            "version": version,
+            "moduleName": package,
+            "language": "java",
+            "packageManager": "maven",
+            "from": [f"babyfoot-backend@1.0.0", f"{package}@{version}"],
+            "upgradePath": [False, f"{package}@{fixed[0]}"] if fixed else [],
+            "fixedIn": fixed,
+            "isUpgradable": bool(fixed) and rng.random() < 0.7,
+            "isPatchable": rng.random() < 0.05,
+            "identifiers": {"CVE": [cve] if has_cve else [], "CWE": [rng.choice(CWES)], "GHSA": []},
+            "references": [{"title": "GitHub Advisory", "url": f"https://github.com/advisories/GHSA-{i:08x}"},
+                           {"title": "NVD", "url": f"https://nvd.nist.gov/vuln/detail/{cve}"}][:rng.randint(1, 2)],
+            "publicationTime": _date(rng),
+            "disclosureTime": _date(rng),
+            "exploitMaturity": _weighted(rng, EXPLOIT_MATURITIES),
+            "description": f"## Overview\n{_sentence(rng, 30)}. "
+                           + (f"Upgrade {package} to version {fixed[0]} or higher. " if fixed else "")
+                           + _sentence(rng, 20) + "."
+        }
+
+
+def write_snyk(out: TextIO, rng: random.Random, count: int) -> None:
+    header = {"ok": False, "dependencyCount": _pool(count, 8, 20), "org": "acme", "policy": "",
+              "isPrivate": True, "packageManager": "maven", "projectName": "babyfoot-backend",
+              "version": "1.1290.0", "summary": f"{count} vulnerable dependency paths"}
+    _write_with_array(out, header, "vulnerabilities", iter_snyk_vulnerabilities(rng, count))
+
+
+# ----------------------------------------------------------------------
+# Trivy
+# ----------------------------------------------------------------------
+
+def iter_trivy_vulnerabilities(rng: random.Random, count: int, pkg_type: str) -> Iterator[Dict[str, Any]]:
+    packages = _pool(count, 6, 15)
+    cves = _pool(count, 3, 50)
+    for _ in range(count):
+        name = f"lib{pkg_type.split('-')[0]}{rng.randrange(packages)}"
+        cve_number = rng.randrange(cves) + 1000
+        vuln_id = f"CVE-{2015 + cve_number % 11}-{cve_number}" if rng.random() < 0.9 else f"GHSA-{cve_number:04x}-x"
+        fixed = _version(rng) if rng.random() < 0.6 else ""
+        vuln = {
+            "VulnerabilityID": vuln_id,
+            "PkgID": f"{name}@{_version(rng)}",
+            "PkgName": name,
+            "InstalledVersion": _version(rng),
+            "FixedVersion": fixed,
+            "Status": "fixed" if fixed else "affected",
+            "Layer": {"DiffID": f"sha256:{rng.getrandbits(128):032x}"},
+            "SeveritySource": "nvd",
+            "PrimaryURL": f"https://avd.aquasec.com/nvd/{vuln_id.lower()}",
+            "DataSource": {"ID": "debian", "Name": "Debian Security Tracker", "URL": "https://salsa.debian.org/"},
+            "Title": _sentence(rng, 8),
+            "Description": _sentence(rng, 45) + ".",
+            "Severity": _weighted(rng, TRIVY_SEVERITIES),
+            "CweIDs": [rng.choice(CWES)],
+            "References": [f"https://nvd.nist.gov/vuln/detail/{vuln_id}"]
+                          + [f"https://security-tracker.debian.org/tracker/{vuln_id}/{n}" for n in range(rng.randint(1, 5))],
+            "PublishedDate": _date(rng),
+            "LastModifiedDate": _date(rng, 2023)
+        }
+        if rng.random() < 0.75:
+            score = round(rng.uniform(2.0, 10.0), 1)
+            vuln["CVSS"] = {"nvd": {"V3Vector": "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H", "V3Score": score},
+                            "redhat": {"V3Vector": "CVSS:3.1/AV:N/AC:H/PR:N/UI:N/S:U/C:H/I:N/A:N", "V3Score": score}}
+        yield vuln
+
+
+def write_trivy(out: TextIO, rng: random.Random, count: int) -> None:
+    header = {"SchemaVersion": 2, "CreatedAt": "2025-01-21T10:00:00Z", "ArtifactName": "babyfoot-backend:latest",
+              "ArtifactType": "container_image",
+              "Metadata": {"OS": {"Family": "debian", "Name": "12.4"}, "ImageID": f"sha256:{rng.getrandbits(128):032x}",
+                           "RepoTags": ["babyfoot-backend:latest"]}}
+    # Répartition des findings entre les cibles (OS majoritaire)
+    shares = (0.55, 0.25, 0.15, 0.05)
+    counts = [int(count * share) for share in shares]
+    counts[0] += count - sum(counts)
+
+    out.write(json.dumps(header, ensure_ascii=False)[:-1] + ', "Results": [')
+    for index, ((target, klass, pkg_type), target_count) in enumerate(zip(TRIVY_TARGETS, counts)):
+        if index:
+            out.write(", ")
+        result = {"Target": target, "Class": klass, "Type": pkg_type}
+        _write_with_array(out, result, "Vulnerabilities", iter_trivy_vulnerabilities(rng, target_count, pkg_type))
+    # Cible sans vulnérabilité (Vulnerabilities: null, comme Trivy)
+    out.write(', {"Target": "etc/ssl/private", "Class": "secret", "Vulnerabilities": null}]}')
+
+
+# ----------------------------------------------------------------------
+# SonarQube (sortie de sonar-collector : detailed_issues + global_measures)
+# ----------------------------------------------------------------------
+
+def iter_sonarqube_issues(rng: random.Random, count: int) -> Iterator[Dict[str, Any]]:
+    files = _pool(count, 15, 10)
+    for i in range(count):
+        issue_type = _weighted(rng, SONAR_TYPES)
+        status = _weighted(rng, SONAR_STATUSES)
+        line = rng.randint(1, 800)
+        message = "Remove this duplicated block" if rng.random() < 0.05 else _sentence(rng, 7)
+        yield {
+            "key": f"AY{i:010d}",
+            "rule": f"java:S{rng.randint(100, 6000)}",
+            "severity": _weighted(rng, SONAR_SEVERITIES),
+            "component": f"babyfoot-backend:src/main/java/com/example/babyfoot/module{rng.randrange(files) % 30}"
+                         f"/Class{rng.randrange(files)}.java",
+            "project": "babyfoot-backend",
+            "line": line,
+            "hash": f"{rng.getrandbits(128):032x}",
+            "textRange": {"startLine": line, "endLine": line + rng.randint(0, 5), "startOffset": 4, "endOffset": 40},
+            "flows": [],
+            "status": status,
+            "resolution": "FIXED" if status in ("RESOLVED", "CLOSED") else "",
+            "message": message,
+            "effort": f"{rng.choice((2, 5, 10, 20, 30))}min",
+            "debt": f"{rng.choice((2, 5, 10, 20, 30))}min",
+            "author": f"dev{rng.randrange(12)}@example.com",
+            "tags": rng.sample(("cwe", "owasp-a1", "bad-practice", "performance", "suspicious", "clumsy"), 2),
+            "creationDate": _date(rng, 2022).replace("Z", "+0000"),
+            "updateDate": _date(rng, 2024).replace("Z", "+0000"),
+            "type": issue_type
+        }
+
+
+def write_sonarqube(out: TextIO, rng: random.Random, count: int) -> None:
+    header = {"projectKey": "babyfoot-backend", "projectName": "Babyfoot Backend",
+              "status": rng.choice(("OK", "ERROR")), "total_issues": count}
+    measures = [{"metric": "coverage", "value": f"{rng.uniform(40, 90):.1f}"},
+                {"metric": "duplicated_lines_density", "value": f"{rng.uniform(0, 15):.1f}"},
+                {"metric": "sqale_index", "value": str(count * 7)},
+                {"metric": "sqale_rating", "value": "2.0"},
+                {"metric": "reliability_rating", "value": "3.0"},
+                {"metric": "security_rating", "value": "1.0"},
+                {"metric": "ncloc", "value": str(count * 20)}]
+    out.write(json.dumps(header, ensure_ascii=False)[:-1] + f', "global_measures": {json.dumps(measures)}, ')
+    _write_with_array(out, {}, "detailed_issues", iter_sonarqube_issues(rng, count), opened=True)
+
+
+# ----------------------------------------------------------------------
+# SARIF (run CodeQL)
+# ----------------------------------------------------------------------
+
+SARIF_LEVELS = (("error", 30), ("warning", 50), ("note", 20))
+
+
+def sarif_rules(rng: random.Random, count: int) -> list:
+    rules = []
+    for i in range(count):
+        cwe = rng.choice(CWES)
+        rule = {
+            "id": f"java/rule-{i}",
+            "name": f"java/rule-{i}",
+            "shortDescription": {"text": _sentence(rng, 5)},
+            "fullDescription": {"text": _sentence(rng, 20)},
+            "defaultConfiguration": {"level": _weighted(rng, SARIF_LEVELS)},
+            "help": {"text": f"{_sentence(rng, 30)}\n\n{_sentence(rng, 60)}", "markdown": _sentence(rng, 60)},
+            "helpUri": f"https://codeql.github.com/codeql-query-help/java/rule-{i}/",
+            "properties": {"tags": ["security", f"external/cwe/{cwe.lower()}"], "precision": "high"}
+        }
+        # Règles de qualité sans score de sécurité
+        if rng.random() < 0.8:
+            rule["properties"]["security-severity"] = f"{rng.uniform(1, 10):.1f}"
+        else:
+            rule["properties"]["tags"] = ["maintainability"]
+        rules.append(rule)
+    return rules
+
+
+def iter_sarif_results(rng: random.Random, count: int, rules: int) -> Iterator[Dict[str, Any]]:
+    files = _pool(count, 10, 10)
+    for i in range(count):
+        line = rng.randint(1, 800)
+        result = {
+            "ruleId": f"java/rule-{i % rules}",
+            "ruleIndex": i % rules,
+            "message": {"text": _sentence(rng, 12)},
+            "locations": [{"physicalLocation": {
+                "artifactLocation": {"uri": f"src/main/java/com/example/Class{rng.randrange(files)}.java",
+                                     "uriBaseId": "%SRCROOT%", "index": 0},
+                "region": {"startLine": line, "startColumn": 5, "endColumn": 40}
+            }}],
+            "partialFingerprints": {"primaryLocationLineHash": f"{rng.getrandbits(64):016x}:1"}
+        }
+        if rng.random() < 0.02:
+            result["suppressions"] = [{"kind": "inSource"}]
+        yield result
+
+
+def write_sarif(out: TextIO, rng: random.Random, count: int) -> None:
+    rules = sarif_rules(rng, _pool(count, 50, 20))
+    tool = {"driver": {"name": "CodeQL", "semanticVersion": "2.15.4", "rules": rules}}
+    out.write('{"$schema": "https://json.schemastore.org/sarif-2.1.0.json", "version": "2.1.0", "runs": [')
+    out.write(json.dumps({"tool": tool}, ensure_ascii=False)[:-1] + ', "results": [')
+    for index, result in enumerate(iter_sarif_results(rng, count, len(rules))):
+        if index:
+            out.write(", ")
+        out.write(json.dumps(result, ensure_ascii=False))
+    # artifacts après results, comme CodeQL
+    out.write('], "artifacts": [{"location": {"uri": "src/main/java/com/example/Class0.java"}}]}]}')
+
+
+# ----------------------------------------------------------------------
+
+WRITERS = {"snyk": write_snyk, "trivy": write_trivy, "sonarqube": write_sonarqube, "sarif": write_sarif}
+
+
+def _write_with_array(out: TextIO, header: Dict[str, Any], key: str, items: Iterator[Dict[str, Any]],
+                      opened: bool = False) -> None:
+    """Écrit `header` complété par `key: [items...]` (objet déjà ouvert si `opened`)"""
+    if opened:
+        out.write(f"{json.dumps(key)}: [")
+    elif header:
+        out.write(json.dumps(header, ensure_ascii=False)[:-1] + f", {json.dumps(key)}: [")
+    else:
+        out.write(f"{{{json.dumps(key)}: [")
+    for index, item in enumerate(items):
+        if index:
+            out.write(", ")
+        out.write(json.dumps(item, ensure_ascii=False))
+    out.write("]}")
+
+
+def generate_report(tool: str, count: int, output_file: str, seed: int = DEFAULT_SEED) -> str:
+    """Écrit un rapport brut `tool` de `count` findings (atomique), retourne son chemin"""
+    if tool not in WRITERS:
+        raise ValueError(f"Outil non supporté: {tool}")
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    rng = random.Random(f"{tool}:{count}:{seed}")
+    temp_file = output_file + ".tmp"
+    with open(temp_file, "w", encoding="utf-8") as out:
+        WRITERS[tool](out, rng, count)
+    os.replace(temp_file, output_file)
+    return output_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tool", choices=TOOLS)
+    parser.add_argument("findings", type=int)
+    parser.add_argument("output")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    generate_report(args.tool, args.findings, args.output, args.seed)
+    print(f" Rapport {args.tool} de {args.findings} findings généré: {args.output} "
+          f"({os.path.getsize(args.output) / 2**20:.1f} Mo)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Score de base CVSS calculé depuis le vecteur (CVSS v3.0 / v3.1)
+
+Le normaliseur ne lisait que les scores déjà calculés (V3Score Trivy nvd/redhat,
+cvssScore Snyk) ; sans score, severity_score retombait sur la correspondance
+grossière sévérité → score (critical 10, high 7...). Le vecteur, presque
+toujours présent (V3Vector Trivy, CVSSv3 Snyk), donne le score exact :
+
+    CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H  → 9.8
+
+Formules de la spécification FIRST (v3.1 : arrondi Roundup entier, v3.0 :
+arrondi au dixième supérieur). Les métriques temporelles/environnementales
+sont ignorées (score de base). Les vecteurs CVSS:4.0 ne sont pas calculés : leur
+score dépend de la table de macro-vecteurs de la spécification, non embarquée ici.
+CvssScorer les reconnaît à leur préfixe, les compte (v4_vectors) et rend None
+(repli du normaliseur sur la sévérité).
+
+Un rapport de 100k findings ne compte que quelques centaines de vecteurs
+distincts : chaque vecteur est analysé une fois (CvssScorer), au fil des
+findings (mode --stream compris, sans lot à constituer).
+"""
+
+import math
+from typing import Dict, Optional
+
+# Poids des métriques de base (spécification CVSS v3.1, section 7.4)
+WEIGHTS = {
+    "AV": {"N": 0.85, "A": 0.62, "L": 0.55, "P": 0.2},
+    "AC": {"L": 0.77, "H": 0.44},
+    "UI": {"N": 0.85, "R": 0.62},
+    "C": {"H": 0.56, "L": 0.22, "N": 0.0},
+    "I": {"H": 0.56, "L": 0.22, "N": 0.0},
+    "A": {"H": 0.56, "L": 0.22, "N": 0.0}
+}
+# PR dépend du périmètre (S:U / S:C)
+PRIVILEGES = {
+    "U": {"N": 0.85, "L": 0.62, "H": 0.27},
+    "C": {"N": 0.85, "L": 0.68, "H": 0.5}
+}
+BASE_METRICS = ("AV", "AC", "PR", "UI", "S", "C", "I", "A")
+V3_PREFIXES = ("CVSS:3.1/", "CVSS:3.0/")
+V4_PREFIX = "CVSS:4.0/"
+# Garde-fou mémoire : au-delà, les vecteurs ne sont plus mémorisés (rapport atypique)
+MAX_VECTORS = 65536
+
+
+def _roundup_v31(value: float) -> float:
+    """Roundup de l'annexe A de la spécification v3.1 (sans erreur de virgule flottante)"""
+    integer = round(value * 100000)
+    if integer % 10000 == 0:
+        return integer / 100000.0
+    return (math.floor(integer / 10000) + 1) / 10.0
+
+
+def _roundup_v30(value: float) -> float:
+    return math.ceil(value * 10) / 10.0
+
+
+def parse_vector(vector: str) -> Optional[Dict[str, str]]:
+    """Métriques d'un vecteur v3.x ("CVSS:3.1/AV:N/...") ; None si invalide ou incomplet"""
+    if not vector.startswith(V3_PREFIXES):
+        return None
+    metrics: Dict[str, str] = {}
+    for part in vector[9:].split("/"):
+        name, sep, value = part.partition(":")
+        if not sep or name in metrics:
+            return None
+        metrics[name] = value
+    if any(metrics.get(name) is None for name in BASE_METRICS) or metrics["S"] not in PRIVILEGES:
+        return None
+    return metrics
+
+
+def base_score(vector: str) -> Optional[float]:
+    """Score de base d'un vecteur CVSS v3.0/v3.1 (None : v4.0, invalide ou non reconnu)"""
+    metrics = parse_vector(vector.strip()) if isinstance(vector, str) else None
+    if metrics is None:
+        return None
+    try:
+        av, ac, ui = WEIGHTS["AV"][metrics["AV"]], WEIGHTS["AC"][metrics["AC"]], WEIGHTS["UI"][metrics["UI"]]
+        c, i, a = WEIGHTS["C"][metrics["C"]], WEIGHTS["I"][metrics["I"]], WEIGHTS["A"][metrics["A"]]
+        pr = PRIVILEGES[metrics["S"]][metrics["PR"]]
+    except KeyError:
+        return None
+
+    changed = metrics["S"] == "C"
+    iss = 1 - (1 - c) * (1 - i) * (1 - a)
+    impact = 7.52 * (iss - 0.029) - 3.25 * (iss - 0.02) ** 15 if changed else 6.42 * iss
+    if impact <= 0:
+        return 0.0
+    exploitability = 8.22 * av * ac * pr * ui
+    roundup = _roundup_v31 if vector.startswith("CVSS:3.1/") else _roundup_v30
+    total = (impact + exploitability) * 1.08 if changed else impact + exploitability
+    return roundup(min(total, 10.0))
+
+
+class CvssScorer:
+    """Scores de base mémorisés par vecteur (chaîne exacte du rapport)"""
+
+    __slots__ = ("_scores", "lookups", "computed", "v4_vectors")
+
+    def __init__(self):
+        self._scores: Dict[str, Optional[float]] = {}
+        self.lookups = 0
+        self.computed = 0
+        self.v4_vectors = 0
+
+    def score(self, vector: Optional[str]) -> Optional[float]:
+        if not vector or not isinstance(vector, str):
+            return None
+        self.lookups += 1
+        try:
+            return self._scores[vector]
+        except KeyError:
+            pass
+        if vector.startswith(V4_PREFIX):
+            # CVSS v4.0 non calculé : compté pour le rapport, jamais mémorisé
+            self.v4_vectors += 1
+            return None
+        score = base_score(vector)
+        self.computed += 1
+        if len(self._scores) < MAX_VECTORS:
+            self._scores[vector] = score
+        return score
+
+    @property
+    def distinct(self) -> int:
+        return len(self._scores)
+
+
+# Scorer partagé par les normaliseurs du processus
+CVSS_SCORER = CvssScorer()
+
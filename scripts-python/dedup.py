@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Déduplication des findings normalisés (Snyk / Trivy)
+
+Un même CVE sur un même paquet remonte plusieurs fois : une fois par Target
+(couche d'image, lockfile) côté Trivy, et à nouveau côté Snyk. Les doublons
+sont fusionnés en un finding canonique grâce à un index de hachage sur
+(CVE ou identifiant outil, nom du paquet, version du paquet) :
+
+- le premier finding rencontré est conservé, avec la sévérité la plus haute
+- `sources` : outils ayant remonté le finding
+- `targets` : cibles concernées (Target Trivy, sinon unified.location)
+- `duplicate_count` : nombre de findings fusionnés
+
+Le summary porte les compteurs dédupliqués et `raw_total_vulnerabilities`.
+
+Deux modes :
+- dedup_findings(liste) : en mémoire
+- iter_dedup(itérable, directory) : en flux, les findings sont recopiés dans un
+  fichier temporaire (passe 1 : index), puis relus (passe 2 : émission des
+  canoniques). Seul l'index reste en mémoire.
+
+Entre outils d'un même service (CrossToolIndex, batch_normalize.py --dedup) :
+l'index est construit sur les rapports normalisés de tous les outils, chaque
+clé appartient au premier rapport qui la contient (ordre des outils). Au
+découpage, ce rapport émet le finding canonique (sources/targets de tous les
+outils), les autres ne l'émettent pas et le comptent dans
+`summary.cross_tool_duplicates`.
+"""
+
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from delta import iter_report_vulnerabilities
+from findings import as_plain, is_mapping
+from json_codec import CODEC
+
+SEVERITY_RANK = {"critical": 5, "high": 4, "medium": 3, "low": 2, "info": 1}
+SUMMARY_SEVERITIES = ("critical", "high", "medium", "low", "info")
+
+
+def dedup_key(vuln: Dict[str, Any]) -> Tuple[str, str, str]:
+    """(CVE ou identifiant outil, nom du paquet, version) ; sans paquet : (id, component, location)"""
+    unified = vuln.get("unified") or {}
+    cves = vuln.get("cve")
+    identifier = cves[0] if isinstance(cves, list) and cves else vuln.get("id") or unified.get("vulnerability_id")
+    package = vuln.get("package")
+    if isinstance(package, dict) and package.get("name"):
+        return str(identifier or ""), str(package.get("name") or ""), str(package.get("version") or "")
+    return str(identifier or ""), str(unified.get("component") or ""), str(unified.get("location") or "")
+
+
+def finding_target(vuln: Dict[str, Any]) -> str:
+    return vuln.get("target") or (vuln.get("unified") or {}).get("location") or ""
+
+
+class _Entry:
+    __slots__ = ("first", "sources", "targets", "severity", "severity_score", "count")
+
+    def __init__(self, first: int):
+        self.first = first
+        self.sources: List[str] = []
+        self.targets: List[str] = []
+        self.severity = ""
+        self.severity_score = 0.0
+        self.count = 0
+
+
+class DedupIndex:
+    """Index de hachage clé de déduplication → informations fusionnées"""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str, str], _Entry] = {}
+        self.raw = 0
+
+    def add(self, vuln: Dict[str, Any], tool: str, position: int) -> _Entry:
+        key = dedup_key(vuln)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry(position)
+        # Un finding déjà dédupliqué (rapport normalisé avec --dedup) compte pour ses doublons
+        count = vuln.get("duplicate_count") or 1
+        entry.count += count
+        self.raw += count
+        for source in vuln.get("sources") or [tool]:
+            if source and source not in entry.sources:
+                entry.sources.append(source)
+        for target in vuln.get("targets") or [finding_target(vuln)]:
+            if target and target not in entry.targets:
+                entry.targets.append(target)
+        severity = str(vuln.get("severity", "")).lower()
+        if SEVERITY_RANK.get(severity, 0) > SEVERITY_RANK.get(entry.severity, 0) or not entry.severity:
+            entry.severity = severity
+        score = (vuln.get("unified") or {}).get("severity_score") or 0.0
+        entry.severity_score = max(entry.severity_score, score)
+        return entry
+
+    def get(self, vuln: Dict[str, Any]) -> _Entry:
+        return self._entries[dedup_key(vuln)]
+
+    def items(self) -> Iterator[Tuple[Tuple[str, str, str], _Entry]]:
+        return iter(self._entries.items())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def duplicates(self) -> int:
+        return self.raw - len(self._entries)
+
+
+def merge_into(vuln: Dict[str, Any], entry: _Entry) -> Dict[str, Any]:
+    """Finding canonique : sévérité la plus haute + sources/targets/duplicate_count"""
+    vuln["severity"] = entry.severity
+    unified = vuln.get("unified")
+    if is_mapping(unified):
+        unified["severity"] = entry.severity
+        unified["severity_score"] = entry.severity_score
+    vuln["sources"] = list(entry.sources)
+    vuln["targets"] = list(entry.targets)
+    vuln["duplicate_count"] = entry.count
+    return vuln
+
+
+def _new_counts() -> Dict[str, int]:
+    return {severity: 0 for severity in SUMMARY_SEVERITIES}
+
+
+def update_summary(summary: Dict[str, Any], index: DedupIndex, counts: Dict[str, int]) -> None:
+    """Compteurs dédupliqués dans le summary (les compteurs bruts restent dans raw_*)"""
+    summary["raw_total_vulnerabilities"] = index.raw
+    summary["duplicates_merged"] = index.duplicates
+    summary["total_vulnerabilities"] = len(index)
+    for severity in SUMMARY_SEVERITIES:
+        if severity in summary:
+            summary[severity] = counts[severity]
+
+
+def dedup_findings(findings: List[Dict[str, Any]], tool: str,
+                   summary: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Déduplication en mémoire (ordre du premier finding de chaque clé)"""
+    index = DedupIndex()
+    for position, vuln in enumerate(findings):
+        index.add(vuln, tool, position)
+
+    result = []
+    counts = _new_counts()
+    for position, vuln in enumerate(findings):
+        entry = index.get(vuln)
+        if entry.first == position:
+            result.append(merge_into(vuln, entry))
+            if entry.severity in counts:
+                counts[entry.severity] += 1
+    print(f" Déduplication : {index.raw} findings bruts → {len(index)} ({index.duplicates} doublons fusionnés)")
+    if summary is not None:
+        update_summary(summary, index, counts)
+    return result
+
+
+def iter_dedup(findings: Iterable[Dict[str, Any]], tool: str, summary: Optional[Dict[str, Any]] = None,
+               directory: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Déduplication en flux (deux passes via un fichier temporaire NDJSON)"""
+    index = DedupIndex()
+    with tempfile.TemporaryFile("w+b", dir=directory or None) as spool:
+        for position, vuln in enumerate(findings):
+            index.add(vuln, tool, position)
+            spool.write(CODEC.dumpb(vuln))
+            spool.write(b"\n")
+
+        spool.seek(0)
+        counts = _new_counts()
+        for position, line in enumerate(spool):
+            vuln = CODEC.loads(line)
+            entry = index.get(vuln)
+            if entry.first == position:
+                if entry.severity in counts:
+                    counts[entry.severity] += 1
+                yield merge_into(vuln, entry)
+
+    print(f" Déduplication : {index.raw} findings bruts → {len(index)} ({index.duplicates} doublons fusionnés)")
+    if summary is not None:
+        update_summary(summary, index, counts)
+
+
+class CrossToolIndex:
+    """
+    Index inter-outils d'un service, construit sur ses rapports normalisés
+    (tool, fichier) lus en flux, dans l'ordre donné. Chaque clé appartient au
+    premier rapport qui la contient.
+    """
+
+    def __init__(self, reports: Sequence[Tuple[str, str]]):
+        self.index = DedupIndex()
+        self._owners: Dict[Tuple[str, str, str], str] = {}
+        position = 0
+        for tool, report_file in reports:
+            for vuln in iter_report_vulnerabilities(report_file):
+                self.index.add(vuln, tool, position)
+                self._owners.setdefault(dedup_key(vuln), report_file)
+                position += 1
+
+    @property
+    def cross_tool(self) -> int:
+        """Findings canoniques remontés par plusieurs outils"""
+        return sum(1 for _, entry in self.index.items() if len(entry.sources) > 1)
+
+    def view(self, report_file: str) -> "CrossToolView":
+        return CrossToolView(self, report_file)
+
+
+class CrossToolView:
+    """
+    Findings d'un rapport vus à travers l'index inter-outils : canonical()
+    pour chaque finding, puis update_summary() une fois le rapport épuisé.
+    """
+
+    def __init__(self, cross_index: CrossToolIndex, report_file: str):
+        self._index = cross_index.index
+        self._owners = cross_index._owners
+        self._report_file = report_file
+        self._emitted: Set[Tuple[str, str, str]] = set()
+        self.raw = 0
+        self.ceded = 0
+        self.counts = _new_counts()
+
+    def canonical(self, vuln: Any) -> Optional[Dict[str, Any]]:
+        """Finding canonique fusionné (copie) si ce rapport l'émet, None sinon"""
+        vuln = as_plain(vuln)
+        key = dedup_key(vuln)
+        self.raw += vuln.get("duplicate_count") or 1
+        if self._owners.get(key) != self._report_file:
+            self.ceded += 1
+            return None
+        if key in self._emitted:
+            return None
+        self._emitted.add(key)
+        entry = self._index.get(vuln)
+        if entry.severity in self.counts:
+            self.counts[entry.severity] += 1
+        canonical = dict(vuln)
+        if is_mapping(vuln.get("unified")):
+            canonical["unified"] = dict(vuln["unified"])
+        return merge_into(canonical, entry)
+
+    def update_summary(self, summary: Dict[str, Any]) -> None:
+        """Compteurs du rapport après fusion inter-outils (raw_* : avant toute déduplication)"""
+        summary.setdefault("raw_total_vulnerabilities", self.raw)
+        summary["total_vulnerabilities"] = len(self._emitted)
+        summary["duplicates_merged"] = summary["raw_total_vulnerabilities"] - len(self._emitted)
+        summary["cross_tool_duplicates"] = self.ceded
+        for severity in SUMMARY_SEVERITIES:
+            if severity in summary:
+                summary[severity] = self.counts[severity]
+        distribution = summary.get("severity_distribution")
+        if isinstance(distribution, dict):
+            for severity in SUMMARY_SEVERITIES:
+                if severity in distribution:
+                    distribution[severity] = self.counts[severity]
+        print(f" Fusion inter-outils : {len(self._emitted)} findings émis, "
+              f"{self.ceded} déjà remontés par un autre outil")
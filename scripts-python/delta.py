@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Mode delta : comparaison des findings avec le rapport normalisé du build précédent
+
+Au lieu de réémettre chaque finding ouvert à chaque build, seuls sont produits :
+- les findings `new` (absents du build précédent)
+- les findings `fixed` (présents au build précédent, absents de celui-ci)
+Les findings inchangés ne sont que comptés (`persisting`, bloc `delta` du parent).
+
+Un finding `fixed` est clôturé avant d'être émis : unified.status `closed`,
+resolution_date = date du scan courant, et mttr_hours de la base de cycle de
+vie (liste `resolved`, cf. lifecycle_store.py) quand elle est active. Sinon les
+filtres `status: open` des tableaux de bord le compteraient comme ouvert.
+
+Les findings sont identifiés par fingerprints.finding_fingerprint. Le rapport
+précédent est lu en flux (seules les empreintes restent en mémoire) puis relu
+pour produire les findings corrigés.
+
+Rapport précédent : même chemin relatif dans le build <M> le plus récent
+antérieur au build courant (ex: /shared/build-122/trivy/scans/trivy-backend-normalized.json
+pour /shared/build-123/...), ou chemin explicite.
+"""
+
+import os
+import re
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from fingerprints import finding_fingerprint
+from json_stream import JsonStreamReader
+from findings import is_mapping
+
+AUTO = "auto"
+
+_BUILD_DIR = re.compile(r'^build-(\d+)$')
+
+
+def find_previous_report(current_file: str) -> Optional[str]:
+    """Même fichier dans le build précédent le plus récent (None si aucun)"""
+    parts = os.path.abspath(current_file).split(os.sep)
+    for index in range(len(parts) - 2, -1, -1):
+        match = _BUILD_DIR.match(parts[index])
+        if match:
+            break
+    else:
+        return None
+
+    root = os.sep.join(parts[:index]) or os.sep
+    relative = os.path.join(*parts[index + 1:])
+    current = int(match.group(1))
+    builds = []
+    for name in os.listdir(root):
+        other = _BUILD_DIR.match(name)
+        if other and int(other.group(1)) < current:
+            builds.append(int(other.group(1)))
+    for number in sorted(builds, reverse=True):
+        candidate = os.path.join(root, f"build-{number}", relative)
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def resolve_previous_report(delta_previous: Optional[str], current_file: str) -> Optional[str]:
+    """`auto` → find_previous_report(current_file), sinon chemin explicite"""
+    if delta_previous == AUTO:
+        return find_previous_report(current_file)
+    return delta_previous
+
+
+def iter_report_vulnerabilities(report_file: str) -> Iterator[Dict[str, Any]]:
+    """Findings d'un rapport normalisé, lus en flux"""
+    with open(report_file, "r", encoding="utf-8") as f:
+        reader = JsonStreamReader(f)
+        for key in reader.iter_object():
+            if key == "vulnerabilities":
+                yield from reader.iter_items()
+
+
+class DeltaTracker:
+    """
+    Classe les findings du build courant par rapport au build précédent.
+
+    classify() pour chaque finding courant (dans n'importe quel ordre), puis
+    iter_fixed() une fois le rapport courant épuisé, puis summary().
+    Sans rapport précédent, tous les findings sont `new`.
+    """
+
+    def __init__(self, tool: str, previous_file: Optional[str]):
+        self.tool = tool
+        self.previous_file = previous_file
+        self.new = 0
+        self.persisting = 0
+        self.fixed = 0
+        # Multi-ensemble : une même empreinte peut apparaître plusieurs fois
+        self._remaining: Counter = Counter()
+        if previous_file:
+            for vuln in iter_report_vulnerabilities(previous_file):
+                self._remaining[finding_fingerprint(tool, vuln)] += 1
+            print(f" Mode delta : {sum(self._remaining.values())} findings dans {previous_file}")
+        else:
+            print(" Mode delta : aucun rapport précédent, tous les findings sont nouveaux")
+
+    def classify(self, vuln: Dict[str, Any]) -> str:
+        """'new' ou 'persisting'"""
+        fingerprint = finding_fingerprint(self.tool, vuln)
+        if self._remaining[fingerprint] > 0:
+            self._remaining[fingerprint] -= 1
+            self.persisting += 1
+            return "persisting"
+        self.new += 1
+        return "new"
+
+    def iter_fixed(self, resolved_at: Optional[str] = None,
+                   resolved: Optional[List[Dict[str, Any]]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Findings du build précédent absents du build courant (relecture en flux),
+        clôturés à `resolved_at` (date du scan courant). `resolved` : entrées de la
+        base de cycle de vie du build, qui fournissent mttr_hours.
+        """
+        if not self.previous_file or not +self._remaining:
+            return
+        resolved_at = resolved_at or datetime.now(timezone.utc).isoformat()
+        mttr_hours = {}
+        for entry in resolved or ():
+            if is_mapping(entry) and is_mapping(entry.get("unified")):
+                mttr_hours[entry.get("fingerprint")] = entry["unified"].get("mttr_hours")
+        for vuln in iter_report_vulnerabilities(self.previous_file):
+            fingerprint = finding_fingerprint(self.tool, vuln)
+            if self._remaining[fingerprint] > 0:
+                self._remaining[fingerprint] -= 1
+                self.fixed += 1
+                yield _closed(vuln, resolved_at, mttr_hours.get(fingerprint))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "previous_report": self.previous_file,
+            "new": self.new,
+            "fixed": self.fixed,
+            "persisting": self.persisting
+        }
+
+
+def _closed(vuln: Dict[str, Any], resolved_at: str, mttr_hours: Optional[float]) -> Dict[str, Any]:
+    """Copie superficielle du finding, bloc unified clôturé"""
+    unified = dict(vuln.get("unified")) if is_mapping(vuln.get("unified")) else {}
+    unified["status"] = "closed"
+    unified["resolution_date"] = resolved_at
+    if mttr_hours is not None:
+        unified["mttr_hours"] = mttr_hours
+    closed = dict(vuln)
+    closed["unified"] = unified
+    return closed
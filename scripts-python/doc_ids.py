@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Identifiants déterministes des rapports et des documents NDJSON
+
+report_id était un uuid4 tiré à chaque exécution, et les documents n'avaient pas
+d'_id : rejouer un stage Jenkins ou un répertoire de build, ou relire un fichier
+dans Filebeat, ajoutait des findings en double. Les identifiants sont désormais
+dérivés du contenu (UUID v5) :
+
+- report_id : build_id + service + tool + scan_type (metadata du rapport) ;
+  uuid4 si le build est inconnu (aucune clé stable)
+- doc_id d'un finding : report_id + empreinte du finding (fingerprints.py), avec
+  le rang d'occurrence si la même empreinte revient dans le rapport
+- doc_id des documents reference_dictionary / vulnerability_rollup : report_id +
+  type + clé (offset, dimension/clé) ; celui du parent est son report_id
+
+Le champ `doc_id` de chaque document sert d'_id : `document_id` du parseur ndjson
+de Filebeat, `_id` des actions _bulk d'es_bulk.py. Une réingestion remplace les
+documents au lieu d'en ajouter (même index, donc même jour).
+"""
+
+import hashlib
+import uuid
+from collections import Counter
+from typing import Any, Dict
+
+from fingerprints import finding_fingerprint
+
+# Espace de noms UUID v5 des identifiants du pipeline (constant : changer cette
+# valeur change tous les identifiants)
+ID_NAMESPACE = uuid.UUID("6f9d3c2e-5b1a-5c8e-9a47-2d0e8b1f4c63")
+REPORT_KEY_FIELDS = ("build_id", "service", "tool", "scan_type")
+UNKNOWN_BUILDS = ("", "unknown", "None")
+
+
+def report_document_id(report_data: Dict[str, Any]) -> str:
+    """report_id stable d'un rapport normalisé (uuid4 sans build_id)"""
+    metadata = report_data.get("metadata")
+    if not isinstance(metadata, dict) or str(metadata.get("build_id") or "") in UNKNOWN_BUILDS:
+        return str(uuid.uuid4())
+    name = "\x1f".join(str(metadata.get(field) or "") for field in REPORT_KEY_FIELDS)
+    return str(uuid.uuid5(ID_NAMESPACE, name))
+
+
+class DocumentIds:
+    """
+    doc_id des documents d'un rapport : UUID v5 (ID_NAMESPACE, "<report_id>\\x1f<clé>"),
+    le préfixe haché une seule fois par rapport.
+    """
+
+    __slots__ = ("report_id", "tool", "_prefix", "_occurrences")
+
+    def __init__(self, report_id: str, tool: str):
+        self.report_id = report_id
+        self.tool = tool
+        self._prefix = hashlib.sha1(ID_NAMESPACE.bytes + report_id.encode("utf-8") + b"\x1f")
+        self._occurrences: Counter = Counter()
+
+    def _uuid5(self, key: str) -> str:
+        digest = self._prefix.copy()
+        digest.update(key.encode("utf-8"))
+        raw = bytearray(digest.digest()[:16])
+        raw[6] = (raw[6] & 0x0F) | 0x50
+        raw[8] = (raw[8] & 0x3F) | 0x80
+        h = raw.hex()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+    def finding_id(self, vuln_item: Any) -> str:
+        fingerprint = finding_fingerprint(self.tool, vuln_item)
+        occurrence = self._occurrences[fingerprint]
+        self._occurrences[fingerprint] = occurrence + 1
+        return self._uuid5(f"{fingerprint}\x1f{occurrence}" if occurrence else fingerprint)
+
+    def document_id(self, doc_type: str, *key: Any) -> str:
+        return self._uuid5("\x1f".join([doc_type] + [str(part) for part in key]))
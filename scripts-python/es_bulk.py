@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Envoi direct des documents vers l'API _bulk d'Elasticsearch
+
+Alternative à l'étape Filebeat (fichier *-split.ndjson scruté toutes les
+10 s) : les documents produits par split_reports / normalize-reports sont
+indexés au fil de l'eau, par lots, sur une connexion HTTP persistante.
+
+- Même cible que Filebeat : index pipeline-reports-YYYY.MM.dd et pipeline
+  d'ingestion choisi d'après metadata.tool (snyk/trivy/sonarqube-pipeline)
+- Lots bornés en nombre de documents et en octets
+- `_id` de chaque action = champ `doc_id` du document (doc_ids.py) : un rapport
+  renvoyé remplace ses documents au lieu de les dupliquer
+- Reprise avec backoff exponentiel des documents rejetés temporairement
+  (429/502/503/504) et du lot entier si Elasticsearch répond 429/503 ;
+  l'envoi est synchrone, le producteur est donc freiné tant que le cluster sature
+- Les rejets définitifs sont comptés et rendent la commande en échec
+
+Identifiants : variables d'environnement ELASTIC_USERNAME / ELASTIC_PASSWORD
+(comme filebeat.yml).
+"""
+
+import base64
+import http.client
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from json_stream import encode_document
+from json_codec import CODEC
+
+# Pipelines d'ingestion appliqués par Filebeat pour chaque outil (filebeat.yml)
+DEFAULT_PIPELINES = {
+    "snyk": "snyk-pipeline",
+    "trivy": "trivy-pipeline",
+    "sonarqube": "sonarqube-pipeline",
+    # Rapports SARIF (sarif_adapter.py)
+    "sarif": "sarif-pipeline",
+    "codeql": "sarif-pipeline",
+    "semgrep": "sarif-pipeline",
+    "gitleaks": "sarif-pipeline"
+}
+
+INDEX_PREFIX = "pipeline-reports-"
+DEFAULT_MAX_DOCS = 1000
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF = 0.5
+DEFAULT_TIMEOUT = 60
+
+# Statuts pour lesquels un document (ou le lot) est renvoyé
+RETRYABLE_STATUSES = frozenset((429, 502, 503, 504))
+
+
+class BulkError(Exception):
+    """Échec définitif d'une requête _bulk (connexion, authentification, réponse invalide)"""
+
+
+def default_index(now: Optional[datetime] = None) -> str:
+    """Index journalier, comme "pipeline-reports-%{+yyyy.MM.dd}" côté Filebeat (UTC)"""
+    now = now or datetime.now(timezone.utc)
+    return INDEX_PREFIX + now.strftime("%Y.%m.%d")
+
+
+class BulkSink:
+    """
+    Sortie des documents vers Elasticsearch (même interface que
+    split_reports.NdjsonFileSink : bind_report, write, close, abort).
+    """
+
+    def __init__(self, es_url: str, index: Optional[str] = None, pipeline: Optional[str] = None,
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 max_docs: int = DEFAULT_MAX_DOCS, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_retries: int = DEFAULT_MAX_RETRIES, backoff: float = DEFAULT_BACKOFF,
+                 timeout: float = DEFAULT_TIMEOUT):
+        url = urlsplit(es_url if "://" in es_url else f"http://{es_url}")
+        if url.scheme not in ("http", "https"):
+            raise ValueError(f"URL Elasticsearch invalide: {es_url}")
+        self._scheme = url.scheme
+        self._host = url.hostname or "localhost"
+        self._port = url.port
+        self._path = url.path.rstrip("/") + "/_bulk"
+        self._timeout = timeout
+
+        username = username if username is not None else (url.username or os.environ.get("ELASTIC_USERNAME"))
+        password = password if password is not None else (url.password or os.environ.get("ELASTIC_PASSWORD", ""))
+        self._headers = {"Content-Type": "application/x-ndjson"}
+        if username:
+            token = base64.b64encode(f"{username}:{password}".encode("utf-8")).decode("ascii")
+            self._headers["Authorization"] = f"Basic {token}"
+
+        self.index = index or default_index()
+        self.pipeline = pipeline
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._action = b""
+        self._timestamp = ""
+        self._timestamp_field = b""
+        self._batch: List[bytes] = []
+        self._batch_bytes = 0
+
+        self.sent = 0
+        self.indexed = 0
+        self.retried = 0
+        self.requests = 0
+        self.errors: List[str] = []
+        self._bind_action()
+
+    # ------------------------------------------------------------------
+    # Interface de sortie
+    # ------------------------------------------------------------------
+
+    def bind_report(self, header: Dict[str, Any]) -> None:
+        """Choisit le pipeline d'ingestion d'après metadata.tool (si non imposé)"""
+        if self.pipeline is None:
+            metadata = header.get("metadata")
+            tool = metadata.get("tool") if isinstance(metadata, dict) else None
+            self.pipeline = DEFAULT_PIPELINES.get(str(tool).lower()) if tool else None
+            self._bind_action()
+        print(f" Envoi vers Elasticsearch: index={self.index} pipeline={self.pipeline or '-'}")
+
+    def write(self, doc: Any) -> None:
+        line = encode_document(doc, "vulnerabilities")
+        doc_id = _document_id(doc, line)
+        action = self._action if doc_id is None else b"".join((self._action[:-2], b', "_id": "', doc_id, b'"}}'))
+        entry = b"".join((action, b"\n", self._with_timestamp(doc, line), b"\n"))
+        size = len(entry)
+        if self._batch and self._batch_bytes + size > self.max_bytes:
+            self.flush()
+        self._batch.append(entry)
+        self._batch_bytes += size
+        self.sent += 1
+        if len(self._batch) >= self.max_docs:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._batch:
+            return
+        batch = self._batch
+        self._batch = []
+        self._batch_bytes = 0
+        self._send_with_retries(batch)
+
+    def close(self) -> int:
+        try:
+            self.flush()
+        finally:
+            self._disconnect()
+        print(f" Elasticsearch: {self.indexed}/{self.sent} documents indexés "
+              f"({self.requests} requêtes _bulk, {self.retried} renvois)")
+        for error in self.errors[:10]:
+            print(f"  • rejet: {error}")
+        if len(self.errors) > 10:
+            print(f"  • ... {len(self.errors) - 10} autres rejets")
+        return self.indexed
+
+    def abort(self) -> None:
+        self._batch = []
+        self._batch_bytes = 0
+        self._disconnect()
+
+    @property
+    def failed(self) -> bool:
+        return self.indexed < self.sent
+
+    # ------------------------------------------------------------------
+    # Requêtes _bulk
+    # ------------------------------------------------------------------
+
+    def _bind_action(self) -> None:
+        action = {"_index": self.index}
+        if self.pipeline:
+            action["pipeline"] = self.pipeline
+        self._action = json.dumps({"index": action}).encode("utf-8")
+        # @timestamp posé par Filebeat à la lecture : ici, heure d'envoi du rapport
+        self._timestamp = datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        self._timestamp_field = b'"@timestamp"' + CODEC.key_separator + CODEC.dumpb(self._timestamp)
+
+    def _with_timestamp(self, doc: Any, line: bytes) -> bytes:
+        """Ajoute @timestamp aux documents qui n'en ont pas (overwrite_keys de Filebeat : celui du document prime)"""
+        if _has_timestamp(doc, line):
+            return line
+        if line.endswith(b"}"):
+            separator = b"" if line == b"{}" else CODEC.item_separator
+            return b"".join((line[:-1], separator, self._timestamp_field, b"}"))
+        return line
+
+    def _send_with_retries(self, batch: List[bytes]) -> None:
+        pending = batch
+        attempt = 0
+        while True:
+            status, retry, error = self._send(pending)
+            if not retry:
+                return
+            if attempt >= self.max_retries:
+                self.errors.extend([error] * len(retry))
+                return
+            delay = self.backoff * (2 ** attempt)
+            attempt += 1
+            self.retried += len(retry)
+            print(f"  Elasticsearch saturé ({status}) : renvoi de {len(retry)} documents dans {delay:.1f} s")
+            time.sleep(delay)
+            pending = retry
+
+    def _send(self, batch: List[bytes]) -> Tuple[int, List[bytes], str]:
+        """Envoie un lot. Retourne (statut de saturation, documents à renvoyer, dernière erreur)"""
+        body = b"".join(batch)
+        status, payload = self._request(body)
+        self.requests += 1
+
+        if status in RETRYABLE_STATUSES:
+            return status, batch, f"HTTP {status}"
+        if status >= 300:
+            raise BulkError(f"Réponse _bulk HTTP {status}: {payload[:500].decode('utf-8', 'replace')}")
+
+        try:
+            response = json.loads(payload)
+        except ValueError as e:
+            raise BulkError(f"Réponse _bulk invalide: {e}")
+        if not response.get("errors"):
+            self.indexed += len(batch)
+            return status, [], ""
+
+        retry: List[bytes] = []
+        error = ""
+        for entry, item in zip(batch, response.get("items", [])):
+            result = next(iter(item.values()), {})
+            item_status = result.get("status", 500)
+            if item_status < 300:
+                self.indexed += 1
+            elif item_status in RETRYABLE_STATUSES:
+                retry.append(entry)
+                status = item_status
+                error = f"{item_status} {json.dumps(result.get('error'), ensure_ascii=False)}"
+            else:
+                self.errors.append(f"{item_status} {json.dumps(result.get('error'), ensure_ascii=False)}")
+        return status, retry, error
+
+    def _request(self, body: bytes) -> Tuple[int, bytes]:
+        """POST _bulk sur la connexion persistante (une reconnexion en cas de coupure)"""
+        for attempt in (0, 1):
+            conn = self._connect()
+            try:
+                conn.request("POST", self._path, body=body, headers=self._headers)
+                response = conn.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, OSError) as e:
+                self._disconnect()
+                if attempt:
+                    raise BulkError(f"Elasticsearch injoignable ({self._host}): {e}")
+        raise AssertionError("unreachable")
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            cls = http.client.HTTPSConnection if self._scheme == "https" else http.client.HTTPConnection
+            self._conn = cls(self._host, self._port, timeout=self._timeout)
+        return self._conn
+
+    def _disconnect(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _has_timestamp(doc: Any, line: bytes) -> bool:
+    """Le document porte déjà @timestamp (parent vulnerability_report) : clé de premier niveau"""
+    if isinstance(doc, dict):
+        return "@timestamp" in doc
+    # Ligne pré-sérialisée : champs aplatis, une clé imbriquée serait "<préfixe>.@timestamp"
+    return b'"@timestamp"' in line
+
+
+def _document_id(doc: Any, line: bytes) -> Optional[bytes]:
+    """doc_id du document (dict, ou ligne JSON déjà sérialisée), None s'il n'en a pas"""
+    if isinstance(doc, dict):
+        doc_id = doc.get("doc_id")
+        return str(doc_id).encode("utf-8") if doc_id else None
+    key = line.find(b'"doc_id"')
+    if key < 0:
+        return None
+    start = line.find(b'"', key + len(b'"doc_id"')) + 1
+    return line[start:line.find(b'"', start)] or None
+
+
+def add_bulk_arguments(parser) -> None:
+    """Options CLI communes (split_reports.py, normalize-reports.py)"""
+    parser.add_argument("--es-url", help="Envoyer les documents à Elasticsearch (_bulk) au lieu du fichier NDJSON "
+                                         "(ex: http://elasticsearch:9200)")
+    parser.add_argument("--es-index", help="Index cible (défaut: pipeline-reports-YYYY.MM.dd)")
+    parser.add_argument("--es-pipeline", help="Pipeline d'ingestion (défaut: d'après metadata.tool)")
+    parser.add_argument("--es-batch-docs", type=int, default=DEFAULT_MAX_DOCS, help="Documents max par requête _bulk")
+    parser.add_argument("--es-batch-bytes", type=int, default=DEFAULT_MAX_BYTES, help="Octets max par requête _bulk")
+
+
+def sink_from_args(args) -> Optional[BulkSink]:
+    if not args.es_url:
+        return None
+    return BulkSink(args.es_url, index=args.es_index, pipeline=args.es_pipeline,
+                    max_docs=args.es_batch_docs, max_bytes=args.es_batch_bytes)
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Modèle compact des findings normalisés
+
+Un finding normalisé était un dict d'une vingtaine de clés portant un dict
+`unified` de 23 clés : sur un rapport de 100k findings, ces tables de
+hachage et les chaînes recopiées à l'identique ('open', date sentinelle,
+équipe, sévérités...) dominent la mémoire du mode non-stream.
+
+- UnifiedBlock / SnykFinding / TrivyFinding / SonarQubeFinding / SarifFinding : un slot par
+  champ (pas de __dict__), `package` stocké en tuple
+- Valeurs énumérées (sévérité, type, catégorie, statut...) internées :
+  une seule chaîne partagée par valeur
+- Accès type dict (get, [], in, affectation) pour dedup, delta et le cycle de vie
+- Forme JSON inchangée, produite uniquement à l'écriture : as_dict(),
+  json_default (paramètre `default` de json.dumps) ou as_plain()
+- gc_paused() : ramasse-miettes cyclique suspendu pendant la construction de
+  la liste (les findings ne forment pas de cycles, le comptage de références suffit)
+"""
+
+import gc
+import operator
+import sys
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+SENTINEL_DATE = "1970-01-01T00:00:00Z"
+
+
+def intern_value(value: Any) -> Any:
+    """Chaîne partagée pour les valeurs énumérées (sévérité, type, statut...)"""
+    return sys.intern(value) if type(value) is str else value
+
+
+@contextmanager
+def gc_paused():
+    """
+    Suspend le ramasse-miettes cyclique le temps de construire beaucoup d'objets
+    sans cycle : sinon chaque collecte re-parcourt toute la liste déjà construite.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class _Record:
+    """Enregistrement à champs fixes (FIELDS), accessible comme un dict"""
+
+    __slots__ = ()
+    FIELDS: Tuple[str, ...] = ()
+    _FIELD_SET = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+        if cls.FIELDS:
+            # Lecture de tous les champs en un appel (as_dict)
+            cls._values = operator.attrgetter(*cls.FIELDS)
+
+    def __getitem__(self, name: str) -> Any:
+        if name in self._FIELD_SET:
+            return getattr(self, name)
+        raise KeyError(name)
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        if name not in self._FIELD_SET:
+            raise KeyError(name)
+        setattr(self, name, value)
+
+    def __contains__(self, name: str) -> bool:
+        try:
+            self[name]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, name: str, default: Any = None) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(zip(self.FIELDS, self._values(self)))
+
+
+class UnifiedBlock(_Record):
+    """Bloc `unified` d'un finding (cf. ReportNormalizer._create_unified_block)"""
+
+    FIELDS = __slots__ = (
+        "vulnerability_id", "type", "severity", "severity_score", "is_security_issue", "is_vulnerability",
+        "category", "is_fixable", "has_fix_available", "fix_version", "can_auto_upgrade", "is_exploitable",
+        "exploit_maturity", "component", "location", "assignee", "team", "status", "first_seen",
+        "last_seen", "resolution_date", "age_days", "mttr_hours"
+    )
+
+    def __init__(self, vulnerability_id, type, severity, severity_score, is_security_issue,
+                 is_vulnerability, category, is_fixable, has_fix_available, fix_version,
+                 can_auto_upgrade, is_exploitable, exploit_maturity, component, location,
+                 assignee, team, status, first_seen, last_seen,
+                 resolution_date, age_days, mttr_hours):
+        self.vulnerability_id = vulnerability_id
+        self.type = type
+        self.severity = severity
+        self.severity_score = severity_score
+        self.is_security_issue = is_security_issue
+        self.is_vulnerability = is_vulnerability
+        self.category = category
+        self.is_fixable = is_fixable
+        self.has_fix_available = has_fix_available
+        self.fix_version = fix_version
+        self.can_auto_upgrade = can_auto_upgrade
+        self.is_exploitable = is_exploitable
+        self.exploit_maturity = exploit_maturity
+        self.component = component
+        self.location = location
+        self.assignee = assignee
+        self.team = team
+        self.status = status
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+        self.resolution_date = resolution_date
+        self.age_days = age_days
+        self.mttr_hours = mttr_hours
+
+
+class Finding(_Record):
+    """
+    Finding normalisé : champs propres à l'outil (FIELDS), puis `unified`,
+    puis les champs ajoutés après coup (sources, targets, duplicate_count...).
+    """
+
+    __slots__ = ("unified", "_extra")
+    # Clés du dict `package` (stocké en tuple), vide si l'outil n'en a pas
+    PACKAGE_KEYS: Tuple[str, ...] = ()
+
+    def __getitem__(self, name: str) -> Any:
+        if name == "package" and self.PACKAGE_KEYS:
+            return dict(zip(self.PACKAGE_KEYS, self.package))
+        if name in self._FIELD_SET:
+            return getattr(self, name)
+        if name == "unified":
+            return self.unified
+        if self._extra is not None and name in self._extra:
+            return self._extra[name]
+        raise KeyError(name)
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        if name == "package" and self.PACKAGE_KEYS:
+            self.package = tuple(value.get(key, "") for key in self.PACKAGE_KEYS)
+        elif name in self._FIELD_SET:
+            setattr(self, name, value)
+        elif name == "unified":
+            self.unified = value
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[name] = value
+
+    def as_dict(self) -> Dict[str, Any]:
+        result = dict(zip(self.FIELDS, self._values(self)))
+        if self.PACKAGE_KEYS:
+            result["package"] = dict(zip(self.PACKAGE_KEYS, self.package))
+        if self.unified is not None:
+            result["unified"] = self.unified.as_dict() if isinstance(self.unified, _Record) else self.unified
+        if self._extra:
+            result.update(self._extra)
+        return result
+
+
+class SnykFinding(Finding):
+    FIELDS = __slots__ = (
+        "id", "title", "severity", "cvss_score", "package", "fixed_in", "is_upgradable", "is_patchable",
+        "cve", "cwe", "references", "publication_time", "disclosure_time", "exploit_maturity",
+        "mitigation_recommendation"
+    )
+    PACKAGE_KEYS = ("name", "version")
+
+    def __init__(self, id, title, severity, cvss_score, package,
+                 fixed_in, is_upgradable, is_patchable, cve, cwe,
+                 references, publication_time, disclosure_time, exploit_maturity, mitigation_recommendation,
+                 unified: Optional[UnifiedBlock] = None):
+        self.id = id
+        self.title = title
+        self.severity = severity
+        self.cvss_score = cvss_score
+        self.package = package
+        self.fixed_in = fixed_in
+        self.is_upgradable = is_upgradable
+        self.is_patchable = is_patchable
+        self.cve = cve
+        self.cwe = cwe
+        self.references = references
+        self.publication_time = publication_time
+        self.disclosure_time = disclosure_time
+        self.exploit_maturity = exploit_maturity
+        self.mitigation_recommendation = mitigation_recommendation
+        self.unified = unified
+        self._extra = None
+
+
+class TrivyFinding(Finding):
+    FIELDS = __slots__ = (
+        "id", "title", "severity", "cvss_score", "package", "fixed_in", "target", "cve", "cwe",
+        "references", "publication_time", "last_modified_time", "mitigation_recommendation"
+    )
+    PACKAGE_KEYS = ("name", "version", "type")
+
+    def __init__(self, id, title, severity, cvss_score, package,
+                 fixed_in, target, cve, cwe, references,
+                 publication_time, last_modified_time, mitigation_recommendation,
+                 unified: Optional[UnifiedBlock] = None):
+        self.id = id
+        self.title = title
+        self.severity = severity
+        self.cvss_score = cvss_score
+        self.package = package
+        self.fixed_in = fixed_in
+        self.target = target
+        self.cve = cve
+        self.cwe = cwe
+        self.references = references
+        self.publication_time = publication_time
+        self.last_modified_time = last_modified_time
+        self.mitigation_recommendation = mitigation_recommendation
+        self.unified = unified
+        self._extra = None
+
+
+class SonarQubeFinding(Finding):
+    FIELDS = __slots__ = (
+        "id", "title", "severity", "original_severity", "type", "component", "line", "status", "resolution",
+        "debt", "tags", "creation_date", "update_date", "mitigation_recommendation"
+    )
+
+    def __init__(self, id, title, severity, original_severity, type,
+                 component, line, status, resolution, debt,
+                 tags, creation_date, update_date, mitigation_recommendation,
+                 unified: Optional[UnifiedBlock] = None):
+        self.id = id
+        self.title = title
+        self.severity = severity
+        self.original_severity = original_severity
+        self.type = type
+        self.component = component
+        self.line = line
+        self.status = status
+        self.resolution = resolution
+        self.debt = debt
+        self.tags = tags
+        self.creation_date = creation_date
+        self.update_date = update_date
+        self.mitigation_recommendation = mitigation_recommendation
+        self.unified = unified
+        self._extra = None
+
+
+class SarifFinding(Finding):
+    """Résultat SARIF (CodeQL, Semgrep, Gitleaks...), cf. sarif_adapter.py"""
+
+    FIELDS = __slots__ = (
+        "id", "rule_id", "title", "message", "severity", "original_severity", "tool_name", "component", "line",
+        "cwe", "tags", "references", "fingerprint", "mitigation_recommendation"
+    )
+
+    def __init__(self, id, rule_id, title, message, severity,
+                 original_severity, tool_name, component, line, cwe,
+                 tags, references, fingerprint, mitigation_recommendation,
+                 unified: Optional[UnifiedBlock] = None):
+        self.id = id
+        self.rule_id = rule_id
+        self.title = title
+        self.message = message
+        self.severity = severity
+        self.original_severity = original_severity
+        self.tool_name = tool_name
+        self.component = component
+        self.line = line
+        self.cwe = cwe
+        self.tags = tags
+        self.references = references
+        self.fingerprint = fingerprint
+        self.mitigation_recommendation = mitigation_recommendation
+        self.unified = unified
+        self._extra = None
+
+
+def json_default(obj: Any) -> Any:
+    """Paramètre `default` de json.dumps : sérialise les findings compacts"""
+    if isinstance(obj, _Record):
+        return obj.as_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def as_plain(item: Any) -> Any:
+    """Finding compact → dict (forme JSON) ; les autres valeurs sont retournées telles quelles"""
+    return item.as_dict() if isinstance(item, _Record) else item
+
+
+def is_mapping(value: Any) -> bool:
+    """dict ou enregistrement compact (bloc unified, finding)"""
+    return isinstance(value, (dict, _Record))
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Empreinte stable d'un finding normalisé
+
+Calculée à partir du bloc `unified` (outil, vulnerability_id, component,
+location) : deux builds qui remontent la même vulnérabilité sur le même
+composant produisent la même empreinte, quel que soit l'ordre des findings
+ou les champs volatils (dates, scores recalculés...).
+"""
+
+import hashlib
+from typing import Any, Dict
+
+from findings import is_mapping
+
+FINGERPRINT_FIELDS = ("vulnerability_id", "component", "location")
+
+
+def finding_fingerprint(tool: str, vuln: Dict[str, Any]) -> str:
+    """Empreinte sha1 (hex) d'un finding normalisé"""
+    unified = vuln.get("unified") if is_mapping(vuln) else None
+    if not is_mapping(unified):
+        unified = {}
+    parts = [str(tool or "").lower()]
+    parts.extend(str(unified.get(field) or "") for field in FINGERPRINT_FIELDS)
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Codec JSON commun à normalize-reports.py et split_reports.py
+
+Les documents sont sérialisés directement en bytes (écrits dans des fichiers
+binaires), avec l'encodeur le plus rapide disponible :
+
+- orjson, puis msgspec s'ils sont installés : sortie compacte (',' et ':')
+- json (stdlib) en repli : sortie identique à json.dumps(obj, ensure_ascii=False)
+
+Le contenu produit est le même quel que soit le backend, seuls les espaces
+diffèrent (NaN/Infinity, refusés par Elasticsearch, deviennent null). Les valeurs
+que le backend rapide refuse (entier au-delà de 64 bits, NaN en lecture...)
+repassent par la stdlib.
+
+Choix du backend : $NORMALIZER_JSON_CODEC = auto (défaut) | orjson | msgspec | json
+
+    from json_codec import CODEC
+    out.write(CODEC.dumpb(doc))
+    data = CODEC.loads(f.read())
+"""
+
+import json
+import os
+from typing import Any, Callable, List, Union
+
+from findings import json_default
+
+CODEC_ENV = "NORMALIZER_JSON_CODEC"
+BACKENDS = ("orjson", "msgspec", "json")
+
+
+class JsonCodec:
+    """
+    dumpb(obj) -> bytes UTF-8, loads(bytes | str) -> objet.
+    item_separator / key_separator : séparateurs du backend, pour recoller
+    des fragments déjà sérialisés (cf. split_reports.serialize_finding_document).
+    """
+
+    __slots__ = ("name", "dumpb", "loads", "item_separator", "key_separator")
+
+    def __init__(self, name: str, dumpb: Callable[[Any], bytes], loads: Callable[[Union[bytes, str]], Any],
+                 item_separator: bytes, key_separator: bytes):
+        self.name = name
+        self.dumpb = dumpb
+        self.loads = loads
+        self.item_separator = item_separator
+        self.key_separator = key_separator
+
+    def __repr__(self) -> str:
+        return f"JsonCodec({self.name})"
+
+
+_stdlib_encoder = json.JSONEncoder(ensure_ascii=False, default=json_default)
+
+
+def _stdlib_dumpb(obj: Any) -> bytes:
+    return _stdlib_encoder.encode(obj).encode("utf-8")
+
+
+def _stdlib_codec() -> JsonCodec:
+    return JsonCodec("json", _stdlib_dumpb, json.loads, b", ", b": ")
+
+
+def _orjson_codec() -> JsonCodec:
+    import orjson
+
+    # datetime/dataclass passent par json_default comme avec la stdlib ; clés non-str acceptées
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    dumps, fast_loads = orjson.dumps, orjson.loads
+
+    def dumpb(obj: Any) -> bytes:
+        try:
+            return dumps(obj, default=json_default, option=option)
+        except TypeError:
+            return _stdlib_dumpb(obj)
+
+    def loads(data: Union[bytes, str]) -> Any:
+        try:
+            return fast_loads(data)
+        except ValueError:
+            return json.loads(data)
+
+    return JsonCodec("orjson", dumpb, loads, b",", b":")
+
+
+def _msgspec_codec() -> JsonCodec:
+    import msgspec
+
+    encoder = msgspec.json.Encoder(enc_hook=json_default)
+    decoder = msgspec.json.Decoder()
+
+    def dumpb(obj: Any) -> bytes:
+        try:
+            return encoder.encode(obj)
+        except (TypeError, OverflowError, msgspec.EncodeError):
+            return _stdlib_dumpb(obj)
+
+    def loads(data: Union[bytes, str]) -> Any:
+        try:
+            return decoder.decode(data)
+        except msgspec.DecodeError:
+            return json.loads(data)
+
+    return JsonCodec("msgspec", dumpb, loads, b",", b":")
+
+
+_FACTORIES = {"orjson": _orjson_codec, "msgspec": _msgspec_codec, "json": _stdlib_codec}
+
+
+def available_backends() -> List[str]:
+    """Backends importables dans cet environnement (ordre de préférence)"""
+    names = []
+    for name in BACKENDS:
+        try:
+            _FACTORIES[name]()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_codec(name: str = "auto") -> JsonCodec:
+    """Codec `name` (ImportError s'il n'est pas installé), ou le plus rapide disponible avec "auto" """
+    name = (name or "auto").lower()
+    if name == "auto":
+        for candidate in BACKENDS[:-1]:
+            try:
+                return _FACTORIES[candidate]()
+            except ImportError:
+                continue
+        return _stdlib_codec()
+    if name not in _FACTORIES:
+        raise ValueError(f"Codec JSON inconnu: {name} (attendu: auto, {', '.join(BACKENDS)})")
+    return _FACTORIES[name]()
+
+
+def _default_codec() -> JsonCodec:
+    requested = os.environ.get(CODEC_ENV, "auto")
+    try:
+        return get_codec(requested)
+    except (ImportError, ValueError) as e:
+        print(f" ${CODEC_ENV}={requested} inutilisable ({e}), repli sur json")
+        return _stdlib_codec()
+
+
+CODEC = _default_codec()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Lecture/écriture JSON en flux pour les gros rapports de sécurité
+
+- JsonStreamReader : parseur "pull" qui parcourt un document JSON sans le
+  charger en entier (seules les valeurs demandées sont décodées, le reste
+  est sauté sans construire d'objets Python)
+- ArraySpool : tampon disque pour sérialiser un tableau élément par élément
+- dump_object_with_array : écrit un objet dont un tableau provient d'un spool,
+  au même format que CODEC.dumpb(obj)
+- write_document / encode_document : une ligne NDJSON en bytes (déjà sérialisée,
+  objet ordinaire ou objet avec spool), cf. json_codec.py
+
+Exemple (Trivy):
+    with open("trivy-raw.json", encoding="utf-8") as f:
+        reader = JsonStreamReader(f)
+        for key in reader.iter_object():
+            if key == "Results":
+                for _ in reader.iter_array():
+                    for rkey in reader.iter_object():
+                        ...
+            else:
+                reader.skip_value()
+"""
+
+import io
+import json
+import re
+import shutil
+import tempfile
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional, TextIO
+
+from json_codec import CODEC
+
+# Taille de lecture par défaut (1 Mo de texte)
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+_DELIMITERS = frozenset(' \t\n\r,:]}')
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+# Corps d'une chaîne JSON (après le guillemet ouvrant) jusqu'au guillemet fermant inclus
+_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+
+
+class JsonStreamReader:
+    """
+    Parseur JSON incrémental (API "pull").
+
+    iter_object() produit les clés d'un objet et iter_array() les indices d'un
+    tableau : pour chaque clé/indice, l'appelant consomme la valeur avec
+    read_value(), skip_value(), iter_object() ou iter_array(). Une valeur non
+    consommée est sautée automatiquement. Les générateurs doivent être
+    parcourus jusqu'au bout (pas de break) pour garder le flux cohérent.
+
+    La mémoire utilisée est bornée par la taille du tampon et par la plus
+    grosse valeur décodée via read_value().
+    """
+
+    def __init__(self, fp: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._pending = False
+        self._decoder = json.JSONDecoder()
+
+    # ------------------------------------------------------------------
+    # Gestion du tampon
+    # ------------------------------------------------------------------
+
+    def _fill(self) -> bool:
+        """Ajoute un bloc au tampon (au moins sa taille courante). False en fin de flux."""
+        if self._eof:
+            return False
+        remaining = self._buf[self._pos:]
+        chunk = self._fp.read(max(self._chunk_size, len(remaining)))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = remaining + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Premier caractère significatif (espaces ignorés), '' en fin de flux"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buf, self._pos)
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise self._error(f"'{char}' attendu")
+        self._pos += 1
+
+    def _consume_null(self) -> bool:
+        """Consomme un 'null' à la place d'un objet/tableau (ex: Trivy "Vulnerabilities": null)"""
+        if self._peek() == "n":
+            if self.read_value() is not None:
+                raise self._error("null attendu")
+            return True
+        return False
+
+    # ------------------------------------------------------------------
+    # Consommation des valeurs
+    # ------------------------------------------------------------------
+
+    def read_value(self) -> Any:
+        """Décode entièrement la valeur courante"""
+        self._pending = False
+        if not self._peek():
+            raise self._error("Fin de flux inattendue")
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                # Valeur tronquée par la fin du tampon (ou invalide en fin de flux)
+                if not self._fill():
+                    raise
+                continue
+            # Un nombre coupé par la fin du tampon paraît valide ("1" de "1.5") :
+            # la valeur n'est acceptée que suivie d'un délimiteur ou de la fin du flux
+            if (end == len(self._buf) or self._buf[end] not in _DELIMITERS) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def skip_value(self) -> None:
+        """Saute la valeur courante sans construire d'objets Python"""
+        self._pending = False
+        char = self._peek()
+        if char not in ("[", "{"):
+            self.read_value()
+            return
+
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(self._buf, self._pos)
+            if match is None:
+                self._pos = len(self._buf)
+                if not self._fill():
+                    raise self._error("Fin de flux inattendue")
+                continue
+            char = match.group()
+            self._pos = match.end()
+            if char == '"':
+                self._skip_string_body()
+            elif char in "[{":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def _skip_string_body(self) -> None:
+        while True:
+            match = _STRING_BODY.match(self._buf, self._pos)
+            if match is not None:
+                self._pos = match.end()
+                return
+            if not self._fill():
+                raise self._error("Chaîne non terminée")
+
+    def iter_object(self) -> Iterator[str]:
+        """Parcourt un objet en produisant ses clés ('null' = objet vide)"""
+        self._pending = False
+        if self._consume_null():
+            return
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            if self._peek() != '"':
+                raise self._error("Clé attendue")
+            key = self.read_value()
+            self._expect(":")
+            self._pending = True
+            yield key
+            if self._pending:
+                self.skip_value()
+            char = self._peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise self._error("',' ou '}' attendu")
+
+    def iter_array(self) -> Iterator[int]:
+        """Parcourt un tableau en produisant les indices de ses éléments ('null' = tableau vide)"""
+        self._pending = False
+        if self._consume_null():
+            return
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        index = 0
+        while True:
+            self._pending = True
+            yield index
+            if self._pending:
+                self.skip_value()
+            index += 1
+            char = self._peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise self._error("',' ou ']' attendu")
+
+    def iter_items(self) -> Iterator[Any]:
+        """Décode les éléments d'un tableau un par un"""
+        for _ in self.iter_array():
+            yield self.read_value()
+
+
+class ArraySpool:
+    """
+    Tampon disque pour un tableau JSON produit élément par élément.
+
+    Les éléments sont sérialisés au fil de l'eau (bytes, séparateur du codec)
+    dans un fichier temporaire binaire puis recopiés d'un bloc via copy_to().
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self._fp = tempfile.TemporaryFile("w+b", dir=directory or None)
+        self.count = 0
+
+    def append(self, item: Any) -> None:
+        self.append_raw(CODEC.dumpb(item))
+
+    def append_raw(self, serialized: bytes) -> None:
+        if self.count:
+            self._fp.write(CODEC.item_separator)
+        self._fp.write(serialized)
+        self.count += 1
+
+    def copy_to(self, out: BinaryIO) -> None:
+        self._fp.flush()
+        self._fp.seek(0)
+        shutil.copyfileobj(self._fp, out, DEFAULT_CHUNK_SIZE)
+        self._fp.seek(0, 2)
+
+    def close(self) -> None:
+        self._fp.close()
+
+    def __enter__(self) -> "ArraySpool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def dump_object_with_array(obj: Dict[str, Any], key: str, spool: ArraySpool, out: BinaryIO) -> None:
+    """
+    Écrit `obj` en JSON (fichier binaire) en remplaçant la valeur de `key` par
+    le contenu du spool. Le résultat est identique à CODEC.dumpb(obj) si obj[key]
+    contenait les éléments du spool.
+    """
+    out.write(b"{")
+    for index, (name, value) in enumerate(obj.items()):
+        if index:
+            out.write(CODEC.item_separator)
+        out.write(CODEC.dumpb(name))
+        out.write(CODEC.key_separator)
+        if name == key:
+            out.write(b"[")
+            spool.copy_to(out)
+            out.write(b"]")
+        else:
+            out.write(CODEC.dumpb(value))
+    out.write(b"}")
+
+
+def write_document(doc: Any, out: BinaryIO, key: str) -> None:
+    """
+    Écrit un document NDJSON (sans fin de ligne) : ligne JSON déjà sérialisée (bytes),
+    objet dont `key` est un ArraySpool (cf. dump_object_with_array), ou objet ordinaire.
+    """
+    if isinstance(doc, bytes):
+        out.write(doc)
+    elif isinstance(doc.get(key), ArraySpool):
+        dump_object_with_array(doc, key, doc[key], out)
+    else:
+        out.write(CODEC.dumpb(doc))
+
+
+def encode_document(doc: Any, key: str) -> bytes:
+    """Comme write_document, vers des bytes"""
+    if isinstance(doc, bytes):
+        return doc
+    if not isinstance(doc.get(key), ArraySpool):
+        return CODEC.dumpb(doc)
+    out = io.BytesIO()
+    write_document(doc, out, key)
+    return out.getvalue()
+
+
+def spool_items(items: Iterable[Any], directory: Optional[str] = None) -> ArraySpool:
+    """Sérialise un itérable d'éléments dans un nouveau spool"""
+    spool = ArraySpool(directory)
+    try:
+        for item in items:
+            spool.append(item)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Cycle de vie des findings, tenu localement au moment de la normalisation
+
+Remplace le calcul côté cluster du watcher watcher_mark_resolved (agrégation
+quotidienne de 90 jours de rapports) : une base SQLite, indexée par
+(service, tool, scan_type, empreinte du finding), est consultée et mise à
+jour à chaque build, en O(findings) :
+
+- first_seen : première détection par le pipeline (conservée d'un build à l'autre)
+- age_days   : ancienneté à la date du scan
+- status     : open, ou reopened si le finding avait été corrigé
+- findings ouverts absents du build → closed, resolution_date = date du scan,
+  mttr_hours = resolution_date - first_seen
+
+Les findings clôturés sont listés dans `resolved` du rapport normalisé ;
+split_reports.py en tire un document `resolved_finding` chacun (même forme que
+ceux que produisait le watcher), lu par vulnerability_report_watcher et les
+tableaux de bord MTTR. Le parent ne recopie pas la liste.
+
+Une base par (tool, service, scan_type) dans <state_dir>/lifecycle/ : les
+rapports d'un même build (batch_normalize.py) n'écrivent jamais dans la même base.
+"""
+
+import os
+import re
+import sqlite3
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from fingerprints import finding_fingerprint
+
+STATE_DIR_ENV = "NORMALIZER_STATE_DIR"
+SENTINEL_DATE = "1970-01-01T00:00:00Z"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS findings (
+    service TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    scan_type TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    vulnerability_id TEXT,
+    category TEXT,
+    severity TEXT,
+    severity_score REAL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    last_run TEXT NOT NULL,
+    status TEXT NOT NULL,
+    resolution_date TEXT,
+    mttr_hours REAL,
+    PRIMARY KEY (service, tool, scan_type, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS findings_status ON findings (service, tool, scan_type, status);
+"""
+
+_UNSAFE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def default_state_dir() -> Optional[str]:
+    return os.environ.get(STATE_DIR_ENV) or None
+
+
+def parse_time(value: str) -> datetime:
+    """ISO 8601 (Z, +00:00 ou +0000) → datetime UTC"""
+    value = value.strip()
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    elif re.search(r'[+-]\d{4}$', value):
+        value = f"{value[:-2]}:{value[-2:]}"
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _hours_between(start: str, end: str) -> float:
+    return max((parse_time(end) - parse_time(start)).total_seconds(), 0.0) / 3600
+
+
+class LifecycleStore:
+    """
+    Base de cycle de vie d'un (service, tool, scan_type).
+
+    observe() pour chaque finding du build (complète son bloc unified),
+    puis close_build() une fois le rapport épuisé : clôture des findings
+    disparus, validation de la transaction et fermeture de la base.
+    """
+
+    def __init__(self, state_dir: str, service: str, tool: str, scan_type: str):
+        self.service = service
+        self.tool = tool
+        self.scan_type = scan_type
+        # Identifiant de l'exécution : les findings ouverts non revus sont clôturés
+        self.run_id = uuid.uuid4().hex
+        self.observed = 0
+        self.reopened = 0
+
+        directory = os.path.join(state_dir, "lifecycle")
+        os.makedirs(directory, exist_ok=True)
+        name = _UNSAFE.sub("_", f"{tool}-{service}-{scan_type}")
+        self.path = os.path.join(directory, f"{name}.sqlite")
+        self._db = sqlite3.connect(self.path, timeout=60)
+        self._db.executescript(_SCHEMA)
+        self._scope = (service, tool, scan_type)
+
+    def observe(self, unified: Dict[str, Any], seen_at: str) -> None:
+        """Met à jour le finding dans la base et complète first_seen/age_days/status"""
+        fingerprint = finding_fingerprint(self.tool, {"unified": unified})
+        key = self._scope + (fingerprint,)
+        row = self._db.execute(
+            "SELECT first_seen, status FROM findings "
+            "WHERE service = ? AND tool = ? AND scan_type = ? AND fingerprint = ?", key
+        ).fetchone()
+
+        status = "open"
+        if row is None or row[1] == "closed":
+            first_seen = seen_at
+            if row is not None:
+                status = "reopened"
+                self.reopened += 1
+        else:
+            first_seen = row[0]
+
+        self._db.execute(
+            "INSERT INTO findings (service, tool, scan_type, fingerprint, vulnerability_id, category, severity, "
+            "severity_score, first_seen, last_seen, last_run, status, resolution_date, mttr_hours) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'open', NULL, NULL) "
+            "ON CONFLICT (service, tool, scan_type, fingerprint) DO UPDATE SET "
+            "vulnerability_id = excluded.vulnerability_id, category = excluded.category, "
+            "severity = excluded.severity, severity_score = excluded.severity_score, "
+            "first_seen = excluded.first_seen, last_seen = excluded.last_seen, last_run = excluded.last_run, "
+            "status = 'open', resolution_date = NULL, mttr_hours = NULL",
+            key + (unified.get("vulnerability_id"), unified.get("category"), unified.get("severity"),
+                   unified.get("severity_score"), first_seen, seen_at, self.run_id)
+        )
+        self.observed += 1
+
+        unified["first_seen"] = first_seen
+        unified["last_seen"] = seen_at
+        unified["age_days"] = int(_hours_between(first_seen, seen_at) // 24)
+        unified["status"] = status
+
+    def close_build(self, resolved_at: str) -> List[Dict[str, Any]]:
+        """Clôture les findings ouverts absents de ce build, retourne les entrées `resolved`"""
+        try:
+            rows = self._db.execute(
+                "SELECT fingerprint, vulnerability_id, category, severity, severity_score, first_seen, last_seen "
+                "FROM findings WHERE service = ? AND tool = ? AND scan_type = ? AND status = 'open' "
+                "AND last_run != ?", self._scope + (self.run_id,)
+            ).fetchall()
+
+            resolved = []
+            updates = []
+            for fingerprint, vuln_id, category, severity, score, first_seen, last_seen in rows:
+                mttr_hours = round(_hours_between(first_seen, resolved_at), 2)
+                updates.append((resolved_at, mttr_hours) + self._scope + (fingerprint,))
+                resolved.append({
+                    "vulnerability_id": vuln_id,
+                    "fingerprint": fingerprint,
+                    "service": {"name": self.service},
+                    "tool": {"name": self.tool},
+                    "unified": {
+                        "vulnerability_id": vuln_id,
+                        "status": "closed",
+                        "category": category,
+                        "severity": severity,
+                        "severity_score": score,
+                        "first_seen": first_seen,
+                        "last_seen": last_seen,
+                        "resolution_date": resolved_at,
+                        "mttr_hours": mttr_hours
+                    }
+                })
+            self._db.executemany(
+                "UPDATE findings SET status = 'closed', resolution_date = ?, mttr_hours = ? "
+                "WHERE service = ? AND tool = ? AND scan_type = ? AND fingerprint = ?", updates
+            )
+            self._db.commit()
+            return resolved
+        finally:
+            self._db.close()
+
+    def mttr_summary(self, resolved: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Bloc metrics.mttr.<tool> : MTTR des findings clôturés par ce build et cumulé"""
+        db = sqlite3.connect(self.path, timeout=60)
+        try:
+            open_count, closed_count, mttr_all = db.execute(
+                "SELECT SUM(status = 'open'), SUM(status = 'closed'), "
+                "AVG(CASE WHEN status = 'closed' THEN mttr_hours END) "
+                "FROM findings WHERE service = ? AND tool = ? AND scan_type = ?", self._scope
+            ).fetchone()
+        finally:
+            db.close()
+
+        hours = [entry["unified"]["mttr_hours"] for entry in resolved]
+        return {
+            "is_calculated": bool(hours),
+            "mttr_hours": round(sum(hours) / len(hours), 2) if hours else 0.0,
+            "resolved_count": len(hours),
+            "reopened_count": self.reopened,
+            "open_count": open_count or 0,
+            "mttr_hours_cumulative": round(mttr_all, 2) if mttr_all is not None else 0.0,
+            "closed_count_cumulative": closed_count or 0
+        }
+
+
+def iter_resolved_documents(resolved: Optional[List[Dict[str, Any]]], report_id: str,
+                            context_fields) -> Iterator[Dict[str, Any]]:
+    """
+    Documents resolved_finding à partir de `resolved` (LifecycleStore.close_build),
+    datés de la résolution, avec les champs aplatis du parent (split_reports.ParentContext.fields)
+    """
+    for entry in resolved or ():
+        if not isinstance(entry, dict):
+            continue
+        unified = entry.get("unified") if isinstance(entry.get("unified"), dict) else {}
+        doc = {
+            "@timestamp": unified.get("resolution_date"),
+            "doc_type": "resolved_finding",
+            "report_id": report_id,
+            "resolved": entry
+        }
+        doc.update(context_fields)
+        yield doc
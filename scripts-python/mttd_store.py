@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Série temporelle locale des MTTD par build (metrics.mttd.<tool>.1d … 7d)
+
+Le MTTD glissant sur 7 jours par outil n'était pas calculé : seul le build
+courant l'était (metrics.mttd.build_data), les moyennes glissantes restaient à
+reconstruire par des date_histogram sur tout l'index. Chaque normalisation
+enregistre ici son échantillon, et les fenêtres sont lues au même moment :
+
+- samples : un échantillon par build (build_id, scan_type), en ajout seul ;
+  un build renormalisé remplace son échantillon
+- day_buckets : nombre de builds et sommes (mttd_hours, detection_hours) par
+  jour UTC du scan, mis à jour incrémentalement (O(1) par build) ; les jours
+  au-delà de RETENTION_DAYS sont purgés (tampon circulaire)
+- fenêtre Nd : somme des N derniers jours jusqu'au jour du scan (au plus 7 lignes)
+
+Une base par (tool, service) dans <state_dir>/mttd/, comme lifecycle_store.py.
+"""
+
+import os
+import re
+import sqlite3
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+WINDOWS = (1, 2, 3, 4, 5, 6, 7)
+RETENTION_DAYS = 35
+DAY_MS = 86400 * 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    scan_type TEXT NOT NULL,
+    build_id TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    scan_end_time INTEGER NOT NULL,
+    mttd_hours REAL NOT NULL,
+    detection_hours REAL NOT NULL,
+    num_vulnerabilities INTEGER NOT NULL,
+    recorded_at TEXT NOT NULL,
+    PRIMARY KEY (scan_type, build_id)
+);
+CREATE TABLE IF NOT EXISTS day_buckets (
+    day INTEGER PRIMARY KEY,
+    builds INTEGER NOT NULL,
+    mttd_hours_sum REAL NOT NULL,
+    detection_hours_sum REAL NOT NULL
+);
+"""
+
+_UNSAFE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def _day_iso(day: int) -> str:
+    return datetime.fromtimestamp(day * 86400, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+class MttdStore:
+    """
+    Série MTTD d'un (tool, service).
+
+    record() ajoute l'échantillon du build et met à jour le compteur de son jour,
+    windows() lit les fenêtres 1d … 7d se terminant au jour du scan.
+    """
+
+    def __init__(self, state_dir: str, service: str, tool: str):
+        self.service = service
+        self.tool = tool
+
+        directory = os.path.join(state_dir, "mttd")
+        os.makedirs(directory, exist_ok=True)
+        name = _UNSAFE.sub("_", f"{tool}-{service}")
+        self.path = os.path.join(directory, f"{name}.sqlite")
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=60)
+        db.executescript(_SCHEMA)
+        return db
+
+    def record(self, build_id: str, scan_type: str, scan_end_time: int, mttd_hours: float,
+               detection_hours: float, num_vulnerabilities: int) -> None:
+        """Échantillon du build (remplace celui d'une normalisation précédente du même build)"""
+        if not build_id or build_id == "unknown":
+            build_id = f"unknown-{uuid.uuid4().hex}"
+        day = scan_end_time // DAY_MS
+        db = self._connect()
+        try:
+            with db:
+                previous = db.execute(
+                    "SELECT day, mttd_hours, detection_hours FROM samples WHERE scan_type = ? AND build_id = ?",
+                    (scan_type, build_id)
+                ).fetchone()
+                if previous is not None:
+                    self._add_to_bucket(db, previous[0], -1, -previous[1], -previous[2])
+                db.execute(
+                    "INSERT OR REPLACE INTO samples (scan_type, build_id, day, scan_end_time, mttd_hours, "
+                    "detection_hours, num_vulnerabilities, recorded_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (scan_type, build_id, day, scan_end_time, mttd_hours, detection_hours, num_vulnerabilities,
+                     datetime.now(timezone.utc).isoformat())
+                )
+                self._add_to_bucket(db, day, 1, mttd_hours, detection_hours)
+                db.execute("DELETE FROM day_buckets WHERE day < ?", (day - RETENTION_DAYS,))
+        finally:
+            db.close()
+
+    @staticmethod
+    def _add_to_bucket(db: sqlite3.Connection, day: int, builds: int, mttd_hours: float,
+                       detection_hours: float) -> None:
+        db.execute(
+            "INSERT INTO day_buckets (day, builds, mttd_hours_sum, detection_hours_sum) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (day) DO UPDATE SET builds = builds + excluded.builds, "
+            "mttd_hours_sum = mttd_hours_sum + excluded.mttd_hours_sum, "
+            "detection_hours_sum = detection_hours_sum + excluded.detection_hours_sum",
+            (day, builds, mttd_hours, detection_hours)
+        )
+
+    def windows(self, scan_end_time: int) -> Dict[str, Any]:
+        """Bloc metrics.mttd.<tool> : moyennes sur 1 à 7 jours glissants jusqu'au jour du scan"""
+        day = scan_end_time // DAY_MS
+        db = self._connect()
+        try:
+            buckets = {row[0]: row[1:] for row in db.execute(
+                "SELECT day, builds, mttd_hours_sum, detection_hours_sum FROM day_buckets "
+                "WHERE day > ? AND day <= ?", (day - max(WINDOWS), day)
+            )}
+        finally:
+            db.close()
+
+        result: Dict[str, Any] = {"service": self.service, "window_end": _day_iso(day)}
+        builds = mttd_sum = detection_sum = 0
+        for offset in range(max(WINDOWS)):
+            bucket = buckets.get(day - offset)
+            if bucket is not None:
+                builds += bucket[0]
+                mttd_sum += bucket[1]
+                detection_sum += bucket[2]
+            span = offset + 1
+            if span in WINDOWS:
+                result[f"{span}d"] = {
+                    "builds": builds,
+                    "mttd_hours": round(mttd_sum / builds, 4) if builds else 0.0,
+                    "detection_hours": round(detection_sum / builds, 4) if builds else 0.0
+                }
+        return result
+
+
+def timestamp_ms(value: Any) -> Optional[int]:
+    """Horodatage des métadonnées (ms, entier ou chaîne) → int, None si absent/invalide"""
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Cache de normalisation adressé par contenu
+
+Quand les dépendances et l'image ne changent pas, deux builds consécutifs
+produisent des rapports bruts identiques : la normalisation est alors
+réutilisée au lieu d'être refaite.
+
+- Clé : sha256 du rapport brut + outil + métadonnées qui influencent les
+  findings (service, scan_type, git_author...) + version du normaliseur
+- Entrée : <clé>.ndjson (findings normalisés, un par ligne) et <clé>.json
+  (rapport sans ses findings, écrit en dernier : sa présence valide l'entrée)
+- Les champs propres au build (@timestamp, build_id, git, dates de scan, MTTD)
+  sont recalculés à chaque utilisation par ReportNormalizer.normalize_cached
+- Éviction LRU (date de dernière utilisation = mtime de <clé>.json) au-delà
+  d'une taille totale sur disque
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from json_codec import CODEC
+
+CACHE_DIR_ENV = "NORMALIZER_CACHE_DIR"
+DEFAULT_MAX_MB = 2048
+HASH_CHUNK_SIZE = 1 << 20
+# À incrémenter si le format des entrées change
+CACHE_FORMAT = 1
+
+
+def default_cache_dir() -> Optional[str]:
+    return os.environ.get(CACHE_DIR_ENV) or None
+
+
+class CacheEntry:
+    """Entrée valide du cache : rapport sans findings + findings lus à la demande"""
+
+    def __init__(self, header: Dict[str, Any], findings_path: str):
+        self.header = header
+        self.findings_path = findings_path
+
+    def iter_findings(self) -> Iterator[Dict[str, Any]]:
+        with open(self.findings_path, "rb") as f:
+            for line in f:
+                yield CODEC.loads(line)
+
+
+class NormalizationCache:
+    """Cache disque des findings normalisés, borné en taille (LRU)"""
+
+    def __init__(self, directory: str, max_mb: int = DEFAULT_MAX_MB):
+        self.directory = directory
+        self.max_bytes = max_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def make_key(self, input_file: str, signature: Dict[str, Any]) -> str:
+        digest = hashlib.sha256()
+        digest.update(json.dumps({"format": CACHE_FORMAT, **signature}, sort_keys=True).encode("utf-8"))
+        digest.update(b"\0")
+        with open(input_file, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.directory, key)
+        return f"{base}.json", f"{base}.ndjson"
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        header_path, findings_path = self._paths(key)
+        try:
+            with open(header_path, "rb") as f:
+                header = CODEC.loads(f.read())
+            if not os.path.exists(findings_path):
+                raise FileNotFoundError(findings_path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        # Dernière utilisation (LRU)
+        os.utime(header_path)
+        self.hits += 1
+        return CacheEntry(header, findings_path)
+
+    def store(self, key: str, header: Dict[str, Any], findings: Iterable[Dict[str, Any]]) -> None:
+        """Enregistre une entrée complète (findings déjà disponibles)"""
+        for _ in self.tee(key, header, findings):
+            pass
+
+    def tee(self, key: str, header: Dict[str, Any], findings: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Produit les findings tout en les recopiant dans le cache. `header` n'est
+        sérialisé qu'à l'épuisement de `findings` (summary complet en mode flux).
+        Une itération interrompue ne laisse pas d'entrée.
+        """
+        header_path, findings_path = self._paths(key)
+        temp_findings = f"{findings_path}.{os.getpid()}.tmp"
+        complete = False
+        try:
+            with open(temp_findings, "wb") as f:
+                for vuln in findings:
+                    f.write(CODEC.dumpb(vuln))
+                    f.write(b"\n")
+                    yield vuln
+            complete = True
+        finally:
+            if not complete and os.path.exists(temp_findings):
+                os.remove(temp_findings)
+
+        os.replace(temp_findings, findings_path)
+        temp_header = f"{header_path}.{os.getpid()}.tmp"
+        with open(temp_header, "wb") as f:
+            f.write(CODEC.dumpb({k: v for k, v in header.items() if k != "vulnerabilities"}))
+        os.replace(temp_header, header_path)
+        self.stored += 1
+
+    def evict(self) -> None:
+        """Supprime les entrées les moins récemment utilisées au-delà de la taille maximale"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            header_path = os.path.join(self.directory, name)
+            findings_path = header_path[:-len(".json")] + ".ndjson"
+            try:
+                size = os.path.getsize(header_path) + os.path.getsize(findings_path)
+                entries.append((os.path.getmtime(header_path), size, header_path, findings_path))
+            except OSError:
+                continue
+            total += size
+
+        for _, size, header_path, findings_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for path in (header_path, findings_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+            self.evicted += 1
+
+    def report(self) -> None:
+        print(f" Cache de normalisation ({self.directory}): {self.hits} hit(s), {self.misses} miss(es), "
+              f"{self.stored} entrée(s) ajoutée(s), {self.evicted} évincée(s)")
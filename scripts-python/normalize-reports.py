@@ -11,31 +11,230 @@ Modifications v3.0:
 - Format metrics.mttr.{tool}
 
 Usage:
-    python3 normalize-reports.py <input_file> <output_file> <tool> <metadata_json>
+    python3 normalize-reports.py <input_file> <output_file> <tool> <metadata_json> [options]
+
+Outils: snyk, trivy, sonarqube, et via tool_adapters.py : sarif, codeql, semgrep, gitleaks (SARIF 2.1.0)
+
+Options:
+    --stream                 Lecture/écriture en flux des rapports Snyk/Trivy (mémoire constante)
+    --split-output <ndjson>  Mode fusionné : produit aussi le NDJSON de split_reports.py en une passe
+    --skip-normalized        Avec --split-output/--es-url : pas de JSON normalisé intermédiaire
+    --es-url <url>           Mode fusionné, documents envoyés directement à Elasticsearch (_bulk)
+                             au lieu du NDJSON (--es-index, --es-pipeline, --es-batch-docs/bytes)
+    --delta-previous <json|auto>  Mode delta : seuls les findings nouveaux/corrigés depuis ce rapport
+                             normalisé (auto : même fichier dans le build précédent) sont émis
+    --state-dir <dir>        Cycle de vie des findings (SQLite) : first_seen, age_days, MTTR,
+                             et MTTD glissant metrics.mttd.<tool>.1d-7d (cf. mttd_store.py)
+                             (défaut : $NORMALIZER_STATE_DIR)
+    --dedup                  Fusion des findings en double (même CVE/paquet/version, Snyk/Trivy)
+    --cache-dir <dir>        Cache des rapports déjà normalisés (défaut : $NORMALIZER_CACHE_DIR),
+                             borné par --cache-max-mb (LRU)
+    --ref-dictionary         Mode fusionné : références/recommandations des findings remplacées par des
+                             identifiants, table dans des documents reference_dictionary (cf. ref_dictionary.py)
+    --rollups                Agrégats paquet/cible/CWE/type/fixable × sévérité dans `rollups`, un document
+                             vulnerability_rollup par dimension (cf. rollups.py)
+    --lean-parent            Mode fusionné : parent sans `vulnerabilities` (summary, metrics, metadata,
+                             index des findings) ; nécessite --state-dir (résolutions, cf. projection.py)
+    --projection <json>      Mode fusionné : règles allow/deny par outil des champs aplatis émis
+    --shard-docs <n> / --shard-mb <mo> / --gzip
+                             Avec --split-output : findings répartis en shards (<split>-NNNNN.ndjson[.gz]),
+                             parent dans <split>-report.ndjson, publié en dernier (cf. shard_sink.py)
+    --profile                Temps mur/CPU par étape + document pipeline_perf (<output>-perf.ndjson),
+                             dumps cProfile/tracemalloc avec --profile-cpu/--profile-memory (cf. perf.py)
+
+Codec JSON : orjson (ou msgspec) s'il est installé, sinon json ; $NORMALIZER_JSON_CODEC pour
+l'imposer (cf. json_codec.py).
 """
 
+import argparse
+import hashlib
 import json
 import sys
 import os
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
 import traceback
 from datetime import datetime, timedelta, timezone
 import statistics
 
+from json_stream import JsonStreamReader, ArraySpool, dump_object_with_array
+from json_codec import CODEC
+from split_reports import iter_documents_from_findings, iter_split_documents, write_documents, NdjsonFileSink
+from es_bulk import add_bulk_arguments, sink_from_args
+from shard_sink import ShardedNdjsonSink, add_shard_arguments, shard_options_from_args
+from ref_dictionary import ReferenceDictionary, add_dictionary_argument
+from projection import LEAN_PARENT_ERROR, FieldProjection, add_projection_arguments, check_lean_parent, load_projection
+from doc_ids import report_document_id
+from sonar_collector import add_collector_arguments, collector_from_args
+from delta import DeltaTracker, resolve_previous_report
+from lifecycle_store import LifecycleStore, default_state_dir
+from mttd_store import MttdStore, timestamp_ms
+from dedup import dedup_findings, iter_dedup
+from norm_cache import NormalizationCache, default_cache_dir, DEFAULT_MAX_MB
+from rollups import RollupCounter, add_rollup_argument
+from recommendations import RECOMMENDATIONS
+from cvss import CVSS_SCORER
+from findings import (SnykFinding, TrivyFinding, SonarQubeFinding, UnifiedBlock, SENTINEL_DATE,
+                      gc_paused, intern_value)
+from tool_adapters import BUILTIN_TOOLS, adapter_class, supported_tools
+import perf
+
+# Outils dont les findings portent un paquet (clé de déduplication CVE/paquet/version)
+DEDUP_TOOLS = ("snyk", "trivy")
+
+_NORMALIZER_VERSION = None
+
+
+def _normalizer_version() -> str:
+    """Empreinte du code du normaliseur : une modification invalide le cache"""
+    global _NORMALIZER_VERSION
+    if _NORMALIZER_VERSION is None:
+        with open(os.path.abspath(__file__), "rb") as f:
+            _NORMALIZER_VERSION = hashlib.sha256(f.read()).hexdigest()[:16]
+    return _NORMALIZER_VERSION
+
 
 class ReportNormalizer:
     """Normalise les rapports de sécurité pour Elasticsearch avec MTTD/MTTR"""
 
-    def __init__(self, tool: str, metadata: Dict[str, Any]):
+    # Outils intégrés : méthode de normalisation en mémoire (les autres passent par tool_adapters.py)
+    BUILTIN_NORMALIZERS = {
+        "snyk": "_normalize_snyk",
+        "trivy": "_normalize_trivy",
+        "sonarqube": "_normalize_sonarqube"
+    }
+
+    def __init__(self, tool: str, metadata: Dict[str, Any], state_dir: Optional[str] = None,
+                 dedup: bool = False, cache=None, rollups: bool = False):
         self.tool = tool.lower()
         self.metadata = metadata
+        # Champs unified communs à tous les findings (self.metadata est la seule source de vérité)
+        self.assignee = metadata.get("git_author", "DevTeam")
+        self.team = f"{metadata.get('service', 'unknown')}-team"
+        # Adaptateur chargé à la demande pour les outils hors snyk/trivy/sonarqube (SARIF...)
+        self.adapter = None
+        if self.tool not in BUILTIN_TOOLS:
+            cls = adapter_class(self.tool)
+            self.adapter = cls(self) if cls is not None else None
+        # Cache de normalisation (norm_cache.NormalizationCache) : clé fixée par run_normalization
+        self.cache = cache
+        self.cache_key: Optional[str] = None
+        # Fusion des doublons CVE/paquet (outils SCA uniquement, cf. dedup.py)
+        self.dedup = dedup and self.tool in DEDUP_TOOLS
         # self.scan_end_time = metadata.get('scan_end_time')
+        # Cycle de vie des findings (first_seen, age_days, MTTR) si un répertoire d'état est fourni
+        self.lifecycle = None
+        # MTTD glissant 1d … 7d (série par build, cf. mttd_store.py), avec le même répertoire d'état
+        self.mttd_store = None
+        if state_dir:
+            self.lifecycle = LifecycleStore(state_dir, metadata.get("service", "unknown"), self.tool,
+                                            metadata.get("scan_type", "unknown"))
+            self.mttd_store = MttdStore(state_dir, metadata.get("service", "unknown"), self.tool)
+        # Agrégats paquet/cible/CWE/type/fixable × sévérité (--rollups, documents vulnerability_rollup, cf. rollups.py)
+        self.rollups = RollupCounter() if rollups else None
+        # Compteurs du cache des recommandations (moteur partagé, cf. recommendations.py) au début du rapport
+        self.recommendation_counters = RECOMMENDATIONS.counters()
+        # Idem pour les scores CVSS calculés depuis les vecteurs (cf. cvss.py)
+        self.cvss_counters = (CVSS_SCORER.lookups, CVSS_SCORER.computed, CVSS_SCORER.v4_vectors)
 
     def normalize(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
         """Point d'entrée principal de normalisation"""
 
-        # Structure de base normalisée (PRÉSERVÉE)
-        normalized = {
+        normalized = self._new_report(raw_data)
+
+        # Normalisation spécifique par outil (liste complète en mémoire : GC cyclique suspendu)
+        with perf.stage("normalize"), gc_paused():
+            method = self.BUILTIN_NORMALIZERS.get(self.tool)
+            if method is not None:
+                normalized = getattr(self, method)(raw_data, normalized)
+            elif self.adapter is not None:
+                normalized = self.adapter.normalize(raw_data, normalized)
+            else:
+                # Le rapport brut n'est plus recopié dans le document (raw_data)
+                print(f"Outil non supporté: {self.tool} (outils connus: {', '.join(supported_tools())})")
+                normalized["metadata"]["unsupported_tool"] = True
+
+        if self.cache_key is not None:
+            self.cache.store(self.cache_key, normalized, normalized["vulnerabilities"])
+
+        if self.dedup:
+            with perf.stage("dedup"):
+                normalized["vulnerabilities"] = dedup_findings(normalized["vulnerabilities"], self.tool,
+                                                               normalized["summary"])
+                self._update_severity_distribution(normalized["summary"])
+
+        if self.rollups is not None:
+            with perf.stage("rollup"):
+                add = self.rollups.add
+                for vuln in normalized["vulnerabilities"]:
+                    add(vuln)
+
+        return self._finalize_report(normalized)
+
+    def normalize_stream(self, input_file: str) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+        """
+        Normalisation incrémentale pour les gros rapports Snyk/Trivy.
+
+        Retourne (rapport, findings) : `rapport` porte les métadonnées complètes
+        et une liste `vulnerabilities` vide ; `findings` est un générateur qui
+        parcourt vulnerabilities[] / Results[].Vulnerabilities[] élément par
+        élément. summary et metrics sont complétés à l'épuisement du générateur.
+
+        Idem pour les adaptateurs en flux (SARIF : runs[].results[]).
+        Les autres outils sont chargés et normalisés en mémoire (même contrat).
+        """
+
+        if self.tool == "snyk":
+            with perf.stage("load"):
+                header = self._read_stream_header(input_file, "vulnerabilities")
+            normalized = self._new_report(header)
+            normalized["metadata"]["snyk"] = self._snyk_metadata(header)
+            # Décodage du rapport brut compris dans normalize (lecture en flux)
+            findings = perf.timed_iter(self._iter_snyk_stream(input_file, normalized), "normalize")
+            if self.cache_key is not None:
+                findings = perf.timed_iter(self.cache.tee(self.cache_key, normalized, findings), "cache")
+            return normalized, self._finalize_stream(findings, normalized, input_file)
+
+        if self.tool == "trivy":
+            with perf.stage("load"):
+                header = self._read_stream_header(input_file, "Results")
+            normalized = self._new_report(header)
+            normalized["metadata"]["trivy"] = self._trivy_metadata(header, header["Results"])
+            # Décodage du rapport brut compris dans normalize (lecture en flux)
+            findings = perf.timed_iter(self._iter_trivy_stream(input_file, normalized), "normalize")
+            if self.cache_key is not None:
+                findings = perf.timed_iter(self.cache.tee(self.cache_key, normalized, findings), "cache")
+            return normalized, self._finalize_stream(findings, normalized, input_file)
+
+        if self.adapter is not None and self.adapter.streaming:
+            with perf.stage("load"):
+                header = self.adapter.read_header(input_file)
+            normalized = self._new_report(header)
+            self.adapter.describe(header, normalized)
+            findings = perf.timed_iter(self.adapter.iter_stream(input_file, normalized), "normalize")
+            if self.cache_key is not None:
+                findings = perf.timed_iter(self.cache.tee(self.cache_key, normalized, findings), "cache")
+            return normalized, self._finalize_stream(findings, normalized, input_file)
+
+        normalized = self.normalize(self.load_raw_report(input_file))
+        vulnerabilities = normalized["vulnerabilities"]
+        normalized["vulnerabilities"] = []
+        return normalized, iter(vulnerabilities)
+
+    @property
+    def supported(self) -> bool:
+        return self.tool in self.BUILTIN_NORMALIZERS or self.adapter is not None
+
+    def load_raw_report(self, input_file: str) -> Dict[str, Any]:
+        """Rapport brut en mémoire (non lu pour un outil non supporté)"""
+        if not self.supported:
+            return {}
+        with open(input_file, 'rb') as f, perf.stage("load"):
+            return CODEC.loads(f.read())
+
+    def _new_report(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Structure de base normalisée (PRÉSERVÉE)"""
+
+        return {
             "@timestamp": datetime.now(timezone.utc).isoformat(),
             "event": {
                 "created": datetime.now(timezone.utc).isoformat(),
@@ -81,25 +280,184 @@ class ReportNormalizer:
             }
         }
 
-        # Normalisation spécifique par outil
-        if self.tool == "snyk":
-            normalized = self._normalize_snyk(raw_data, normalized)
-        elif self.tool == "trivy":
-            normalized = self._normalize_trivy(raw_data, normalized)
-        elif self.tool == "sonarqube":
-            normalized = self._normalize_sonarqube(raw_data, normalized)
-        else:
-            print(f"Outil non supporté: {self.tool}")
-            normalized["raw_data"] = raw_data
+    def _finalize_report(self, normalized: Dict[str, Any]) -> Dict[str, Any]:
+        """Métriques calculées une fois le summary complet"""
+
+        with perf.stage("mttd"):
+            #NOUVEAU : Calcul MTTD
+            normalized = self._calculate_mttd(normalized)
+
+            if self.mttd_store is not None:
+                normalized = self._calculate_rolling_mttd(normalized)
 
-        #NOUVEAU : Calcul MTTD
-        normalized = self._calculate_mttd(normalized)
+            #NOUVEAU : Initialiser MTTR (sera calculé par le watcher)
+            normalized = self._initialize_mttr(normalized)
 
-        #NOUVEAU : Initialiser MTTR (sera calculé par le watcher)
-        normalized = self._initialize_mttr(normalized)
+        if self.lifecycle is not None:
+            with perf.stage("lifecycle"):
+                normalized = self._calculate_mttr(normalized)
+
+        # Tables d'agrégats (transformées en documents vulnerability_rollup par split_reports.py)
+        if self.rollups is not None:
+            normalized["rollups"] = self.rollups.as_dict()
+        self._report_recommendation_cache()
+        self._report_cvss_scores()
 
         return normalized
 
+    def _report_recommendation_cache(self) -> None:
+        hits, misses = (now - start for now, start in zip(RECOMMENDATIONS.counters(), self.recommendation_counters))
+        if hits + misses:
+            perf.count("recommendation_cache_hits", hits)
+            perf.count("recommendation_cache_misses", misses)
+            print(f" Recommandations: {hits}/{hits + misses} servies par le cache "
+                  f"({hits / (hits + misses) * 100:.1f} %)")
+
+    def _report_cvss_scores(self) -> None:
+        lookups = CVSS_SCORER.lookups - self.cvss_counters[0]
+        computed = CVSS_SCORER.computed - self.cvss_counters[1]
+        v4_vectors = CVSS_SCORER.v4_vectors - self.cvss_counters[2]
+        if lookups:
+            perf.count("cvss_vector_lookups", lookups)
+            perf.count("cvss_vectors_computed", computed)
+            print(f" CVSS: {lookups} scores lus depuis les vecteurs, {computed} vecteurs calculés "
+                  f"({CVSS_SCORER.distinct} en cache)")
+        if v4_vectors:
+            perf.count("cvss_v4_vectors", v4_vectors)
+            print(f" CVSS: {v4_vectors} vecteurs CVSS:4.0 non calculés (score d'après la sévérité)")
+
+    # ========================================================================
+    # LECTURE EN FLUX (gros rapports Snyk/Trivy)
+    # ========================================================================
+
+    def _read_stream_header(self, input_file: str, array_key: str) -> Dict[str, Any]:
+        """
+        Pré-lecture des champs de premier niveau, sans décoder le tableau
+        `array_key` (sauté, seul son nombre d'éléments est conservé).
+        Nécessaire car Snyk écrit projectName/org/version après vulnerabilities.
+        """
+
+        header: Dict[str, Any] = {array_key: 0}
+        with open(input_file, 'r', encoding='utf-8') as f:
+            reader = JsonStreamReader(f)
+            for key in reader.iter_object():
+                if key == array_key:
+                    header[key] = sum(1 for _ in reader.iter_array())
+                else:
+                    header[key] = reader.read_value()
+        return header
+
+    def _iter_snyk_stream(self, input_file: str, normalized: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        scan_end_time = normalized.get("@timestamp")
+
+        with open(input_file, 'r', encoding='utf-8') as f:
+            reader = JsonStreamReader(f)
+            for key in reader.iter_object():
+                if key != "vulnerabilities":
+                    reader.skip_value()
+                    continue
+                for _ in reader.iter_array():
+                    yield self._normalize_snyk_vuln(reader.read_value(), normalized["summary"], scan_end_time)
+
+    def _iter_trivy_stream(self, input_file: str, normalized: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        # Trivy écrit Target/Type avant Vulnerabilities dans chaque résultat
+        scan_end_time = normalized.get("@timestamp")
+
+        with open(input_file, 'r', encoding='utf-8') as f:
+            reader = JsonStreamReader(f)
+            for key in reader.iter_object():
+                if key != "Results":
+                    reader.skip_value()
+                    continue
+                for _ in reader.iter_array():
+                    result: Dict[str, Any] = {}
+                    for result_key in reader.iter_object():
+                        if result_key == "Vulnerabilities":
+                            for _ in reader.iter_array():
+                                yield self._normalize_trivy_vuln(
+                                    reader.read_value(), result, normalized["summary"], scan_end_time
+                                )
+                        elif result_key in ("Target", "Type"):
+                            result[result_key] = reader.read_value()
+                        else:
+                            reader.skip_value()
+
+    def _finalize_stream(self, findings: Iterator[Dict[str, Any]], normalized: Dict[str, Any],
+                         input_file: str) -> Iterator[Dict[str, Any]]:
+        """Déduplication éventuelle, agrégats, puis summary/metrics complétés à l'épuisement des findings"""
+        if self.dedup:
+            findings = perf.timed_iter(iter_dedup(findings, self.tool, normalized["summary"],
+                                                  os.path.dirname(os.path.abspath(input_file))), "dedup")
+        if self.rollups is not None:
+            findings = perf.timed_iter(self._counted(findings), "rollup")
+        yield from findings
+
+        if self.tool in ("snyk", "trivy"):
+            self._update_severity_distribution(normalized["summary"])
+        elif self.adapter is not None:
+            self.adapter.finalize(normalized)
+        self._finalize_report(normalized)
+
+    def _counted(self, findings: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        add = self.rollups.add
+        for vuln in findings:
+            add(vuln)
+            yield vuln
+
+    # ========================================================================
+    # CACHE DE NORMALISATION
+    # ========================================================================
+
+    def cache_signature(self) -> Dict[str, Any]:
+        """Entrées, hors rapport brut, dont dépendent les findings normalisés (clé du cache)"""
+        return {
+            "tool": self.tool,
+            "service": self.metadata.get("service", "unknown"),
+            "scan_type": self.metadata.get("scan_type", "unknown"),
+            "git_author": self.metadata.get("git_author", "DevTeam"),
+            "lifecycle": self.lifecycle is not None,
+            "normalizer": _normalizer_version()
+        }
+
+    def normalize_cached(self, entry, input_file: str) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+        """
+        Rapport reconstruit depuis une entrée du cache (même contrat que normalize_stream) :
+        les champs propres au build (@timestamp, build_id, git, dates de scan) sont
+        régénérés, les dates de détection égales à l'ancien @timestamp sont re-datées,
+        puis cycle de vie, déduplication et MTTD sont appliqués comme sans cache.
+        """
+
+        cached = entry.header
+        normalized = self._new_report({})
+        normalized["metadata"]["tool_version"] = cached["metadata"].get("tool_version", "unknown")
+        for key, value in cached["metadata"].items():
+            normalized["metadata"].setdefault(key, value)
+        for key, value in cached.items():
+            if key not in ("@timestamp", "event", "metadata"):
+                normalized[key] = value
+        normalized["vulnerabilities"] = []
+
+        findings = perf.timed_iter(self._restamp(entry.iter_findings(), cached["@timestamp"],
+                                                 normalized["@timestamp"]), "cache")
+        return normalized, self._finalize_stream(findings, normalized, input_file)
+
+    def _restamp(self, findings: Iterator[Dict[str, Any]], cached_time: str,
+                 scan_end_time: str) -> Iterator[Dict[str, Any]]:
+        for vuln in findings:
+            unified = vuln.get("unified")
+            if isinstance(unified, dict):
+                if unified.get("last_seen") == cached_time:
+                    unified["last_seen"] = scan_end_time
+                if unified.get("first_seen") == cached_time:
+                    unified["first_seen"] = scan_end_time
+                if self.lifecycle is not None:
+                    self.lifecycle.observe(unified, scan_end_time)
+            yield vuln
+
+    # ========================================================================
+    # NORMALISATION PAR OUTIL
+    # ========================================================================
+
     def _normalize_snyk(self, data: Dict[str, Any], normalized: Dict[str, Any]) -> Dict[str, Any]:
         """Normalisation Snyk avec extraction recommandations et unification des références"""
 
@@ -107,88 +465,103 @@ class ReportNormalizer:
         scan_end_time = normalized.get("@timestamp")
 
         for vuln in vulnerabilities:
-            severity = vuln.get("severity", "unknown").lower()
-
-            normalized["summary"]["total_vulnerabilities"] += 1
-            if severity in normalized["summary"]:
-                normalized["summary"][severity] += 1
+            normalized["vulnerabilities"].append(
+                self._normalize_snyk_vuln(vuln, normalized["summary"], scan_end_time)
+            )
 
-            recommendation = self._extract_snyk_recommendation(vuln)
+        normalized["metadata"]["snyk"] = self._snyk_metadata(data)
 
-            # CORRECTION CRITIQUE : Unifier la structure de references
-            refs_raw = vuln.get("references", [])
-            refs = []
+        self._update_severity_distribution(normalized["summary"])
 
-            if isinstance(refs_raw, list):
-                for r in refs_raw:
-                    if isinstance(r, dict):
-                        # Convertir objet {"url": "...", "title": "..."} en chaîne
-                        url = r.get("url", "")
-                        if url and isinstance(url, str):
-                            refs.append(url.strip())
-                    elif isinstance(r, str) and r.strip():
-                        # Déjà une chaîne
-                        refs.append(r.strip())
-            elif isinstance(refs_raw, str) and refs_raw.strip():
-                refs = [refs_raw.strip()]
-
-            # Dédupliquer et nettoyer
-            refs = list(dict.fromkeys(refs))  # Supprimer les doublons tout en gardant l'ordre
-
-            # --- Snyk-specific fields for unified ---
-            has_fix = bool(vuln.get("fixedIn")) and len(vuln.get("fixedIn", [])) > 0
-            fix_version = vuln.get("fixedIn", [None])[0] if has_fix else ""
-            can_auto_upgrade = vuln.get("isUpgradable", False)
-            exploit_maturity = vuln.get("exploitMaturity", "no-known-exploit").lower()
-            exploit_exists = exploit_maturity in ['mature', 'proof-of-concept']
-
-            pkg_name = vuln.get("packageName", "")
-            pkg_version = vuln.get("version", "")
-            package_full = f"{pkg_name}@{pkg_version}" if pkg_name and pkg_version else (pkg_name or 'unknown')
-
-            is_sca = "maven" in self.metadata.get("scan_type", "").lower() or "npm" in self.metadata.get("scan_type", "").lower()
-            vuln_type = "cve" if vuln.get("identifiers", {}).get("CVE") else ("sca" if is_sca else "code")
-
-            # Nettoyage des CVE et CWE
-            cve_ids = vuln.get("identifiers", {}).get("CVE", [])
-            if isinstance(cve_ids, list):
-                cve_ids = [str(c).strip() for c in cve_ids if c]
-            else:
-                cve_ids = []
+        return normalized
 
-            cwe_ids = vuln.get("identifiers", {}).get("CWE", [])
-            if isinstance(cwe_ids, list):
-                cwe_ids = [str(c).strip() for c in cwe_ids if c]
-            else:
-                cwe_ids = []
-
-            normalized_vuln = {
-                "id": vuln.get("id", ""),
-                "title": vuln.get("title", ""),
-                "severity": severity,
-                "cvss_score": vuln.get("cvssScore", 0),
-                "package": {
-                    "name": pkg_name,
-                    "version": pkg_version
-                },
-                "fixed_in": vuln.get("fixedIn", []),
-                "is_upgradable": can_auto_upgrade,
-                "is_patchable": vuln.get("isPatchable", False),
-                "cve": cve_ids,
-                "cwe": cwe_ids,
-                "references": refs,  # ← LISTE DE CHAÎNES UNIFIÉE
-                "publication_time": vuln.get("publicationTime", None),
-                "disclosure_time": vuln.get("disclosureTime", None),
-                "exploit_maturity": exploit_maturity,
-                "mitigation_recommendation": recommendation
-            }
+    def _normalize_snyk_vuln(self, vuln: Dict[str, Any], summary: Dict[str, Any], scan_end_time: str) -> SnykFinding:
+        """Normalise une vulnérabilité Snyk et met à jour les compteurs du summary"""
+
+        severity = intern_value(vuln.get("severity", "unknown").lower())
+
+        summary["total_vulnerabilities"] += 1
+        if severity in summary:
+            summary[severity] += 1
+
+        recommendation = RECOMMENDATIONS.snyk(vuln)
+
+        # Score fourni par Snyk, sinon calculé depuis le vecteur CVSSv3
+        cvss_score = vuln.get("cvssScore", 0)
+        if not cvss_score:
+            vector_score = CVSS_SCORER.score(vuln.get("CVSSv3"))
+            if vector_score is not None:
+                cvss_score = vector_score
+
+        # CORRECTION CRITIQUE : Unifier la structure de references
+        refs_raw = vuln.get("references", [])
+        refs = []
+
+        if isinstance(refs_raw, list):
+            for r in refs_raw:
+                if isinstance(r, dict):
+                    # Convertir objet {"url": "...", "title": "..."} en chaîne
+                    url = r.get("url", "")
+                    if url and isinstance(url, str):
+                        refs.append(url.strip())
+                elif isinstance(r, str) and r.strip():
+                    # Déjà une chaîne
+                    refs.append(r.strip())
+        elif isinstance(refs_raw, str) and refs_raw.strip():
+            refs = [refs_raw.strip()]
+
+        # Dédupliquer et nettoyer
+        refs = list(dict.fromkeys(refs))  # Supprimer les doublons tout en gardant l'ordre
+
+        # --- Snyk-specific fields for unified ---
+        has_fix = bool(vuln.get("fixedIn")) and len(vuln.get("fixedIn", [])) > 0
+        fix_version = vuln.get("fixedIn", [None])[0] if has_fix else ""
+        can_auto_upgrade = vuln.get("isUpgradable", False)
+        exploit_maturity = intern_value(vuln.get("exploitMaturity", "no-known-exploit").lower())
+        exploit_exists = exploit_maturity in ['mature', 'proof-of-concept']
+
+        pkg_name = vuln.get("packageName", "")
+        pkg_version = vuln.get("version", "")
+        package_full = f"{pkg_name}@{pkg_version}" if pkg_name and pkg_version else (pkg_name or 'unknown')
+
+        is_sca = "maven" in self.metadata.get("scan_type", "").lower() or "npm" in self.metadata.get("scan_type", "").lower()
+        vuln_type = "cve" if vuln.get("identifiers", {}).get("CVE") else ("sca" if is_sca else "code")
+
+        # Nettoyage des CVE et CWE
+        cve_ids = vuln.get("identifiers", {}).get("CVE", [])
+        if isinstance(cve_ids, list):
+            cve_ids = [str(c).strip() for c in cve_ids if c]
+        else:
+            cve_ids = []
 
+        cwe_ids = vuln.get("identifiers", {}).get("CWE", [])
+        if isinstance(cwe_ids, list):
+            cwe_ids = [str(c).strip() for c in cwe_ids if c]
+        else:
+            cwe_ids = []
+
+        return SnykFinding(
+            id=vuln.get("id", ""),
+            title=vuln.get("title", ""),
+            severity=severity,
+            cvss_score=cvss_score,
+            package=(pkg_name, pkg_version),
+            fixed_in=vuln.get("fixedIn", []),
+            is_upgradable=can_auto_upgrade,
+            is_patchable=vuln.get("isPatchable", False),
+            cve=cve_ids,
+            cwe=cwe_ids,
+            references=refs,  # ← LISTE DE CHAÎNES UNIFIÉE
+            publication_time=vuln.get("publicationTime", None),
+            disclosure_time=vuln.get("disclosureTime", None),
+            exploit_maturity=exploit_maturity,
+            mitigation_recommendation=recommendation,
             # INJECTION DU BLOC UNIFIED
-            normalized_vuln['unified'] = self._create_unified_block(
+            unified=self._create_unified_block(
                 tool_id=vuln.get("id", f"snyk:unknown"),
                 tool_type=vuln_type,
                 severity=severity,
-                score=vuln.get("cvssScore") or self._get_severity_score(severity),
+                score=cvss_score or self._get_severity_score(severity),
                 is_security_issue=True,
                 is_vulnerability=True,
                 category='security',
@@ -202,25 +575,16 @@ class ReportNormalizer:
                 creation_time=vuln.get("publicationTime"),
                 current_time=scan_end_time
             )
+        )
 
-            normalized["vulnerabilities"].append(normalized_vuln)
-
-        normalized["metadata"]["snyk"] = {
+    def _snyk_metadata(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
             "project_name": data.get("projectName", ""),
             "org": data.get("org", ""),
             "test_type": "sca" if "maven" in self.metadata.get("scan_type", "") else "code",
             "dependencies_analyzed": data.get("dependencyCount", 0)
         }
 
-        normalized["summary"]["severity_distribution"] = {
-            "critical": normalized["summary"]["critical"],
-            "high": normalized["summary"]["high"],
-            "medium": normalized["summary"]["medium"],
-            "low": normalized["summary"]["low"]
-        }
-
-        return normalized
-
     def _normalize_trivy(self, data: Dict[str, Any], normalized: Dict[str, Any]) -> Dict[str, Any]:
         """Normalisation Trivy avec extraction recommandations et nettoyage des références"""
 
@@ -228,118 +592,126 @@ class ReportNormalizer:
         scan_end_time = normalized.get("@timestamp")
 
         for result in results:
-            target = result.get("Target", "")
             vulns = result.get("Vulnerabilities") or []
 
             for vuln in vulns:
-                severity = vuln.get("Severity", "UNKNOWN").lower()
-
-                severity_map = {
-                    "critical": "critical",
-                    "high": "high",
-                    "medium": "medium",
-                    "low": "low",
-                    "unknown": "info"
-                }
-                mapped_severity = severity_map.get(severity, "info")
+                normalized["vulnerabilities"].append(
+                    self._normalize_trivy_vuln(vuln, result, normalized["summary"], scan_end_time)
+                )
 
-                normalized["summary"]["total_vulnerabilities"] += 1
-                if mapped_severity in normalized["summary"]:
-                    normalized["summary"][mapped_severity] += 1
+        normalized["metadata"]["trivy"] = self._trivy_metadata(data, len(results))
 
-                recommendation = self._extract_trivy_recommendation(vuln)
+        self._update_severity_distribution(normalized["summary"])
 
-                # CORRECTION CRITIQUE : Nettoyage robuste des références
-                refs_raw = vuln.get("references") or vuln.get("References") or []
+        return normalized
 
-                # Assurer que refs est une liste de chaînes valides
-                if isinstance(refs_raw, list):
-                    refs = [str(r).strip() for r in refs_raw if r is not None and str(r).strip()]
-                elif isinstance(refs_raw, str):
-                    refs = [refs_raw.strip()] if refs_raw.strip() else []
-                else:
-                    refs = []
-
-                # --- Trivy-specific fields for unified ---
-                fixed_version = vuln.get("FixedVersion") or ""
-                has_fix = bool(fixed_version)
-                pkg_name = vuln.get("PkgName", "")
-                pkg_version = vuln.get("InstalledVersion", "")
-                package_full = f"{pkg_name}@{pkg_version}" if pkg_name and pkg_version else (pkg_name or 'unknown')
-
-                vuln_id = vuln.get("VulnerabilityID", "")
-                cve_list = [vuln_id] if vuln_id.startswith("CVE") else []
-                vuln_type = "cve" if cve_list else "sca"
-
-                # Nettoyage des CWE IDs
-                cwe_ids = vuln.get("CweIDs") or vuln.get("cwe") or []
-                if isinstance(cwe_ids, list):
-                    cwe_ids = [str(c).strip() for c in cwe_ids if c is not None and str(c).strip()]
-                else:
-                    cwe_ids = []
-
-                # Nettoyage des dates
-                pub_time = vuln.get("PublishedDate") or vuln.get("publication_time") or None
-                mod_time = vuln.get("LastModifiedDate") or vuln.get("last_modified_time") or None
-
-                normalized_vuln = {
-                    "id": vuln_id,
-                    "title": vuln.get("Title", ""),
-                    "severity": mapped_severity,
-                    "cvss_score": self._extract_cvss_score(vuln),
-                    "package": {
-                        "name": pkg_name,
-                        "version": pkg_version,
-                        "type": result.get("Type", "")
-                    },
-                    "fixed_in": [fixed_version] if fixed_version else [],
-                    "target": target,
-                    "cve": cve_list,
-                    "cwe": cwe_ids,
-                    "references": refs,  # ← Liste propre garantie
-                    "publication_time": pub_time,
-                    "last_modified_time": mod_time,
-                    "mitigation_recommendation": recommendation
-                }
+    def _normalize_trivy_vuln(self, vuln: Dict[str, Any], result: Dict[str, Any],
+                              summary: Dict[str, Any], scan_end_time: str) -> TrivyFinding:
+        """Normalise une vulnérabilité Trivy (result fournit Target/Type) et met à jour le summary"""
 
-                # INJECTION DU BLOC UNIFIED
-                normalized_vuln['unified'] = self._create_unified_block(
-                    tool_id=vuln_id or f"trivy:unknown",
-                    tool_type=vuln_type,
-                    severity=mapped_severity,
-                    score=self._extract_cvss_score(vuln) or self._get_severity_score(mapped_severity),
-                    is_security_issue=True,
-                    is_vulnerability=True,
-                    category='security',
-                    is_fixable=has_fix,
-                    fix_version=fixed_version,
-                    can_auto_upgrade=False,
-                    is_exploitable=False,
-                    exploit_maturity='not-applicable',
-                    component=package_full,
-                    location=target + (f" ({result.get('Type')})" if result.get('Type') else ""),
-                    creation_time=pub_time,
-                    current_time=scan_end_time
-                )
+        target = result.get("Target", "")
+        severity = vuln.get("Severity", "UNKNOWN").lower()
+
+        severity_map = {
+            "critical": "critical",
+            "high": "high",
+            "medium": "medium",
+            "low": "low",
+            "unknown": "info"
+        }
+        mapped_severity = intern_value(severity_map.get(severity, "info"))
+
+        summary["total_vulnerabilities"] += 1
+        if mapped_severity in summary:
+            summary[mapped_severity] += 1
 
-                normalized["vulnerabilities"].append(normalized_vuln)
+        recommendation = RECOMMENDATIONS.trivy(vuln)
+        cvss_score = self._extract_cvss_score(vuln)
+
+        # CORRECTION CRITIQUE : Nettoyage robuste des références
+        refs_raw = vuln.get("references") or vuln.get("References") or []
+
+        # Assurer que refs est une liste de chaînes valides
+        if isinstance(refs_raw, list):
+            refs = [str(r).strip() for r in refs_raw if r is not None and str(r).strip()]
+        elif isinstance(refs_raw, str):
+            refs = [refs_raw.strip()] if refs_raw.strip() else []
+        else:
+            refs = []
+
+        # --- Trivy-specific fields for unified ---
+        fixed_version = vuln.get("FixedVersion") or ""
+        has_fix = bool(fixed_version)
+        pkg_name = vuln.get("PkgName", "")
+        pkg_version = vuln.get("InstalledVersion", "")
+        package_full = f"{pkg_name}@{pkg_version}" if pkg_name and pkg_version else (pkg_name or 'unknown')
+
+        vuln_id = vuln.get("VulnerabilityID", "")
+        cve_list = [vuln_id] if vuln_id.startswith("CVE") else []
+        vuln_type = "cve" if cve_list else "sca"
+
+        # Nettoyage des CWE IDs
+        cwe_ids = vuln.get("CweIDs") or vuln.get("cwe") or []
+        if isinstance(cwe_ids, list):
+            cwe_ids = [str(c).strip() for c in cwe_ids if c is not None and str(c).strip()]
+        else:
+            cwe_ids = []
+
+        # Nettoyage des dates
+        pub_time = vuln.get("PublishedDate") or vuln.get("publication_time") or None
+        mod_time = vuln.get("LastModifiedDate") or vuln.get("last_modified_time") or None
+
+        return TrivyFinding(
+            id=vuln_id,
+            title=vuln.get("Title", ""),
+            severity=mapped_severity,
+            cvss_score=cvss_score,
+            package=(pkg_name, pkg_version, result.get("Type", "")),
+            fixed_in=[fixed_version] if fixed_version else [],
+            target=target,
+            cve=cve_list,
+            cwe=cwe_ids,
+            references=refs,  # ← Liste propre garantie
+            publication_time=pub_time,
+            last_modified_time=mod_time,
+            mitigation_recommendation=recommendation,
+            # INJECTION DU BLOC UNIFIED
+            unified=self._create_unified_block(
+                tool_id=vuln_id or f"trivy:unknown",
+                tool_type=vuln_type,
+                severity=mapped_severity,
+                score=cvss_score or self._get_severity_score(mapped_severity),
+                is_security_issue=True,
+                is_vulnerability=True,
+                category='security',
+                is_fixable=has_fix,
+                fix_version=fixed_version,
+                can_auto_upgrade=False,
+                is_exploitable=False,
+                exploit_maturity='not-applicable',
+                component=package_full,
+                location=target + (f" ({result.get('Type')})" if result.get('Type') else ""),
+                creation_time=pub_time,
+                current_time=scan_end_time
+            )
+        )
 
-        normalized["metadata"]["trivy"] = {
+    def _trivy_metadata(self, data: Dict[str, Any], targets_analyzed: int) -> Dict[str, Any]:
+        return {
             "schema_version": data.get("SchemaVersion", 0),
             "artifact_name": data.get("ArtifactName", ""),
             "artifact_type": data.get("ArtifactType", ""),
-            "targets_analyzed": len(results)
+            "targets_analyzed": targets_analyzed
         }
 
-        normalized["summary"]["severity_distribution"] = {
-            "critical": normalized["summary"]["critical"],
-            "high": normalized["summary"]["high"],
-            "medium": normalized["summary"]["medium"],
-            "low": normalized["summary"]["low"]
+    def _update_severity_distribution(self, summary: Dict[str, Any]) -> None:
+        summary["severity_distribution"] = {
+            "critical": summary["critical"],
+            "high": summary["high"],
+            "medium": summary["medium"],
+            "low": summary["low"]
         }
 
-        return normalized
-
     def _normalize_sonarqube(self, data: Dict[str, Any], normalized: Dict[str, Any]) -> Dict[str, Any]:
         """Normalisation SonarQube avec extraction recommandations et comptage centralisé."""
 
@@ -391,18 +763,20 @@ class ReportNormalizer:
         }
 
         normalized_issues_list = []
-
-        # Filtrer uniquement les issues 'OPEN'
-        open_issues = [issue for issue in detailed_issues if issue.get("status") == "OPEN"]
-
-        print(f" Issues totales brutes: {len(detailed_issues)}, Issues OPEN: {len(open_issues)}")
-
-        for issue in open_issues:
+        raw_issue_count = 0
+        open_issue_count = 0
+
+        # Filtrer uniquement les issues 'OPEN' (detailed_issues peut être un itérateur de pages, cf. sonar_collector.py)
+        for issue in detailed_issues:
+            raw_issue_count += 1
+            if issue.get("status") != "OPEN":
+                continue
+            open_issue_count += 1
             issue_type = issue.get("type", "").upper()
             severity_sonar = issue.get("severity", "").upper()
 
             # Déterminer la sévérité normalisée (ECS)
-            severity_ecs = severity_map.get(severity_sonar, "low")
+            severity_ecs = intern_value(severity_map.get(severity_sonar, "low"))
 
             # 1. Incrémentation des compteurs par TYPE
             if issue_type == "BUG":
@@ -440,7 +814,7 @@ class ReportNormalizer:
                 sonar_severity_counts["info"] += 1
 
             # 4. Création du document de vulnérabilité normalisé (pour le tableau 'vulnerabilities')
-            recommendation = self._extract_sonarqube_recommendation(issue)
+            recommendation = RECOMMENDATIONS.sonarqube(issue)
 
             # --- SonarQube-specific fields for unified ---
             is_vulnerability = (issue_type == "VULNERABILITY" or issue_type == "SECURITY_HOTSPOT")
@@ -452,28 +826,29 @@ class ReportNormalizer:
             location = f"{component_path}:{line_number}" if line_number else component_path
             # ---------------------------------------
 
-            normalized_vuln = {
+            issue_type_lower = intern_value(issue_type.lower())
+            normalized_vuln = SonarQubeFinding(
                 # ... (Les autres champs restent inchangés)
-                "id": issue.get("key", ""),
-                "title": issue.get("message", ""),
-                "severity": severity_ecs,
-                "original_severity": severity_sonar.lower(), # Ajout du niveau SonarQube (BLOCKER, CRITICAL)
-                "type": issue_type.lower(),
-                "component": issue.get("component", ""),
-                "line": issue.get("line", 0),
-                "status": issue.get("status", "OPEN"),
-                "resolution": issue.get("resolution", ""),
-                "debt": issue.get("debt", ""),
-                "tags": issue.get("tags", []),
-                "creation_date": issue.get("creationDate", None),
-                "update_date": issue.get("updateDate", None),
-                "mitigation_recommendation": recommendation
-            }
+                id=issue.get("key", ""),
+                title=issue.get("message", ""),
+                severity=severity_ecs,
+                original_severity=intern_value(severity_sonar.lower()), # Ajout du niveau SonarQube (BLOCKER, CRITICAL)
+                type=issue_type_lower,
+                component=issue.get("component", ""),
+                line=issue.get("line", 0),
+                status=intern_value(issue.get("status", "OPEN")),
+                resolution=issue.get("resolution", ""),
+                debt=issue.get("debt", ""),
+                tags=issue.get("tags", []),
+                creation_date=issue.get("creationDate", None),
+                update_date=issue.get("updateDate", None),
+                mitigation_recommendation=recommendation
+            )
 
             # INJECTION DU BLOC UNIFIED
-            normalized_vuln['unified'] = self._create_unified_block(
+            normalized_vuln.unified = self._create_unified_block(
                 tool_id=issue.get("key", f"sonarqube:unknown"),
-                tool_type=issue_type.lower(),
+                tool_type=issue_type_lower,
                 severity=severity_ecs,
                 score=self._get_severity_score(severity_ecs),
                 is_security_issue=is_security_issue,
@@ -492,6 +867,8 @@ class ReportNormalizer:
 
             normalized_issues_list.append(normalized_vuln)
 
+        print(f" Issues totales brutes: {raw_issue_count}, Issues OPEN: {open_issue_count}")
+
         # MISE À JOUR DU CHAMP SUMMARY
 
         # Total des failles comptées (Bugs + Vulnerabilities + Code Smells + Hotspots)
@@ -553,75 +930,6 @@ class ReportNormalizer:
 
         return normalized
 
-    # NOUVELLES FONCTIONS : EXTRACTION RECOMMANDATIONS
-
-    def _extract_snyk_recommendation(self, vuln: Dict[str, Any]) -> str:
-        """Extraire recommandation de mitigation depuis Snyk"""
-
-        # Priorité 1 : Upgrade path
-        if vuln.get("isUpgradable") and vuln.get("fixedIn"):
-            fixed_version = vuln["fixedIn"][0] if isinstance(vuln["fixedIn"], list) else vuln["fixedIn"]
-            pkg_name = vuln.get("packageName", "package")
-            return f"Upgrade {pkg_name} to version {fixed_version}"
-
-        # Priorité 2 : Patch disponible
-        if vuln.get("isPatchable"):
-            return "Apply available security patch"
-
-        # Priorité 3 : Description avec fix
-        description = vuln.get("description", "")
-        if "upgrade" in description.lower() or "update" in description.lower():
-            # Extraire première phrase avec upgrade/update
-            sentences = description.split('.')
-            for sentence in sentences:
-                if "upgrade" in sentence.lower() or "update" in sentence.lower():
-                    return sentence.strip()
-
-        # Fallback
-        return "Review Snyk security advisory for remediation steps"
-
-    def _extract_trivy_recommendation(self, vuln: Dict[str, Any]) -> str:
-        """Extraire recommandation de mitigation depuis Trivy"""
-
-        # Priorité 1 : Fixed version disponible
-        fixed_version = vuln.get("FixedVersion")
-        if fixed_version:
-            pkg_name = vuln.get("PkgName", "package")
-            return f"Update {pkg_name} to version {fixed_version} or later"
-
-        # Priorité 2 : Pas de fix disponible
-        pkg_name = vuln.get("PkgName", "package")
-        return f"No fix available yet for {pkg_name}. Monitor security advisories or consider alternative packages"
-
-    def _extract_sonarqube_recommendation(self, issue: Dict[str, Any]) -> str:
-        """Extraire recommandation de mitigation depuis SonarQube"""
-
-        issue_type = issue.get("type", "").upper()
-        message = issue.get("message", "")
-
-        # Pour code duplication
-        if "duplicat" in message.lower():
-            return "Refactor code to extract duplicated logic into reusable functions or utility classes"
-
-        # Pour bugs
-        if issue_type == "BUG":
-            return f"Fix bug: {message}. Review SonarQube rule documentation for detailed guidance"
-
-        # Pour vulnérabilités
-        if issue_type == "VULNERABILITY":
-            return f"Security issue: {message}. Apply secure coding practices as per SonarQube recommendations"
-
-        # Pour code smells
-        if issue_type == "CODE_SMELL":
-            return f"Improve code quality: {message}"
-
-        # Pour security hotspots
-        if issue_type == "SECURITY_HOTSPOT":
-            return f"Review security hotspot: {message}. Verify if this code path is exploitable"
-
-        # Fallback
-        return f"Review and fix: {message}"
-
     #NOUVELLE FONCTION : CALCUL MTTD SUR 7 JOURS GLISSANTS
 
     def _calculate_mttd(self, normalized: Dict[str, Any]) -> Dict[str, Any]:
@@ -692,20 +1000,63 @@ class ReportNormalizer:
 
         return normalized
 
+    def _calculate_rolling_mttd(self, normalized: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        metrics.mttd.<tool>.1d … 7d : l'échantillon du build (build_data) est ajouté
+        à la série locale, puis les moyennes glissantes sont lues jusqu'au jour du scan
+        """
+
+        build_data = normalized["metrics"]["mttd"].get("build_data", {})
+        scan_end_time = timestamp_ms(self.metadata.get("scan_end_time"))
+        if scan_end_time is None:
+            scan_end_time = int(datetime.now(timezone.utc).timestamp() * 1000)
+
+        if build_data.get("is_calculated"):
+            self.mttd_store.record(
+                str(self.metadata.get("build_id", "unknown")),
+                self.metadata.get("scan_type", "unknown"),
+                scan_end_time,
+                build_data["mttd_hours"],
+                build_data["total_scan_duration_hours"],
+                build_data["num_vulnerabilities"]
+            )
+
+        normalized["metrics"]["mttd"][self.tool] = self.mttd_store.windows(scan_end_time)
+        return normalized
+
     def _initialize_mttr(self, normalized: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Initialise la structure MTTR (sera calculé par le watcher auto-resolve)
+        Initialise la structure MTTR (calculé avec la base de cycle de vie, cf. _calculate_mttr)
         """
 
         normalized["metrics"]["mttr"] = {
             "sonarqube": None,
             "snyk": None,
             "trivy": None,
-            "note": "MTTR will be calculated by watcher when vulnerabilities are resolved"
+            "note": "MTTR is calculated when a lifecycle state directory is configured (--state-dir)"
         }
 
         return normalized
 
+    def _calculate_mttr(self, normalized: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        MTTR depuis la base de cycle de vie : les findings ouverts absents de ce
+        build sont clôturés (liste `resolved`, émise en documents resolved_finding par
+        split_reports.py) et metrics.mttr.<tool> est calculé.
+        """
+
+        resolved = self.lifecycle.close_build(normalized["@timestamp"])
+        summary = self.lifecycle.mttr_summary(resolved)
+
+        normalized["metrics"]["mttr"][self.tool] = summary
+        normalized["metrics"]["mttr"].pop("note", None)
+        normalized["resolved"] = resolved
+
+        print(f" Cycle de vie ({self.lifecycle.path}): {self.lifecycle.observed} findings suivis, "
+              f"{summary['resolved_count']} résolus, MTTR {summary['mttr_hours']} h")
+
+        return normalized
+
     # ========================================================================
     # FONCTIONS UTILITAIRES (PRÉSERVÉES)
     # ========================================================================
@@ -719,41 +1070,40 @@ class ReportNormalizer:
                               is_security_issue: bool, is_vulnerability: bool, category: str,
                               is_fixable: bool, fix_version: str, can_auto_upgrade: bool,
                               is_exploitable: bool, exploit_maturity: str, component: str,
-                              location: str, creation_time: Optional[str], current_time: str) -> Dict[str, Any]:
+                              location: str, creation_time: Optional[str], current_time: str) -> UnifiedBlock:
         """Crée le bloc 'unified' standardisé et sécurisé pour une vulnérabilité."""
 
-        # Ces champs proviennent de self.metadata (la seule source de vérité dans ce script)
-        assignee_email = self.metadata.get("git_author", "DevTeam")
-        service_name = self.metadata.get("service", "unknown")
+        unified = UnifiedBlock(
+            vulnerability_id=tool_id,
+            type=tool_type,
+            severity=intern_value(severity.lower()),
+            severity_score=round(float(score), 2),
+            is_security_issue=is_security_issue,
+            is_vulnerability=is_vulnerability,
+            category=category,
+            is_fixable=is_fixable,
+            has_fix_available=is_fixable,
+            fix_version=fix_version or '',
+            can_auto_upgrade=can_auto_upgrade,
+            is_exploitable=is_exploitable,
+            exploit_maturity=exploit_maturity,
+            component=component,
+            location=location,
+            assignee=self.assignee,
+            team=self.team,
+            status='open',
+            first_seen=creation_time or current_time,
+            last_seen=current_time,
+            # Date sentinelle (Époque UNIX)
+            resolution_date=SENTINEL_DATE,
+            age_days=0,
+            mttr_hours=0.0
+        )
 
-        # Définition de la date sentinelle (Époque UNIX)
-        DEFAULT_SENTINEL_DATE = "1970-01-01T00:00:00Z"
+        if self.lifecycle is not None:
+            self.lifecycle.observe(unified, current_time)
 
-        return {
-            'vulnerability_id': tool_id,
-            'type': tool_type,
-            'severity': severity.lower(),
-            'severity_score': round(float(score), 2),
-            'is_security_issue': is_security_issue,
-            'is_vulnerability': is_vulnerability,
-            'category': category,
-            'is_fixable': is_fixable,
-            'has_fix_available': is_fixable,
-            'fix_version': fix_version or '',
-            'can_auto_upgrade': can_auto_upgrade,
-            'is_exploitable': is_exploitable,
-            'exploit_maturity': exploit_maturity,
-            'component': component,
-            'location': location,
-            'assignee': assignee_email,
-            'team': f"{service_name}-team",
-            'status': 'open',
-            'first_seen': creation_time or current_time,
-            'last_seen': current_time,
-            'resolution_date': DEFAULT_SENTINEL_DATE,
-            'age_days': 0,
-            'mttr_hours': 0.0
-        }
+        return unified
 
 
     def _extract_tool_version(self, data: Dict[str, Any]) -> str:
@@ -764,18 +1114,29 @@ class ReportNormalizer:
             return str(data.get("SchemaVersion", "unknown"))
         elif self.tool == "sonarqube":
             return "9.9.8"
+        elif self.adapter is not None:
+            return self.adapter.tool_version(data)
         return "unknown"
 
     def _extract_cvss_score(self, vuln: Dict[str, Any]) -> float:
-        """Extrait le score CVSS depuis différents formats"""
-        if "CVSS" in vuln:
-            cvss_data = vuln["CVSS"]
-            if isinstance(cvss_data, dict):
-                for vendor in ["nvd", "redhat"]:
-                    if vendor in cvss_data:
-                        v3_score = cvss_data[vendor].get("V3Score")
-                        if v3_score:
-                            return float(v3_score)
+        """
+        Score CVSS v3 d'un finding Trivy : V3Score du fournisseur (nvd, redhat, puis
+        les autres), sinon score de base calculé depuis son V3Vector (cvss.py)
+        """
+        cvss_data = vuln.get("CVSS")
+        if isinstance(cvss_data, dict):
+            vendors = [vendor for vendor in ("nvd", "redhat") if vendor in cvss_data]
+            vendors += [vendor for vendor in cvss_data if vendor not in ("nvd", "redhat")]
+            for vendor in vendors:
+                vendor_data = cvss_data[vendor]
+                if not isinstance(vendor_data, dict):
+                    continue
+                v3_score = vendor_data.get("V3Score")
+                if v3_score:
+                    return float(v3_score)
+                vector_score = CVSS_SCORER.score(vendor_data.get("V3Vector"))
+                if vector_score:
+                    return vector_score
         return 0.0
 
 
@@ -792,14 +1153,17 @@ def save_normalized_report_atomic(data: Dict[str, Any], output_file: str) -> Non
 
     try:
         print(f" Écriture temporaire: {temp_file}")
-        with open(temp_file, 'w', encoding='utf-8') as f:
-            json_line = json.dumps(data, ensure_ascii=False)
-            f.write(json_line + "\n")
-            f.flush()
-            os.fsync(f.fileno())
+        with open(temp_file, 'wb') as f:
+            with perf.stage("serialize"):
+                f.write(CODEC.dumpb(data))
+                f.write(b"\n")
+            with perf.stage("fsync_rename"):
+                f.flush()
+                os.fsync(f.fileno())
 
         print(f" Renommage atomique: {temp_file} → {output_file}")
-        os.rename(temp_file, output_file)
+        with perf.stage("fsync_rename"):
+            os.rename(temp_file, output_file)
 
         print(f" Rapport normalisé sauvegardé: {output_file}")
 
@@ -813,22 +1177,282 @@ def save_normalized_report_atomic(data: Dict[str, Any], output_file: str) -> Non
         raise IOError(f" Erreur lors de la sauvegarde atomique: {e}")
 
 
+def save_normalized_report_stream(data: Dict[str, Any], findings: Union[Iterator[Dict[str, Any]], ArraySpool],
+                                   output_file: str) -> None:
+    """
+    Sauvegarde atomique en flux (mode --stream)
+
+    1. Sérialiser chaque finding dans un spool disque au fil du générateur
+       (ou réutiliser un spool déjà rempli, cf. save_fused_report)
+    2. Écrire le rapport dans .tmp en recopiant le spool à la place de `vulnerabilities`
+    3. Renommer atomiquement
+
+    Le fichier produit a le même format que save_normalized_report_atomic.
+    """
+    output_dir = os.path.dirname(output_file)
+    os.makedirs(output_dir, exist_ok=True)
+
+    temp_file = output_file + '.tmp'
+
+    try:
+        if isinstance(findings, ArraySpool):
+            spool = findings
+        else:
+            spool = ArraySpool(output_dir)
+            # Temps exclusif : la normalisation tirée par la boucle est comptée à part
+            with perf.stage("serialize"):
+                for finding in findings:
+                    spool.append(finding)
+            print(f" {spool.count} findings normalisés en flux")
+
+        try:
+            print(f" Écriture temporaire: {temp_file}")
+            with open(temp_file, 'wb') as f:
+                with perf.stage("serialize"):
+                    dump_object_with_array(data, "vulnerabilities", spool, f)
+                    f.write(b"\n")
+                with perf.stage("fsync_rename"):
+                    f.flush()
+                    os.fsync(f.fileno())
+        finally:
+            if spool is not findings:
+                spool.close()
+
+        print(f" Renommage atomique: {temp_file} → {output_file}")
+        with perf.stage("fsync_rename"):
+            os.rename(temp_file, output_file)
+
+        print(f" Rapport normalisé sauvegardé: {output_file}")
+
+    except Exception as e:
+        if os.path.exists(temp_file):
+            try:
+                os.remove(temp_file)
+                print(f" Fichier temporaire supprimé après erreur")
+            except:
+                pass
+        raise IOError(f" Erreur lors de la sauvegarde atomique: {e}")
+
+
+def save_fused_report(data: Dict[str, Any], findings: Iterator[Dict[str, Any]],
+                      split_output: Optional[str], normalized_output: Optional[str] = None,
+                      sink=None, delta=None, dictionary: Optional[ReferenceDictionary] = None,
+                      projection: Optional[FieldProjection] = None, lean_parent: bool = False) -> int:
+    """
+    Mode fusionné normalize+split : écrit directement le NDJSON (findings aplatis
+    puis parent vulnerability_report), sans relire le rapport normalisé.
+
+    `findings` provient de normalize_stream (ou de la liste du rapport en mémoire).
+    Le JSON normalisé intermédiaire n'est écrit que si `normalized_output` est fourni,
+    à partir du même spool que le parent. `sink` remplace le fichier `split_output`
+    (ex: es_bulk.BulkSink), `delta` active le mode delta (delta.DeltaTracker),
+    `dictionary` l'encodage des références (ref_dictionary.ReferenceDictionary),
+    `projection` et `lean_parent` la forme des documents (projection.py) : le parent
+    allégé ne relit pas le spool, qui n'est tenu que pour le JSON normalisé.
+    Retourne le nombre de documents écrits.
+    """
+    output_dir = os.path.dirname(split_output or normalized_output or "")
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    report_id = report_document_id(data)
+
+    if sink is None:
+        sink = NdjsonFileSink(split_output)
+    sink.bind_report(data)
+
+    if lean_parent and not normalized_output:
+        return write_documents(iter_documents_from_findings(data, findings, report_id, None, delta, dictionary,
+                                                            projection, lean_parent), sink)
+
+    with ArraySpool(output_dir) as spool:
+        count = write_documents(iter_documents_from_findings(data, findings, report_id, spool, delta, dictionary,
+                                                             projection, lean_parent), sink)
+
+        if normalized_output:
+            save_normalized_report_stream(data, spool, normalized_output)
+
+    return count
+
+
+def run_normalization(input_file: str, output_file: str, tool: str, metadata: Dict[str, Any],
+                      stream: bool = False, split_output: Optional[str] = None,
+                      skip_normalized: bool = False, sink=None,
+                      delta_previous: Optional[str] = None, state_dir: Optional[str] = None,
+                      dedup: bool = False, cache: Optional[NormalizationCache] = None,
+                      shard_options: Optional[Dict[str, Any]] = None,
+                      ref_dictionary: bool = False, projection: Optional[str] = None,
+                      lean_parent: bool = False, raw_data: Optional[Dict[str, Any]] = None,
+                      rollups: bool = False) -> Dict[str, Any]:
+    """
+    Enchaîne lecture, normalisation et écriture(s) pour un rapport.
+    Utilisé par main() et par le pilote batch (batch_normalize.py).
+    `sink` : sortie des documents à la place du fichier `split_output`.
+    `delta_previous` : mode delta, rapport normalisé du build précédent ("auto" : déduit de output_file).
+    `state_dir` : répertoire de la base de cycle de vie des findings (lifecycle_store.py).
+    `dedup` : fusion des doublons CVE/paquet/version (dedup.py).
+    `cache` : cache de normalisation (norm_cache.py), consulté avant toute lecture du rapport.
+    `shard_options` : `split_output` écrit en shards (shard_sink.ShardedNdjsonSink).
+    `ref_dictionary` : documents findings encodés par dictionnaire (ref_dictionary.py).
+    `projection` : fichier de règles des champs émis, `lean_parent` : parent allégé (projection.py).
+    `raw_data` : rapport brut déjà construit (sonar_collector.py) ; input_file n'est pas lu,
+    ni cache ni lecture en flux.
+    `rollups` : tables d'agrégats dans le rapport, documents vulnerability_rollup (rollups.py).
+    Retourne le rapport normalisé (sans `vulnerabilities` en mode stream).
+    """
+    if lean_parent and not state_dir:
+        raise ValueError(LEAN_PARENT_ERROR)
+    normalizer = ReportNormalizer(tool, metadata, state_dir, dedup, cache, rollups)
+    normalized_output = None if skip_normalized else output_file
+    if sink is None and split_output and shard_options:
+        sink = ShardedNdjsonSink(split_output, **shard_options)
+    delta = None
+    if delta_previous:
+        delta = DeltaTracker(normalizer.tool, resolve_previous_report(delta_previous, output_file))
+    dictionary = ReferenceDictionary() if ref_dictionary else None
+    field_projection = load_projection(projection, normalizer.tool)
+
+    if raw_data is not None:
+        stream = False
+        cache = None
+    else:
+        perf.count("input_bytes", os.path.getsize(input_file))
+    cached = None
+    if cache is not None:
+        with perf.stage("cache"):
+            normalizer.cache_key = cache.make_key(input_file, normalizer.cache_signature())
+            cached = cache.lookup(normalizer.cache_key)
+        if cached is not None:
+            print(f" Rapport inchangé, findings normalisés repris du cache ({normalizer.cache_key[:12]})")
+            normalizer.cache_key = None
+
+    try:
+        if stream:
+            if cached is not None:
+                normalized_data, findings = normalizer.normalize_cached(cached, input_file)
+            else:
+                print(f" Lecture en flux du rapport: {input_file}")
+                print(f" Normalisation avec l'outil: {tool}")
+                normalized_data, findings = normalizer.normalize_stream(input_file)
+            if split_output or sink is not None:
+                save_fused_report(normalized_data, findings, split_output, normalized_output, sink, delta,
+                                  dictionary, field_projection, lean_parent)
+            else:
+                save_normalized_report_stream(normalized_data, findings, output_file)
+            return normalized_data
+
+        if cached is not None:
+            normalized_data, findings = normalizer.normalize_cached(cached, input_file)
+            normalized_data["vulnerabilities"] = list(findings)
+        elif raw_data is not None:
+            print(f" Normalisation avec l'outil: {tool} (rapport collecté)")
+            normalized_data = normalizer.normalize(raw_data)
+        else:
+            print(f" Lecture du rapport: {input_file}")
+            raw_data = normalizer.load_raw_report(input_file)
+
+            print(f" Normalisation avec l'outil: {tool}")
+            normalized_data = normalizer.normalize(raw_data)
+    finally:
+        if cache is not None:
+            cache.evict()
+            cache.report()
+
+    if normalized_output:
+        save_normalized_report_atomic(normalized_data, normalized_output)
+    if split_output or sink is not None:
+        if sink is None:
+            os.makedirs(os.path.dirname(split_output), exist_ok=True)
+            sink = NdjsonFileSink(split_output)
+        sink.bind_report(normalized_data)
+        write_documents(iter_split_documents(normalized_data, report_document_id(normalized_data), delta, dictionary,
+                                             field_projection, lean_parent), sink)
+
+    return normalized_data
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="normalize-reports.py",
+        usage="python3 normalize-reports.py <input|-> <output> <tool> <metadata_json> [options]",
+        epilog='Exemple:\n  python3 normalize-reports.py input.json output.json snyk \'{"build_id":"123"}\'',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("input_file")
+    parser.add_argument("output_file")
+    parser.add_argument("tool")
+    parser.add_argument("metadata_json")
+    parser.add_argument("--stream", action="store_true",
+                        help="Lecture/écriture en flux (mémoire constante, Snyk/Trivy)")
+    parser.add_argument("--split-output", metavar="NDJSON",
+                        help="Mode fusionné : écrit aussi le NDJSON parent/findings (remplace split_reports.py)")
+    parser.add_argument("--skip-normalized", action="store_true",
+                        help="Avec --split-output/--es-url : ne pas écrire le JSON normalisé intermédiaire")
+    parser.add_argument("--delta-previous", metavar="JSON|auto",
+                        help="Mode delta : n'émettre que les findings nouveaux/corrigés par rapport à ce rapport "
+                             "normalisé (auto : même fichier dans le build précédent)")
+    parser.add_argument("--state-dir", default=default_state_dir(),
+                        help="Base de cycle de vie des findings : first_seen, age_days, résolutions et MTTR "
+                             "(défaut: $NORMALIZER_STATE_DIR, désactivé si vide)")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Fusionner les findings CVE/paquet/version en double (Snyk/Trivy : sources, targets)")
+    parser.add_argument("--cache-dir", default=default_cache_dir(),
+                        help="Cache de normalisation des rapports inchangés (défaut: $NORMALIZER_CACHE_DIR)")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_MB,
+                        help=f"Taille maximale du cache, éviction LRU (défaut: {DEFAULT_MAX_MB})")
+    add_dictionary_argument(parser)
+    add_rollup_argument(parser)
+    add_projection_arguments(parser)
+    add_shard_arguments(parser)
+    add_bulk_arguments(parser)
+    add_collector_arguments(parser)
+    perf.add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.sonar_project:
+        if args.tool.lower() != "sonarqube" or args.input_file != "-":
+            parser.error("--sonar-project s'utilise avec l'entrée `-` et l'outil sonarqube")
+        if not args.sonar_url:
+            parser.error("--sonar-project nécessite --sonar-url ou $SONAR_HOST_URL")
+    elif args.save_raw:
+        parser.error("--save-raw s'utilise avec --sonar-project")
+    if args.skip_normalized and not (args.split_output or args.es_url):
+        parser.error("--skip-normalized nécessite --split-output ou --es-url")
+    if args.split_output and args.es_url:
+        # Filebeat indexerait une deuxième fois le NDJSON
+        parser.error("--split-output et --es-url sont incompatibles")
+    if args.delta_previous and not (args.split_output or args.es_url):
+        parser.error("--delta-previous nécessite --split-output ou --es-url")
+    if args.delta_previous and args.skip_normalized:
+        # Le JSON normalisé du build courant sert de référence au build suivant
+        parser.error("--delta-previous est incompatible avec --skip-normalized")
+    if args.ref_dictionary and not (args.split_output or args.es_url):
+        parser.error("--ref-dictionary nécessite --split-output ou --es-url")
+    if (args.lean_parent or args.projection) and not (args.split_output or args.es_url):
+        parser.error("--lean-parent/--projection nécessitent --split-output ou --es-url")
+    check_lean_parent(parser, args)
+    if args.projection:
+        try:
+            load_projection(args.projection, args.tool)
+        except (OSError, ValueError) as e:
+            parser.error(f"--projection : {e}")
+    if shard_options_from_args(args) and not args.split_output:
+        parser.error("--shard-docs/--shard-mb/--gzip nécessitent --split-output")
+    return args
+
+
 def main():
     """Point d'entrée du script"""
 
-    if len(sys.argv) < 5:
-        print("Usage: python3 normalize-reports.py <input> <output> <tool> <metadata_json>")
-        print("\nExemple:")
-        print('  python3 normalize-reports.py input.json output.json snyk \'{"build_id":"123"}\'')
-        sys.exit(1)
+    args = parse_args(sys.argv[1:])
 
-    input_file = sys.argv[1]
-    output_file = sys.argv[2]
-    tool = sys.argv[3]
-    metadata_json = sys.argv[4]
+    input_file = args.input_file
+    output_file = args.output_file
+    tool = args.tool
+    metadata_json = args.metadata_json
 
     try:
-        if not os.path.exists(input_file):
+        collector = collector_from_args(args)
+        if collector is None and not os.path.exists(input_file):
             print(f" Fichier d'entrée introuvable: {input_file}")
             sys.exit(1)
 
@@ -838,19 +1462,37 @@ def main():
             print(f" JSON métadonnées invalide: {e}")
             sys.exit(1)
 
-        print(f" Lecture du rapport: {input_file}")
-        with open(input_file, 'r', encoding='utf-8') as f:
-            raw_data = json.load(f)
-
-        print(f" Normalisation avec l'outil: {tool}")
-        normalizer = ReportNormalizer(tool, metadata)
-        normalized_data = normalizer.normalize(raw_data)
+        if args.profile:
+            perf.start("normalize-reports", args.profile_cpu, args.profile_memory)
+
+        bulk_sink = sink_from_args(args)
+        normalized_data = run_normalization(
+            input_file, output_file, tool, metadata,
+            stream=args.stream,
+            split_output=args.split_output,
+            skip_normalized=args.skip_normalized,
+            sink=bulk_sink,
+            delta_previous=args.delta_previous,
+            state_dir=args.state_dir,
+            dedup=args.dedup,
+            cache=NormalizationCache(args.cache_dir, args.cache_max_mb) if args.cache_dir else None,
+            shard_options=shard_options_from_args(args),
+            ref_dictionary=args.ref_dictionary,
+            projection=args.projection,
+            lean_parent=args.lean_parent,
+            raw_data=collector.collect_report(args.sonar_project_name) if collector is not None else None,
+            rollups=args.rollups
+        )
 
-        save_normalized_report_atomic(normalized_data, output_file)
+        if args.profile:
+            mode = ("stream" if args.stream else "memory") + ("+split" if args.split_output or args.es_url else "")
+            perf.finish(normalized_data, output_file, mode)
 
         # Statistiques
         print(f"\n Statistiques:")
         print(f"  • Vulnérabilités détectées: {normalized_data['summary']['total_vulnerabilities']}")
+        if "raw_total_vulnerabilities" in normalized_data['summary']:
+            print(f"  • Avant déduplication: {normalized_data['summary']['raw_total_vulnerabilities']}")
         print(f"  • Critical: {normalized_data['summary']['critical']}")
         print(f"  • High: {normalized_data['summary']['high']}")
         print(f"  • Medium: {normalized_data['summary']['medium']}")
@@ -859,6 +1501,14 @@ def main():
         if normalized_data['metrics']['mttd'].get('current_build', {}).get('is_calculated'):
             mttd_hours = normalized_data['metrics']['mttd']['current_build']['mttd_hours']
             print(f"  • MTTD: {mttd_hours} heures")
+        rolling = normalized_data['metrics']['mttd'].get(normalized_data['metadata']['tool'])
+        if rolling:
+            print(f"  • MTTD 7 jours glissants: {rolling['7d']['mttd_hours']} heures/vulnérabilité "
+                  f"({rolling['7d']['builds']} builds)")
+
+        if bulk_sink is not None and bulk_sink.failed:
+            print(f"\n Documents rejetés par Elasticsearch: {bulk_sink.sent - bulk_sink.indexed}")
+            sys.exit(1)
 
         print(f"\n Normalisation terminée avec succès")
         sys.exit(0)
@@ -0,0 +1,585 @@
+#!/usr/bin/env python3
+"""
+Service résident de normalisation : surveille /shared et traite les rapports déposés
+
+Chaque stage Jenkins paie le démarrage de l'interpréteur et l'import des modules
+(normalisation, puis découpage), et un rapport attend le `sh` suivant pour être
+traité. Le démon reste en mémoire : les rapports déposés dans
+
+    <root>/build-*/<tool>/scans/<tool>-<service>[-<scan_type>]-raw.json
+
+sont mis en file puis normalisés et découpés (cf. batch_normalize.process_report)
+par un pool de workers déjà chargés. Le *-split.ndjson est écrit de façon
+atomique (.tmp → rename), Filebeat le prend au passage.
+
+Dépôt côté Jenkins : écrire le rapport brut, PUIS la sidecar de métadonnées
+<tool>-<service>[-<scan_type>]-metadata.json. La sidecar marque le rapport comme
+complet ; sans elle le rapport est ignoré (les stages actuels, qui nomment leurs
+métadonnées autrement, ne sont donc pas concernés).
+
+- Surveillance inotify (Linux, via ctypes), repli en scrutation périodique
+  (--poll, volume réseau, limite max_user_watches atteinte)
+- Rescan complet au démarrage puis toutes les --rescan-interval secondes :
+  un rapport dont le *-split.ndjson est plus récent que le brut et la sidecar
+  est déjà traité
+- File bornée (--max-queue) : au-delà, le rapport est laissé sur disque et
+  repris par le rescan suivant
+- État dans un fichier JSON (--status-file), réécrit atomiquement ;
+  `--check` l'utilise comme healthcheck (code 0 si le démon tourne)
+- SIGTERM/SIGINT : plus de nouveaux rapports, attente des rapports en cours
+  (--drain-timeout), un second signal interrompt l'attente
+
+Usage:
+    python3 normalizer_daemon.py [/shared] [--workers N] [--max-queue 64] [--poll]
+                                 [--stream] [--delta] [--dedup] [--cleanup]
+                                 [--cache-dir DIR] [--state-dir DIR] [--profile]
+    python3 normalizer_daemon.py [/shared] --check [--max-age 60]
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import json
+import multiprocessing
+import os
+import select
+import signal
+import struct
+import sys
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import batch_normalize
+from batch_normalize import RAW_SUFFIX, METADATA_SUFFIX
+from ref_dictionary import add_dictionary_argument
+from rollups import add_rollup_argument
+from projection import add_projection_arguments, check_lean_parent
+import perf
+
+SPLIT_SUFFIX = "-split.ndjson"
+STATUS_DIR = ".normalizer-daemon"
+RECENT_RESULTS = 20
+
+# Profondeur des répertoires surveillés : <root>/build-*/<tool>/scans
+BUILD_LEVEL, TOOL_LEVEL, SCANS_LEVEL = 1, 2, 3
+
+# inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_ONLYDIR
+_EVENT = struct.Struct("iIII")
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _dir_matches(level: int, name: str) -> bool:
+    if level == BUILD_LEVEL:
+        return name.startswith("build-")
+    if level == SCANS_LEVEL:
+        return name == "scans"
+    return level == TOOL_LEVEL and not name.startswith(".")
+
+
+def raw_path_for(path: str) -> Optional[str]:
+    """Rapport brut correspondant à un fichier déposé (brut ou sidecar), None pour les autres fichiers"""
+    scans_dir, name = os.path.split(path)
+    tool_dir = os.path.dirname(scans_dir)
+    tool = os.path.basename(tool_dir)
+    if os.path.basename(scans_dir) != "scans" or not name.startswith(f"{tool}-"):
+        return None
+    if not os.path.basename(os.path.dirname(tool_dir)).startswith("build-"):
+        return None
+    if name.endswith(RAW_SUFFIX):
+        return path
+    if name.endswith(METADATA_SUFFIX):
+        return os.path.join(scans_dir, name[:-len(METADATA_SUFFIX)] + RAW_SUFFIX)
+    return None
+
+
+def scan_reports(root: str, level: int = 0) -> List[str]:
+    """Rapports bruts présents sous root (root étant au niveau `level` de l'arborescence)"""
+    found = []
+    try:
+        entries = sorted(os.scandir(root), key=lambda entry: entry.name)
+    except OSError:
+        return found
+    for entry in entries:
+        if level == SCANS_LEVEL:
+            if entry.name.endswith(RAW_SUFFIX) and raw_path_for(entry.path):
+                found.append(entry.path)
+        elif entry.is_dir() and _dir_matches(level + 1, entry.name):
+            found.extend(scan_reports(entry.path, level + 1))
+    return found
+
+
+class PollingWatcher:
+    """Pas d'évènements : le démon rescanne toutes les --poll-interval secondes"""
+
+    name = "polling"
+
+    def wait(self, timeout: float) -> Tuple[List[str], bool]:
+        time.sleep(timeout)
+        return [], False
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """
+    inotify sur <root>, build-*, <tool> et scans (une surveillance par répertoire).
+    Les répertoires créés ensuite sont surveillés à leur apparition ; les rapports
+    qu'ils contiennent déjà sont retournés avec les évènements.
+    """
+
+    name = "inotify"
+
+    def __init__(self, root: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+        self.watches: Dict[int, Tuple[str, int]] = {}
+        try:
+            self.watch_tree(root, 0)
+        except OSError:
+            self.close()
+            raise
+
+    def _watch(self, path: str, level: int) -> bool:
+        wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            if code in (errno.ENOENT, errno.ENOTDIR):
+                return False
+            raise OSError(code, os.strerror(code), path)
+        self.watches[wd] = (path, level)
+        return True
+
+    def watch_tree(self, path: str, level: int) -> List[str]:
+        """Surveille path et ses sous-répertoires utiles, retourne les rapports déjà présents"""
+        # Surveillance posée avant le parcours : rien de ce qui est créé entre-temps n'est perdu
+        if not self._watch(path, level):
+            return []
+        if level == SCANS_LEVEL:
+            return scan_reports(path, level)
+        found = []
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return found
+        for entry in entries:
+            if entry.is_dir() and _dir_matches(level + 1, entry.name):
+                found.extend(self.watch_tree(entry.path, level + 1))
+        return found
+
+    def wait(self, timeout: float) -> Tuple[List[str], bool]:
+        """Fichiers déposés depuis le dernier appel, et True si un rescan complet est nécessaire"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return [], False
+        paths, rescan = [], False
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+                name = os.fsdecode(data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0"))
+                offset += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    rescan = True
+                    continue
+                if mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                    continue
+                if wd not in self.watches:
+                    continue
+                parent, level = self.watches[wd]
+                path = os.path.join(parent, name)
+                if mask & IN_ISDIR:
+                    if level < SCANS_LEVEL and _dir_matches(level + 1, name):
+                        try:
+                            paths.extend(self.watch_tree(path, level + 1))
+                        except OSError as e:
+                            # ENOSPC (max_user_watches) : le rescan périodique prend le relais
+                            print(f" Surveillance impossible de {path}: {e}", flush=True)
+                            rescan = True
+                elif level == SCANS_LEVEL and mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    # IN_CREATE d'un fichier : contenu pas encore écrit
+                    paths.append(path)
+        return paths, rescan
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def _init_worker() -> None:
+    """Worker du pool : modules de normalisation chargés une fois pour toute la vie du démon"""
+    # Ctrl-C reçu par le groupe de processus : c'est le démon qui décide de l'arrêt
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    batch_normalize.load_normalizer()
+
+
+class NormalizerDaemon:
+    def __init__(self, root: str, workers: int, max_queue: int, status_file: str,
+                 job_options: Dict[str, Any], rescan_interval: float = 60.0, poll: bool = False,
+                 poll_interval: float = 2.0, cleanup: bool = False, drain_timeout: float = 120.0):
+        self.root = os.path.abspath(root)
+        self.workers = workers
+        self.max_queue = max_queue
+        self.status_file = status_file
+        self.job_options = job_options
+        self.rescan_interval = rescan_interval
+        self.cleanup = cleanup
+        self.drain_timeout = drain_timeout
+        self.poll = poll
+        self.poll_interval = poll_interval
+
+        self.pending: deque = deque()
+        self.queued = set()
+        self.running: Dict[str, Tuple[Any, Tuple[int, ...], float]] = {}
+        self.failed: Dict[str, Tuple[int, ...]] = {}
+        self.recent: deque = deque(maxlen=RECENT_RESULTS)
+        self.backlog = False
+        self.counters = {"processed": 0, "failed": 0, "deferred": 0, "findings": 0}
+
+        self.state = "starting"
+        self.started_at = _now_iso()
+        self.stop_requests = 0
+        self.watcher = None
+        self.pool = None
+        self._status_written = 0.0
+
+    # --- Détection des rapports ---
+
+    @staticmethod
+    def _signature(raw: str) -> Optional[Tuple[int, ...]]:
+        """(mtime, taille) du brut et mtime de la sidecar, None si le rapport n'est pas complet"""
+        try:
+            raw_stat = os.stat(raw)
+            sidecar_stat = os.stat(raw[:-len(RAW_SUFFIX)] + METADATA_SUFFIX)
+        except OSError:
+            return None
+        return raw_stat.st_mtime_ns, raw_stat.st_size, sidecar_stat.st_mtime_ns
+
+    @staticmethod
+    def _is_done(raw: str, signature: Tuple[int, ...]) -> bool:
+        try:
+            split_mtime = os.stat(raw[:-len(RAW_SUFFIX)] + SPLIT_SUFFIX).st_mtime_ns
+        except OSError:
+            return False
+        return split_mtime >= max(signature[0], signature[2])
+
+    def consider(self, path: str) -> None:
+        """Met en file le rapport correspondant à path s'il est complet et pas encore traité"""
+        raw = raw_path_for(path)
+        if raw is None or raw in self.queued or raw in self.running:
+            return
+        signature = self._signature(raw)
+        if signature is None or self.failed.get(raw) == signature or self._is_done(raw, signature):
+            return
+        if len(self.pending) >= self.max_queue:
+            # Laissé sur disque : repris par un rescan quand la file aura désempli
+            self.counters["deferred"] += 1
+            self.backlog = True
+            return
+        self.pending.append(raw)
+        self.queued.add(raw)
+
+    def rescan(self) -> None:
+        self.backlog = False
+        for raw in scan_reports(self.root):
+            self.consider(raw)
+
+    # --- Pool de workers ---
+
+    def _new_pool(self) -> None:
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+
+    def _job_for(self, raw: str) -> Optional[Dict[str, Any]]:
+        scans_dir = os.path.dirname(raw)
+        build_dir = os.path.dirname(os.path.dirname(scans_dir))
+        tool = os.path.basename(os.path.dirname(scans_dir))
+        try:
+            entry = batch_normalize.report_entry(build_dir, tool, os.path.basename(raw))
+        except (OSError, ValueError) as e:
+            # Sidecar en cours d'écriture ou invalide : réexaminée à sa prochaine modification
+            print(f" Métadonnées illisibles pour {raw}: {e}", flush=True)
+            return None
+        return batch_normalize.build_jobs(build_dir, [entry], **self.job_options)[0]
+
+    def dispatch(self) -> None:
+        while self.pending and len(self.running) < self.workers:
+            raw = self.pending.popleft()
+            self.queued.discard(raw)
+            signature = self._signature(raw)
+            if signature is None:
+                continue
+            job = self._job_for(raw)
+            if job is None:
+                continue
+            try:
+                future = self.pool.submit(batch_normalize.process_report, job)
+            except BrokenProcessPool:
+                self._new_pool()
+                future = self.pool.submit(batch_normalize.process_report, job)
+            self.running[raw] = (future, signature, time.monotonic())
+
+    def reap(self) -> None:
+        for raw, (future, signature, started) in list(self.running.items()):
+            if not future.done():
+                continue
+            del self.running[raw]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Worker tué (OOM...) : le pool est inutilisable, on en recrée un
+                result = {"tool": "?", "service": "?", "scan_type": "?", "input_file": raw,
+                          "status": "error", "error": f"{type(e).__name__}: {e}",
+                          "duration_ms": round((time.monotonic() - started) * 1000, 1),
+                          "log": traceback.format_exc()}
+                if isinstance(e, BrokenProcessPool):
+                    self._new_pool()
+            self._record(raw, signature, result)
+
+    def _record(self, raw: str, signature: Tuple[int, ...], result: Dict[str, Any]) -> None:
+        label = f"{result['tool']}/{result['service']}/{result['scan_type']}"
+        entry = {key: result[key] for key in ("tool", "service", "scan_type", "status", "duration_ms")}
+        entry["build_id"] = batch_normalize.build_id_from_dir(os.path.dirname(os.path.dirname(os.path.dirname(raw))))
+        entry["finished_at"] = _now_iso()
+        if result["status"] == "ok":
+            self.counters["processed"] += 1
+            self.counters["findings"] += result.get("total_vulnerabilities", 0)
+            self.failed.pop(raw, None)
+            entry["split_output"] = result["split_output"]
+            entry["total_vulnerabilities"] = result.get("total_vulnerabilities", 0)
+            print(f" [OK] {label} build {entry['build_id']} ({result['duration_ms']} ms, "
+                  f"{entry['total_vulnerabilities']} findings)", flush=True)
+            if self.cleanup and self._signature(raw) == signature:
+                for path in (raw, raw[:-len(RAW_SUFFIX)] + METADATA_SUFFIX):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+        else:
+            # Pas de nouvelle tentative tant que le brut ou la sidecar ne change pas
+            self.counters["failed"] += 1
+            self.failed[raw] = signature
+            entry["error"] = result.get("error")
+            print(f" [ÉCHEC] {label} ({raw}): {entry['error']}", flush=True)
+            print(result.get("log", "").rstrip(), flush=True)
+        self.recent.appendleft(entry)
+
+    # --- État ---
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "state": self.state,
+            "root": self.root,
+            "watcher": self.watcher.name if self.watcher else None,
+            "started_at": self.started_at,
+            "updated_at": _now_iso(),
+            "heartbeat": time.time(),
+            "queue": {
+                "depth": len(self.pending),
+                "max": self.max_queue,
+                "in_flight": len(self.running),
+                "workers": self.workers,
+                "backlog": self.backlog
+            },
+            "totals": dict(self.counters),
+            "running": sorted(self.running),
+            "recent": list(self.recent)
+        }
+
+    def write_status(self) -> None:
+        """Écriture atomique (.tmp → rename) : un lecteur ne voit jamais un état partiel"""
+        os.makedirs(os.path.dirname(self.status_file) or ".", exist_ok=True)
+        temp_file = f"{self.status_file}.{os.getpid()}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(self.status(), f, indent=2, ensure_ascii=False)
+        os.replace(temp_file, self.status_file)
+        self._status_written = time.monotonic()
+
+    # --- Boucle principale ---
+
+    def _request_stop(self, signum, frame) -> None:
+        self.stop_requests += 1
+        if self.stop_requests == 1:
+            print(f" Signal {signal.Signals(signum).name} reçu : arrêt après les rapports en cours", flush=True)
+        else:
+            print(" Second signal : arrêt immédiat", flush=True)
+
+    def _open_watcher(self):
+        if not self.poll:
+            try:
+                return InotifyWatcher(self.root)
+            except (OSError, AttributeError) as e:
+                print(f" inotify indisponible ({e}), repli en scrutation", flush=True)
+        self.poll = True
+        self.rescan_interval = self.poll_interval
+        return PollingWatcher()
+
+    def run(self, status_interval: float = 5.0) -> None:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        os.makedirs(self.root, exist_ok=True)
+        self.watcher = self._open_watcher()
+        self._new_pool()
+        self.state = "running"
+        print(f" Démon de normalisation : {self.root} ({self.watcher.name}, "
+              f"{self.workers} worker(s), file max {self.max_queue})", flush=True)
+
+        self.rescan()
+        last_rescan = time.monotonic()
+        self.write_status()
+        while not self.stop_requests:
+            paths, rescan = self.watcher.wait(0.2 if self.running else 0.5)
+            for path in paths:
+                self.consider(path)
+            now = time.monotonic()
+            if (rescan or now - last_rescan >= self.rescan_interval
+                    or (self.backlog and len(self.pending) <= self.max_queue // 2)):
+                self.rescan()
+                last_rescan = now
+            self.reap()
+            self.dispatch()
+            if now - self._status_written >= status_interval:
+                self.write_status()
+        self.drain()
+
+    def drain(self) -> None:
+        self.state = "draining"
+        dropped = len(self.pending)
+        self.pending.clear()
+        self.queued.clear()
+        if dropped:
+            print(f" {dropped} rapport(s) en file laissés sur disque (repris au redémarrage)", flush=True)
+        self.write_status()
+
+        deadline = time.monotonic() + self.drain_timeout
+        while self.running and self.stop_requests < 2 and time.monotonic() < deadline:
+            time.sleep(0.2)
+            self.reap()
+        if self.running:
+            print(f" {len(self.running)} rapport(s) interrompus (sorties .tmp non publiées)", flush=True)
+            for child in multiprocessing.active_children():
+                child.terminate()
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.running.clear()
+        else:
+            self.pool.shutdown(wait=True)
+        self.watcher.close()
+        self.state = "stopped"
+        self.write_status()
+        print(f" Démon arrêté : {self.counters['processed']} rapport(s) traités, "
+              f"{self.counters['failed']} échec(s)", flush=True)
+
+
+def check_status(status_file: str, max_age: float) -> int:
+    """Healthcheck : 0 si le démon tourne et a écrit son état depuis moins de max_age secondes"""
+    try:
+        with open(status_file, "r", encoding="utf-8") as f:
+            status = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f" État illisible ({status_file}): {e}")
+        return 1
+    age = time.time() - status.get("heartbeat", 0)
+    queue = status.get("queue", {})
+    totals = status.get("totals", {})
+    print(f" {status.get('state')} (pid {status.get('pid')}, {status.get('watcher')}), "
+          f"file {queue.get('depth')}/{queue.get('max')}, en cours {queue.get('in_flight')}, "
+          f"traités {totals.get('processed')}, échecs {totals.get('failed')}, dernier état il y a {age:.0f} s")
+    return 0 if status.get("state") == "running" and age <= max_age else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service résident de normalisation des rapports déposés")
+    parser.add_argument("root", nargs="?", default=os.environ.get("REPORTS_DIR", "/shared"),
+                        help="Répertoire surveillé, contenant les build-* (défaut: $REPORTS_DIR ou /shared)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Taille du pool (défaut: nb de CPU)")
+    parser.add_argument("--max-queue", type=int, default=64, help="Rapports en attente au maximum")
+    parser.add_argument("--poll", action="store_true", help="Scrutation périodique au lieu d'inotify")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Période de scrutation (s) avec --poll")
+    parser.add_argument("--rescan-interval", type=float, default=60.0,
+                        help="Rescan complet de filet de sécurité avec inotify (s)")
+    parser.add_argument("--status-file", help=f"Fichier d'état (défaut: <root>/{STATUS_DIR}/status.json)")
+    parser.add_argument("--status-interval", type=float, default=5.0, help="Période de réécriture de l'état (s)")
+    parser.add_argument("--drain-timeout", type=float, default=120.0,
+                        help="Attente maximale des rapports en cours à l'arrêt (s)")
+    parser.add_argument("--check", action="store_true", help="Lire l'état du démon et sortir (healthcheck)")
+    parser.add_argument("--max-age", type=float, default=60.0, help="Âge maximal de l'état pour --check (s)")
+    parser.add_argument("--metadata", default="{}", help="Métadonnées communes (environment...) en JSON")
+    parser.add_argument("--stream", action="store_true", help="Lecture/écriture en flux")
+    parser.add_argument("--delta", action="store_true",
+                        help="Mode delta : findings nouveaux/corrigés depuis le build précédent uniquement")
+    parser.add_argument("--dedup", action="store_true", help="Fusion des doublons dans chaque rapport")
+    parser.add_argument("--cleanup", action="store_true", help="Supprimer le brut et la sidecar une fois traités")
+    parser.add_argument("--cache-dir", default=os.environ.get("NORMALIZER_CACHE_DIR"),
+                        help="Cache de normalisation des rapports inchangés (défaut: $NORMALIZER_CACHE_DIR)")
+    parser.add_argument("--cache-max-mb", type=int, default=2048, help="Taille maximale du cache (LRU)")
+    parser.add_argument("--state-dir", default=os.environ.get("NORMALIZER_STATE_DIR"),
+                        help="Base de cycle de vie des findings (défaut: $NORMALIZER_STATE_DIR)")
+    add_dictionary_argument(parser)
+    add_rollup_argument(parser)
+    add_projection_arguments(parser)
+    perf.add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    status_file = args.status_file or os.path.join(args.root, STATUS_DIR, "status.json")
+    if args.check:
+        sys.exit(check_status(status_file, args.max_age))
+    check_lean_parent(parser, args)
+    if args.workers < 1 or args.max_queue < 1:
+        parser.error("--workers et --max-queue doivent être positifs")
+    try:
+        base_metadata = json.loads(args.metadata)
+    except ValueError as e:
+        parser.error(f"--metadata invalide: {e}")
+
+    job_options = {
+        "base_metadata": base_metadata,
+        "stream": args.stream,
+        "skip_normalized": False,
+        "delta": args.delta,
+        "state_dir": args.state_dir,
+        "dedup": args.dedup,
+        "ref_dictionary": args.ref_dictionary,
+        "projection": os.path.abspath(args.projection) if args.projection else None,
+        "lean_parent": args.lean_parent,
+        "rollups": args.rollups,
+        "cache_options": {"directory": args.cache_dir, "max_mb": args.cache_max_mb} if args.cache_dir else None,
+        "profile_options": {"cpu_profile": args.profile_cpu, "memory_profile": args.profile_memory}
+        if args.profile else None
+    }
+    daemon = NormalizerDaemon(args.root, args.workers, args.max_queue, status_file, job_options,
+                              args.rescan_interval, poll=args.poll,
+                              poll_interval=args.poll_interval, cleanup=args.cleanup, drain_timeout=args.drain_timeout)
+    daemon.run(args.status_interval)
+
+
+if __name__ == "__main__":
+    main()
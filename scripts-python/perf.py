@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Profilage par étape de normalize-reports.py / split_reports.py (--profile)
+
+Quand une normalisation est lente dans Jenkins, les lignes print de main()
+ne disent pas où part le temps. Avec --profile :
+
+- Temps mur (perf_counter) et CPU (process_time) par étape : load, normalize,
+  dedup, cache, rollup, mttd, lifecycle, serialize, fsync_rename, flatten, write.
+  Les temps sont exclusifs : une étape imbriquée (ex: normalize tirée par
+  flatten en mode fusionné) est décomptée de l'étape englobante, la somme des
+  étapes + `other` vaut le total
+- Compteurs (findings, documents, octets lus) et pic RSS du processus
+- Résumé affiché, et document `doc_type: pipeline_perf` écrit à côté du
+  fichier de sortie (<sortie>-perf.ndjson, ingéré par Filebeat) pour suivre
+  le coût du normaliseur build après build dans Kibana
+- --profile-cpu : dump cProfile (<sortie>-cprofile.prof, snakeviz/pstats)
+- --profile-memory : dump tracemalloc (<sortie>-tracemalloc.txt, top allocations)
+
+Sans --profile, stage() et timed_iter() ne coûtent rien (contexte vide,
+itérable retourné tel quel) : les modules instrumentés n'ont pas à tester.
+"""
+
+import json
+import os
+import resource
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+PROFILE_ENV = "NORMALIZER_PROFILE"
+PERF_SUFFIX = "-perf.ndjson"
+# Lignes du dump tracemalloc
+TRACEMALLOC_TOP = 40
+
+_NULL_STAGE = nullcontext()
+_recorder: Optional["PerfRecorder"] = None
+
+
+def default_profile() -> bool:
+    return os.environ.get(PROFILE_ENV, "").lower() in ("1", "true", "yes")
+
+
+def add_profile_arguments(parser) -> None:
+    """Options --profile* communes à normalize-reports.py, split_reports.py et batch_normalize.py"""
+    parser.add_argument("--profile", action="store_true", default=default_profile(),
+                        help="Temps mur/CPU par étape, compteurs et pic mémoire : résumé + document "
+                             f"pipeline_perf dans <sortie>{PERF_SUFFIX} (défaut: ${PROFILE_ENV})")
+    parser.add_argument("--profile-cpu", action="store_true",
+                        help="Avec --profile : dump cProfile dans <sortie>-cprofile.prof")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="Avec --profile : dump tracemalloc dans <sortie>-tracemalloc.txt (plus lent)")
+
+
+def perf_output_path(output_file: str) -> str:
+    """x-normalized.json → x-normalized-perf.ndjson, x-split.ndjson → x-split-perf.ndjson"""
+    return os.path.splitext(output_file)[0] + PERF_SUFFIX
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss en Ko sous Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class StageStats:
+    """Cumul d'une étape (temps exclusifs)"""
+
+    __slots__ = ("wall", "cpu", "calls", "peak_rss_mb")
+
+    def __init__(self):
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.calls = 0
+        self.peak_rss_mb = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"wall_s": round(self.wall, 4), "cpu_s": round(self.cpu, 4), "calls": self.calls,
+                "peak_rss_mb": self.peak_rss_mb}
+
+
+class _Stage:
+    """Contexte d'une étape ponctuelle (pic RSS relevé à la sortie)"""
+
+    __slots__ = ("recorder", "name")
+
+    def __init__(self, recorder: "PerfRecorder", name: str):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.recorder._enter()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder._exit(self.name).peak_rss_mb = _peak_rss_mb()
+
+
+class PerfRecorder:
+    """Mesures d'une exécution : pile d'étapes en cours, cumuls par étape, compteurs"""
+
+    def __init__(self, script: str, cpu_profile: bool = False, memory_profile: bool = False):
+        self.script = script
+        self.stages: Dict[str, StageStats] = {}
+        self.counts: Dict[str, int] = {}
+        # Étapes en cours : [début mur, début CPU, temps mur des sous-étapes, temps CPU des sous-étapes]
+        self._stack: List[List[float]] = []
+        self._profiler = None
+        self._tracemalloc = memory_profile
+        self.profilers = []
+        if cpu_profile:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self.profilers.append("cprofile")
+        if memory_profile:
+            self.profilers.append("tracemalloc")
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.traced_peak_mb = None
+        self._snapshot = None
+        self._start_wall = 0.0
+        self._start_cpu = 0.0
+
+    def start(self) -> None:
+        if self._tracemalloc:
+            import tracemalloc
+            tracemalloc.start()
+        if self._profiler is not None:
+            self._profiler.enable()
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+
+    def stop(self) -> None:
+        self.wall = time.perf_counter() - self._start_wall
+        self.cpu = time.process_time() - self._start_cpu
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._tracemalloc:
+            import tracemalloc
+            self.traced_peak_mb = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+            # Hors allocations de cProfile lui-même
+            self._snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, "*/cProfile.py"), tracemalloc.Filter(False, "*/tracemalloc.py")]
+            )
+            tracemalloc.stop()
+
+    def _enter(self) -> None:
+        self._stack.append([time.perf_counter(), time.process_time(), 0.0, 0.0])
+
+    def _exit(self, name: str) -> StageStats:
+        start_wall, start_cpu, child_wall, child_cpu = self._stack.pop()
+        wall = time.perf_counter() - start_wall
+        cpu = time.process_time() - start_cpu
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        stats.wall += wall - child_wall
+        stats.cpu += cpu - child_cpu
+        stats.calls += 1
+        if self._stack:
+            parent = self._stack[-1]
+            parent[2] += wall
+            parent[3] += cpu
+        return stats
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def timed_iter(self, iterable: Iterable[Any], name: str) -> Iterator[Any]:
+        """Chaque next() de `iterable` est compté dans l'étape `name` (un appel par élément)"""
+        iterator = iter(iterable)
+        enter, exit_ = self._enter, self._exit
+        while True:
+            enter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                exit_(name).peak_rss_mb = _peak_rss_mb()
+                return
+            except BaseException:
+                exit_(name)
+                raise
+            exit_(name)
+            yield item
+
+    def count(self, name: str, value: int) -> None:
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def stage_dicts(self) -> Dict[str, Dict[str, Any]]:
+        stages = {name: stats.as_dict() for name, stats in self.stages.items()}
+        # Temps hors étapes instrumentées (arguments, journal, imports...)
+        stages["other"] = {
+            "wall_s": round(max(self.wall - sum(s.wall for s in self.stages.values()), 0.0), 4),
+            "cpu_s": round(max(self.cpu - sum(s.cpu for s in self.stages.values()), 0.0), 4),
+            "calls": 1,
+            "peak_rss_mb": _peak_rss_mb()
+        }
+        return stages
+
+    def document(self, report: Optional[Dict[str, Any]], output_file: str, mode: str) -> Dict[str, Any]:
+        """Document pipeline_perf (métadonnées du rapport pour filtrer par outil/service/build dans Kibana)"""
+        report = report if isinstance(report, dict) else {}
+        metadata = report.get("metadata") if isinstance(report.get("metadata"), dict) else {}
+        summary = report.get("summary") if isinstance(report.get("summary"), dict) else {}
+        findings = summary.get("total_vulnerabilities", self.counts.get("findings", 0))
+
+        perf = {
+            "script": self.script,
+            "mode": mode,
+            "wall_s": round(self.wall, 4),
+            "cpu_s": round(self.cpu, 4),
+            "peak_rss_mb": _peak_rss_mb(),
+            "findings": findings,
+            "findings_per_s": round(findings / self.wall, 1) if self.wall > 0 else 0.0,
+            "counts": dict(self.counts),
+            "stages": self.stage_dicts(),
+            "profilers": list(self.profilers)
+        }
+        if self.traced_peak_mb is not None:
+            perf["traced_peak_mb"] = self.traced_peak_mb
+
+        return {
+            "@timestamp": datetime.now(timezone.utc).isoformat(),
+            "doc_type": "pipeline_perf",
+            "report_file": os.path.basename(output_file),
+            "metadata": {key: metadata[key] for key in ("tool", "service", "build_id", "scan_type")
+                         if key in metadata},
+            "perf": perf
+        }
+
+    def print_summary(self, doc: Dict[str, Any]) -> None:
+        perf = doc["perf"]
+        print(f"\n Profil d'exécution ({self.script}, {perf['mode']}):")
+        print(f"  {'étape':<14}{'mur (s)':>10}{'CPU (s)':>10}{'appels':>10}{'pic RSS (Mo)':>14}")
+        stages = sorted(perf["stages"].items(), key=lambda item: item[1]["wall_s"], reverse=True)
+        for name, stats in stages:
+            print(f"  {name:<14}{stats['wall_s']:>10.3f}{stats['cpu_s']:>10.3f}{stats['calls']:>10}"
+                  f"{stats['peak_rss_mb']:>14.1f}")
+        print(f"  {'total':<14}{perf['wall_s']:>10.3f}{perf['cpu_s']:>10.3f}")
+        print(f"  • Findings: {perf['findings']} ({perf['findings_per_s']}/s)")
+        for name, value in sorted(perf["counts"].items()):
+            print(f"  • {name}: {value}")
+        print(f"  • Pic RSS: {perf['peak_rss_mb']} Mo")
+        if "traced_peak_mb" in perf:
+            print(f"  • Pic tracemalloc: {perf['traced_peak_mb']} Mo")
+        if self.profilers:
+            print(f"  (temps gonflés par {', '.join(self.profilers)})")
+
+    def dump_profiles(self, output_file: str) -> List[str]:
+        """Dumps cProfile/tracemalloc à côté du fichier de sortie (artefacts Jenkins)"""
+        base = os.path.splitext(output_file)[0]
+        paths = []
+        if self._profiler is not None:
+            path = base + "-cprofile.prof"
+            self._profiler.dump_stats(path)
+            paths.append(path)
+        if self._snapshot is not None:
+            path = base + "-tracemalloc.txt"
+            stats = self._snapshot.statistics("lineno")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"Pic tracemalloc: {self.traced_peak_mb} Mo\n")
+                f.write(f"Top {TRACEMALLOC_TOP} allocations encore retenues en fin d'exécution:\n")
+                for stat in stats[:TRACEMALLOC_TOP]:
+                    f.write(f"{stat}\n")
+            paths.append(path)
+        return paths
+
+
+def write_perf_document(doc: Dict[str, Any], perf_file: str) -> None:
+    """Écriture atomique (.tmp → rename, ignoré par Filebeat)"""
+    directory = os.path.dirname(perf_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_file = perf_file + ".tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+    os.replace(temp_file, perf_file)
+
+
+# ============================================================================
+# ENREGISTREUR DU PROCESSUS (utilisé par les modules instrumentés)
+# ============================================================================
+
+def start(script: str, cpu_profile: bool = False, memory_profile: bool = False) -> PerfRecorder:
+    """Active le profilage pour ce processus"""
+    global _recorder
+    _recorder = PerfRecorder(script, cpu_profile, memory_profile)
+    _recorder.start()
+    return _recorder
+
+
+def finish(report: Optional[Dict[str, Any]], output_file: str, mode: str) -> Optional[Dict[str, Any]]:
+    """
+    Désactive le profilage, affiche le résumé, écrit le document pipeline_perf
+    (<output_file>-perf.ndjson) et les dumps éventuels. Retourne le document.
+    """
+    global _recorder
+    recorder = _recorder
+    if recorder is None:
+        return None
+    _recorder = None
+    recorder.stop()
+
+    doc = recorder.document(report, output_file, mode)
+    recorder.print_summary(doc)
+    perf_file = perf_output_path(output_file)
+    write_perf_document(doc, perf_file)
+    print(f" Profil écrit: {perf_file}")
+    for path in recorder.dump_profiles(output_file):
+        print(f" Dump de profilage: {path}")
+    return doc
+
+
+def abort() -> None:
+    """Désactive le profilage sans rien écrire (exécution en échec)"""
+    global _recorder
+    recorder = _recorder
+    _recorder = None
+    if recorder is not None:
+        recorder.stop()
+
+
+def stage(name: str):
+    """Contexte de mesure d'une étape (contexte vide sans --profile)"""
+    if _recorder is None:
+        return _NULL_STAGE
+    return _recorder.stage(name)
+
+
+def timed_iter(iterable: Iterable[Any], name: str) -> Iterable[Any]:
+    """Itérable mesuré élément par élément (retourné tel quel sans --profile)"""
+    if _recorder is None:
+        return iterable
+    return _recorder.timed_iter(iterable, name)
+
+
+def count(name: str, value: int) -> None:
+    """Ajoute `value` au compteur `name` (ex: documents, input_bytes)"""
+    if _recorder is not None:
+        _recorder.count(name, value)
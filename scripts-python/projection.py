@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Allègement des documents NDJSON : parent allégé (--lean-parent) et projection
+des champs (--projection)
+
+Parent allégé : le vulnerability_report ne recopie plus `vulnerabilities` (déjà
+indexé une fois par finding) mais garde summary, metrics, metadata...
+et un index compact des findings du scan :
+
+    "findings": {"count": 3, "fingerprints": ["9f1c...", ...], "vulnerability_ids": ["CVE-...", ...]}
+
+(empreintes de fingerprints.py, identifiants distincts dans l'ordre du rapport).
+Le suivi des résolutions repose alors sur lifecycle_store.py : documents
+resolved_finding, d'où --state-dir obligatoire avec --lean-parent (check_lean_parent).
+vulnerability_report_watcher lit les documents vulnerability_finding ouverts et
+resolved_finding, jamais le tableau `vulnerabilities` du parent.
+
+Projection : fichier JSON de règles par outil ("*" pour tous), appliquées aux
+champs aplatis de chaque document (finding et contexte parent recollé) :
+
+    {
+      "*":     {"deny": ["vulnerability.unified.is_vulnerability"]},
+      "trivy": {"deny": ["metadata.trivy.schema_version", "vulnerability.last_modified_time"]},
+      "sarif": {"allow": ["metadata.*", "vulnerability.unified.*", "vulnerability.rule.id"]}
+    }
+
+Motifs fnmatch sur le nom aplati. Un champ est émis s'il correspond à la liste
+allow (celle de l'outil, sinon celle de "*" ; toutes les clés sans allow) et à
+aucun motif deny ("*" puis outil). doc_type, report_id et delta_status sont toujours émis.
+"""
+
+import fnmatch
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fingerprints import finding_fingerprint
+from findings import is_mapping
+
+ALL_TOOLS = "*"
+PROTECTED_FIELDS = frozenset(("doc_type", "report_id", "delta_status"))
+_RULE_KEYS = ("allow", "deny")
+
+
+class FieldProjection:
+    """Règles allow/deny résolues pour un outil ; décision mémorisée par nom de champ"""
+
+    __slots__ = ("allow", "deny", "_decisions")
+
+    def __init__(self, allow: Optional[Tuple[str, ...]], deny: Tuple[str, ...]):
+        self.allow = allow
+        self.deny = deny
+        self._decisions: Dict[str, bool] = {}
+
+    def keeps(self, field: str) -> bool:
+        decision = self._decisions.get(field)
+        if decision is None:
+            decision = field in PROTECTED_FIELDS or (
+                (self.allow is None or any(fnmatch.fnmatchcase(field, p) for p in self.allow))
+                and not any(fnmatch.fnmatchcase(field, p) for p in self.deny)
+            )
+            self._decisions[field] = decision
+        return decision
+
+    def apply(self, doc: Dict[str, Any]) -> None:
+        """Retire en place les champs non retenus"""
+        keeps = self.keeps
+        for field in [field for field in doc if not keeps(field)]:
+            del doc[field]
+
+
+def _rule_patterns(rules: Dict[str, Any], tool: str, key: str) -> Optional[List[str]]:
+    block = rules.get(tool)
+    if block is None or key not in block:
+        return None
+    return list(block[key])
+
+
+def validate_rules(rules: Any, source: str) -> Dict[str, Dict[str, List[str]]]:
+    """Vérifie la forme {outil: {"allow": [...], "deny": [...]}} ; ValueError sinon"""
+    if not isinstance(rules, dict):
+        raise ValueError(f"{source} : objet JSON {{outil: règles}} attendu")
+    for tool, block in rules.items():
+        if not isinstance(block, dict) or not set(block) <= set(_RULE_KEYS):
+            raise ValueError(f"{source} : règles de '{tool}' : clés autorisées {', '.join(_RULE_KEYS)}")
+        for key, patterns in block.items():
+            if not (isinstance(patterns, list) and all(isinstance(p, str) for p in patterns)):
+                raise ValueError(f"{source} : '{tool}.{key}' doit être une liste de motifs")
+    return rules
+
+
+@lru_cache(maxsize=8)
+def _load_rules(path: str, mtime: float) -> Dict[str, Dict[str, List[str]]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return validate_rules(json.load(f), path)
+
+
+def load_projection(path: Optional[str], tool: str) -> Optional[FieldProjection]:
+    """Projection de `tool` d'après le fichier de règles (None sans fichier ou sans règle pour l'outil)"""
+    if not path:
+        return None
+    rules = _load_rules(path, os.path.getmtime(path))
+    tool = str(tool or "").lower()
+    allow = _rule_patterns(rules, tool, "allow")
+    if allow is None:
+        allow = _rule_patterns(rules, ALL_TOOLS, "allow")
+    deny = (_rule_patterns(rules, ALL_TOOLS, "deny") or []) + (_rule_patterns(rules, tool, "deny") or [])
+    if allow is None and not deny:
+        return None
+    return FieldProjection(tuple(allow) if allow is not None else None, tuple(deny))
+
+
+class FindingIndex:
+    """Index compact des findings d'un scan, porté par le parent allégé (bloc `findings`)"""
+
+    __slots__ = ("tool", "fingerprints", "vulnerability_ids")
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.fingerprints: List[str] = []
+        self.vulnerability_ids: Dict[str, None] = {}
+
+    def collect(self, findings: Iterable[Any]) -> Iterator[Any]:
+        """Relaie `findings` en relevant empreinte et vulnerability_id de chacun"""
+        for vuln_item in findings:
+            self.fingerprints.append(finding_fingerprint(self.tool, vuln_item))
+            unified = vuln_item.get("unified") if is_mapping(vuln_item) else None
+            vuln_id = unified.get("vulnerability_id") if is_mapping(unified) else None
+            if vuln_id:
+                self.vulnerability_ids[vuln_id] = None
+            yield vuln_item
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": len(self.fingerprints),
+            "fingerprints": self.fingerprints,
+            "vulnerability_ids": list(self.vulnerability_ids)
+        }
+
+
+LEAN_PARENT_ERROR = ("--lean-parent nécessite --state-dir (ou $NORMALIZER_STATE_DIR) : sans `vulnerabilities` "
+                     "dans le parent, les résolutions ne sont suivies que par les documents resolved_finding")
+
+
+def check_lean_parent(parser, args) -> None:
+    """Refuse --lean-parent sans base de cycle de vie (outils qui acceptent --state-dir)"""
+    if args.lean_parent and not args.state_dir:
+        parser.error(LEAN_PARENT_ERROR)
+
+
+def add_projection_arguments(parser) -> None:
+    """Options CLI communes (split_reports.py, normalize-reports.py, batch_normalize.py, normalizer_daemon.py)"""
+    parser.add_argument("--lean-parent", action="store_true",
+                        help="Parent vulnerability_report sans `vulnerabilities` : summary, metrics, metadata "
+                             "et index des findings (empreintes, identifiants) ; résolutions suivies par la base "
+                             "de cycle de vie (--state-dir obligatoire à la normalisation)")
+    parser.add_argument("--projection", metavar="JSON",
+                        help="Règles allow/deny par outil des champs aplatis émis (cf. projection.py)")
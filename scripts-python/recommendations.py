@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Recommandations de mitigation (champ mitigation_recommendation des findings)
+
+Les méthodes _extract_*_recommendation du normaliseur refaisaient tout le
+travail pour chaque finding : description Snyk passée en minuscules puis
+découpée phrase par phrase, tests de sous-chaînes sur chaque message SonarQube,
+alors que les findings d'un même avis Snyk, d'une même règle SonarQube ou d'un
+même couple (paquet, version corrigée) Trivy donnent le même texte.
+
+Règles déclaratives ci-dessous (textes par outil et par type, règles SonarQube
+de duplication), motifs compilés une fois à l'import. Chaque texte est calculé
+une fois par clé puis servi par un cache borné :
+
+- snyk      : (paquet, version corrigée) ; identifiant d'avis pour la phrase upgrade/update
+  de la description (description analysée sans cache pour un finding sans identifiant)
+- trivy     : (paquet, version corrigée)
+- sonarqube : (règle, type) ; le mot-clé "duplicat" n'est cherché dans le message que pour
+  une règle hors duplication, le message étant recopié à la sortie du cache
+
+Le moteur est partagé par le processus (RECOMMENDATIONS) : un worker de
+batch_normalize / normalizer_daemon garde son cache d'un rapport à l'autre.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_CACHE_SIZE = 8192
+
+SNYK_UPGRADE = "Upgrade {package} to version {fixed_version}"
+SNYK_PATCH = "Apply available security patch"
+SNYK_FALLBACK = "Review Snyk security advisory for remediation steps"
+# Phrase de la description reprise telle quelle si elle contient l'un de ces mots (casse ignorée)
+SNYK_DESCRIPTION_KEYWORDS = ("upgrade", "update")
+
+TRIVY_FIX = "Update {package} to version {fixed_version} or later"
+TRIVY_NO_FIX = "No fix available yet for {package}. Monitor security advisories or consider alternative packages"
+
+SONARQUBE_DUPLICATION = "Refactor code to extract duplicated logic into reusable functions or utility classes"
+SONARQUBE_TYPE_TEMPLATES = {
+    "BUG": "Fix bug: {message}. Review SonarQube rule documentation for detailed guidance",
+    "VULNERABILITY": "Security issue: {message}. Apply secure coding practices as per SonarQube recommendations",
+    "CODE_SMELL": "Improve code quality: {message}",
+    "SECURITY_HOTSPOT": "Review security hotspot: {message}. Verify if this code path is exploitable"
+}
+SONARQUBE_FALLBACK = "Review and fix: {message}"
+# Règles de duplication, tous langages (clé après "<dépôt>:") : blocs dupliqués et littéraux
+# répétés ; sinon, message contenant "duplicat"
+SONARQUBE_DUPLICATION_RULES = frozenset(("DuplicatedBlocks", "S1192"))
+SONARQUBE_DUPLICATION_KEYWORD = "duplicat"
+
+
+def _snyk_description(description: str) -> Optional[str]:
+    """Première phrase (découpage sur '.') contenant un mot-clé upgrade/update"""
+    lowered = description.lower()
+    position = -1
+    for keyword in SNYK_DESCRIPTION_KEYWORDS:
+        found = lowered.find(keyword, 0, position if position >= 0 else len(lowered))
+        if found >= 0:
+            position = found
+    if position < 0:
+        return None
+    if len(lowered) != len(description):
+        # Minuscules de longueur différente (caractères non ASCII) : découpage phrase par phrase
+        for sentence in description.split("."):
+            lowered_sentence = sentence.lower()
+            if any(keyword in lowered_sentence for keyword in SNYK_DESCRIPTION_KEYWORDS):
+                return sentence.strip()
+        return None
+    # Phrase de la première occurrence, délimitée dans la description d'origine
+    start = description.rfind(".", 0, position) + 1
+    end = description.find(".", position)
+    return description[start:end if end >= 0 else len(description)].strip()
+
+
+def _compile_template(template: str) -> Tuple[str, str]:
+    """Texte "<avant>{message}<après>" découpé une fois : concaténation au lieu de str.format"""
+    prefix, _, suffix = template.partition("{message}")
+    return prefix, suffix
+
+
+_SONARQUBE_TEMPLATES = {issue_type: _compile_template(template)
+                        for issue_type, template in SONARQUBE_TYPE_TEMPLATES.items()}
+_SONARQUBE_FALLBACK = _compile_template(SONARQUBE_FALLBACK)
+_MISSING = object()
+
+
+def _sonarqube(rule: Any, issue_type: Any) -> Optional[Tuple[str, str]]:
+    """(avant, après) du message pour la règle et le type ; None pour une règle de duplication"""
+    if isinstance(rule, str) and rule.rpartition(":")[2] in SONARQUBE_DUPLICATION_RULES:
+        return None
+    issue_type = issue_type.upper() if isinstance(issue_type, str) else ""
+    return _SONARQUBE_TEMPLATES.get(issue_type, _SONARQUBE_FALLBACK)
+
+
+def _package_template(template: str, package: Any, fixed_version: Any) -> str:
+    return template.format(package=package, fixed_version=fixed_version)
+
+
+class RecommendationEngine:
+    """
+    Textes de mitigation par outil, mémorisés dans des caches bornés (un par famille de clé) :
+    LRU pour les textes Snyk/Trivy par paquet ; dictionnaires vidés une fois pleins par
+    identifiant d'avis Snyk (la description n'entre pas dans la clé) et par (type, règle)
+    SonarQube (imbriqués : pas de tuple clé à construire et hacher par issue)
+    """
+
+    __slots__ = ("_advisories", "_advisory_hits", "_advisory_misses", "_rules", "_rule_hits", "_rule_misses",
+                 "_maxsize", "_package")
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        self._advisories: Dict[str, Optional[str]] = {}
+        self._advisory_hits = self._advisory_misses = 0
+        self._rules: Dict[Any, Dict[Any, Optional[Tuple[str, str]]]] = {}
+        self._rule_hits = self._rule_misses = 0
+        self._maxsize = maxsize
+        self._package = lru_cache(maxsize=maxsize)(_package_template)
+
+    def snyk(self, vuln: Dict[str, Any]) -> str:
+        # Priorité 1 : upgrade path, puis patch, puis phrase de la description
+        fixed_in = vuln.get("fixedIn")
+        if vuln.get("isUpgradable") and fixed_in:
+            fixed_version = fixed_in[0] if isinstance(fixed_in, list) else fixed_in
+            return self._by_package(SNYK_UPGRADE, vuln.get("packageName", "package"), fixed_version)
+        if vuln.get("isPatchable"):
+            return SNYK_PATCH
+        description = vuln.get("description")
+        if isinstance(description, str) and description:
+            return self._advisory_sentence(vuln.get("id"), description) or SNYK_FALLBACK
+        return SNYK_FALLBACK
+
+    def _advisory_sentence(self, advisory_id: Any, description: str) -> Optional[str]:
+        """Phrase upgrade/update de la description, mémorisée par identifiant d'avis Snyk"""
+        if not isinstance(advisory_id, str) or not advisory_id:
+            return _snyk_description(description)
+        sentence = self._advisories.get(advisory_id, _MISSING)
+        if sentence is not _MISSING:
+            self._advisory_hits += 1
+            return sentence
+        self._advisory_misses += 1
+        if len(self._advisories) >= self._maxsize:
+            self._advisories.clear()
+        sentence = self._advisories[advisory_id] = _snyk_description(description)
+        return sentence
+
+    def trivy(self, vuln: Dict[str, Any]) -> str:
+        fixed_version = vuln.get("FixedVersion")
+        if fixed_version:
+            return self._by_package(TRIVY_FIX, vuln.get("PkgName", "package"), fixed_version)
+        return self._by_package(TRIVY_NO_FIX, vuln.get("PkgName", "package"), None)
+
+    def sonarqube(self, issue: Dict[str, Any]) -> str:
+        try:
+            parts = self._rules[issue.get("type", "")][issue.get("rule")]
+        except (KeyError, TypeError):
+            parts = self._remember_rule(issue.get("rule"), issue.get("type", ""))
+        else:
+            self._rule_hits += 1
+        if parts is None:
+            return SONARQUBE_DUPLICATION
+        message = issue.get("message", "")
+        if not isinstance(message, str):
+            message = str(message)
+        # Règle hors duplication : mot-clé cherché dans le message brut, comme avant
+        if SONARQUBE_DUPLICATION_KEYWORD in message.lower():
+            return SONARQUBE_DUPLICATION
+        prefix, suffix = parts
+        return f"{prefix}{message}{suffix}"
+
+    def _remember_rule(self, rule: Any, issue_type: Any) -> Optional[Tuple[str, str]]:
+        parts = _sonarqube(rule, issue_type)
+        try:
+            by_rule = self._rules.get(issue_type)
+            if by_rule is None:
+                if len(self._rules) >= self._maxsize:
+                    self._rules.clear()
+                by_rule = self._rules[issue_type] = {}
+            elif len(by_rule) >= self._maxsize:
+                by_rule.clear()
+            by_rule[rule] = parts
+        except TypeError:
+            # Règle ou type non hachable dans le rapport brut : texte calculé sans cache
+            return parts
+        self._rule_misses += 1
+        return parts
+
+    def _by_package(self, template: str, package: Any, fixed_version: Any) -> str:
+        try:
+            return self._package(template, package, fixed_version)
+        except TypeError:
+            # Valeur non hachable dans le rapport brut : texte calculé sans cache
+            return _package_template(template, package, fixed_version)
+
+    def counters(self) -> Tuple[int, int]:
+        """(hits, misses) cumulés des caches depuis le démarrage du processus"""
+        info = self._package.cache_info()
+        return (info.hits + self._advisory_hits + self._rule_hits,
+                info.misses + self._advisory_misses + self._rule_misses)
+
+
+# Moteur partagé par les normaliseurs du processus
+RECOMMENDATIONS = RecommendationEngine()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Encodage par dictionnaire des chaînes répétées des findings (--ref-dictionary)
+
+Les mêmes URLs de références (NVD, GitHub advisories, trackers des distributions)
+et les mêmes recommandations reviennent dans des milliers de findings Trivy/Snyk,
+et chaque document vulnerability_finding les recopiait en entier. Avec
+--ref-dictionary, ces valeurs sont remplacées par des identifiants entiers propres
+au rapport :
+
+    "vulnerability.references": ["https://nvd...", ...]   → "vulnerability.reference_ids": [0, 7]
+    "vulnerability.mitigation_recommendation": "..."      → "vulnerability.mitigation_recommendation_id": 3
+
+et la table est publiée après les findings dans un ou plusieurs documents
+(CHUNK_ENTRIES valeurs chacun, sous la limite de taille de ligne de Filebeat) :
+
+    {"doc_type": "reference_dictionary", "report_id": "...", "dictionary.offset": 0,
+     "dictionary.values": ["https://nvd...", ...], "metadata.tool": "trivy", ...}
+
+Identifiant n → dictionary.values[n - dictionary.offset] du document de même report_id.
+Le mode est choisi par sortie (donc par index) : sans l'option, documents inchangés.
+"""
+
+from typing import Any, Dict, Iterator, List
+
+# Champs aplatis encodés → champ porteur des identifiants
+ENCODED_FIELDS = {
+    "vulnerability.references": "vulnerability.reference_ids",
+    "vulnerability.mitigation_recommendation": "vulnerability.mitigation_recommendation_id"
+}
+CHUNK_ENTRIES = 20000
+
+
+class ReferenceDictionary:
+    """Table valeur → identifiant d'un rapport, alimentée finding par finding (encode)"""
+
+    __slots__ = ("ids", "values")
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def intern(self, value: str) -> int:
+        index = self.ids.get(value)
+        if index is None:
+            index = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def encode(self, child_doc: Dict[str, Any]) -> None:
+        """Remplace en place les champs de ENCODED_FIELDS (chaîne ou liste de chaînes) par leurs identifiants"""
+        for field, id_field in ENCODED_FIELDS.items():
+            value = child_doc.get(field)
+            if isinstance(value, str):
+                if value:
+                    del child_doc[field]
+                    child_doc[id_field] = self.intern(value)
+            elif isinstance(value, list) and all(isinstance(item, str) for item in value):
+                del child_doc[field]
+                child_doc[id_field] = [self.intern(item) for item in value]
+
+    def iter_documents(self, report_id: str, context_fields) -> Iterator[Dict[str, Any]]:
+        """Documents reference_dictionary (rien si aucune valeur encodée)"""
+        for offset in range(0, len(self.values), CHUNK_ENTRIES):
+            doc = {
+                "doc_type": "reference_dictionary",
+                "report_id": report_id,
+                "dictionary.offset": offset,
+                "dictionary.values": self.values[offset:offset + CHUNK_ENTRIES]
+            }
+            doc.update(context_fields)
+            yield doc
+
+
+def add_dictionary_argument(parser) -> None:
+    """Option CLI commune (split_reports.py, normalize-reports.py, batch_normalize.py)"""
+    parser.add_argument("--ref-dictionary", action="store_true",
+                        help="Références/recommandations des findings encodées par identifiants, "
+                             "table dans des documents reference_dictionary")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Agrégats pré-calculés des findings (documents doc_type: vulnerability_rollup)
+
+Les dashboards Kibana et les watchers répartissaient les findings par paquet,
+cible, CWE, type ou correctif disponible avec des agrégations terms sur tous
+les documents vulnerability_finding. Ces répartitions sont désormais comptées
+par ReportNormalizer, en une passe sur les findings, dans des tables de
+compteurs (dimension × valeur → total, sévérités, fixables) :
+
+    package  : nom du paquet (Snyk/Trivy)
+    target   : cible Trivy (image, lockfile...), fichier pour SonarQube/SARIF
+    cwe      : chaque CWE du finding
+    type     : unified.type (cve, sca, code, bug, code_smell...)
+    fixable  : unified.is_fixable ("true" / "false")
+
+Fonction optionnelle (--rollups, comme --ref-dictionary) : sans elle, rien n'est
+compté ni ajouté au rapport. Avec, le rapport normalisé porte les tables dans
+`rollups` ; split_reports.py en tire un document par dimension (5 au plus par
+rapport), écrit avant le parent (qui ne les recopie pas), valeurs en buckets
+(champ nested du template d'index) :
+
+    {"doc_type": "vulnerability_rollup", "report_id": "...", "rollup.dimension": "package",
+     "rollup.buckets": [{"key": "openssl", "total": 12, "critical": 2, "high": 5, "medium": 4,
+                         "low": 1, "info": 0, "fixable": 9}, ...],
+     "metadata.tool": "trivy", ...}
+
+Au-delà de MAX_KEYS valeurs par dimension, les moins fréquentes sont regroupées
+sous OTHER_KEY.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DIMENSIONS = ("package", "target", "cwe", "type", "fixable")
+SEVERITIES = ("critical", "high", "medium", "low", "info")
+# Colonnes d'une ligne de compteurs : total, sévérités, fixables
+COLUMNS = ("total",) + SEVERITIES + ("fixable",)
+MAX_KEYS = 200
+OTHER_KEY = "_other"
+
+_SEVERITY_COLUMN = {severity: index for index, severity in enumerate(SEVERITIES, 1)}
+_INFO_COLUMN = _SEVERITY_COLUMN["info"]
+_FIXABLE_COLUMN = len(COLUMNS) - 1
+
+
+class RollupCounter:
+    """Tables de compteurs par dimension, alimentées finding par finding (add)"""
+
+    __slots__ = ("tables", "findings")
+
+    def __init__(self):
+        self.tables: Dict[str, Dict[str, List[int]]] = {dimension: {} for dimension in DIMENSIONS}
+        self.findings = 0
+
+    def add(self, vuln: Any) -> None:
+        """Compte un finding (finding compact de findings.py ou dict)"""
+        if isinstance(vuln, dict):
+            unified = vuln.get("unified") or {}
+            package = vuln.get("package")
+            package_name = package.get("name") if isinstance(package, dict) else None
+            target = vuln.get("target")
+            cwes = vuln.get("cwe")
+        else:
+            # Finding compact : lecture directe des slots (sans passer par get())
+            unified = vuln.unified or {}
+            package_name = vuln.package[0] if vuln.PACKAGE_KEYS else None
+            target = getattr(vuln, "target", None)
+            cwes = getattr(vuln, "cwe", None)
+        severity = unified.get("severity") or vuln.get("severity")
+        column = _SEVERITY_COLUMN.get(severity, _INFO_COLUMN)
+        fixable = bool(unified.get("is_fixable"))
+        self.findings += 1
+        if not target and not package_name:
+            target = unified.get("component")
+
+        tables = self.tables
+        self._count(tables["package"], package_name, column, fixable)
+        self._count(tables["target"], target, column, fixable)
+        for cwe in cwes or ():
+            self._count(tables["cwe"], cwe, column, fixable)
+        self._count(tables["type"], unified.get("type"), column, fixable)
+        self._count(tables["fixable"], "true" if fixable else "false", column, fixable)
+
+    @staticmethod
+    def _count(table: Dict[str, List[int]], key: Any, column: int, fixable: bool) -> None:
+        if not key:
+            return
+        row = table.get(key)
+        if row is None:
+            row = table[key] = [0] * len(COLUMNS)
+        row[0] += 1
+        row[column] += 1
+        if fixable:
+            row[_FIXABLE_COLUMN] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Forme JSON du rapport normalisé : {"columns": [...], "package": [[clé, total, ...], ...], ...}"""
+        result: Dict[str, Any] = {"columns": list(COLUMNS)}
+        for dimension, table in self.tables.items():
+            result[dimension] = [[key] + row for key, row in _top_rows(table)]
+        return result
+
+
+def _top_rows(table: Dict[str, List[int]]) -> List[Tuple[str, List[int]]]:
+    """Lignes triées par total décroissant, les valeurs au-delà de MAX_KEYS regroupées sous OTHER_KEY"""
+    rows = sorted(table.items(), key=lambda item: (-item[1][0], str(item[0])))
+    if len(rows) <= MAX_KEYS:
+        return rows
+    other = [0] * len(COLUMNS)
+    for _, row in rows[MAX_KEYS - 1:]:
+        for index, value in enumerate(row):
+            other[index] += value
+    return rows[:MAX_KEYS - 1] + [(OTHER_KEY, other)]
+
+
+def iter_rollup_documents(rollups: Optional[Dict[str, Any]], report_id: str,
+                          context_fields) -> Iterator[Dict[str, Any]]:
+    """
+    Un document vulnerability_rollup par dimension non vide de `rollups`
+    (RollupCounter.as_dict), avec les champs aplatis du parent
+    (split_reports.ParentContext.fields)
+    """
+    if not isinstance(rollups, dict):
+        return
+    columns = rollups.get("columns") or COLUMNS
+    for dimension in DIMENSIONS:
+        rows = rollups.get(dimension)
+        if not rows:
+            continue
+        doc = {
+            "doc_type": "vulnerability_rollup",
+            "report_id": report_id,
+            "rollup.dimension": dimension,
+            "rollup.buckets": [{"key": str(row[0]), **dict(zip(columns, row[1:]))} for row in rows]
+        }
+        doc.update(context_fields)
+        yield doc
+
+
+def add_rollup_argument(parser) -> None:
+    """Option CLI commune (normalize-reports.py, batch_normalize.py, normalizer_daemon.py)"""
+    parser.add_argument("--rollups", action="store_true",
+                        help="Agrégats paquet/cible/CWE/type/fixable × sévérité, un document "
+                             "vulnerability_rollup par dimension (cf. rollups.py)")
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Adaptateur SARIF 2.1.0 (CodeQL, Semgrep, Gitleaks...)
+
+Chaque élément de runs[].results[] devient un finding `unified` :
+- règle retrouvée par ruleIndex / rule.index (+ toolComponent) / ruleId dans
+  tool.driver.rules et tool.extensions[].rules ; les règles sont réduites à
+  l'essentiel (titre, sévérité, CWE, tags, aide) dès la lecture
+- sévérité : propriété `security-severity` de la règle (score CVSS, CodeQL /
+  Semgrep) sinon `level` du résultat ou de la règle (error/warning/note/none)
+- résultats supprimés (suppressions acceptées) ou absents de la baseline
+  ignorés et comptés dans summary.suppressed ; kind pass/notApplicable ignorés
+- ni extrait de code (region.snippet) ni texte brut du rapport ne sont
+  recopiés : un secret détecté par Gitleaks ne se retrouve pas dans Elasticsearch
+
+Mode --stream : une pré-lecture ne décode que runs[].tool (les results et
+artifacts sont sautés), puis les résultats sont décodés un par un. La mémoire
+est bornée par le nombre de règles, pas par le nombre de résultats.
+"""
+
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+from findings import SarifFinding, intern_value
+from json_stream import JsonStreamReader
+from tool_adapters import ToolAdapter
+
+# level SARIF → sévérité ECS
+LEVEL_SEVERITY = {"error": "high", "warning": "medium", "note": "low", "none": "info"}
+# level par défaut quand ni le résultat ni la règle n'en portent (SARIF : warning)
+DEFAULT_LEVEL = "warning"
+TOOL_DEFAULT_LEVELS = {"gitleaks": "error"}
+# Outils de détection de secrets (type unified `secret`)
+SECRET_TOOLS = ("gitleaks",)
+# Résultats qui ne sont pas des problèmes
+IGNORED_KINDS = ("pass", "notApplicable", "informational")
+
+_CWE = re.compile(r"cwe[-_/:]?0*(\d+)", re.IGNORECASE)
+MAX_RECOMMENDATION_CHARS = 500
+
+
+def _text(block: Any) -> str:
+    """Texte d'un message SARIF ({"text": ...}, à défaut "markdown")"""
+    if isinstance(block, dict):
+        return str(block.get("text") or block.get("markdown") or "")
+    return ""
+
+
+def _first_paragraph(text: str) -> str:
+    paragraph = text.strip().split("\n\n", 1)[0].strip()
+    if len(paragraph) > MAX_RECOMMENDATION_CHARS:
+        paragraph = paragraph[:MAX_RECOMMENDATION_CHARS].rstrip() + "..."
+    return paragraph
+
+
+def severity_from_score(score: float) -> str:
+    """Échelle security-severity de CodeQL (identique à CVSS v3)"""
+    if score >= 9.0:
+        return "critical"
+    if score >= 7.0:
+        return "high"
+    if score >= 4.0:
+        return "medium"
+    if score > 0:
+        return "low"
+    return "info"
+
+
+class SarifRule:
+    """Règle réduite aux champs utiles aux findings"""
+
+    __slots__ = ("id", "title", "level", "security_severity", "cwe", "tags", "references", "recommendation",
+                 "is_security")
+
+    def __init__(self, rule: Dict[str, Any]):
+        properties = rule.get("properties") if isinstance(rule.get("properties"), dict) else {}
+        self.id = str(rule.get("id") or "")
+        self.title = _text(rule.get("shortDescription")) or str(rule.get("name") or "")
+        configuration = rule.get("defaultConfiguration")
+        self.level = configuration.get("level") if isinstance(configuration, dict) else None
+
+        try:
+            self.security_severity = float(properties.get("security-severity"))
+        except (TypeError, ValueError):
+            self.security_severity = None
+
+        tags = properties.get("tags")
+        self.tags = [intern_value(str(tag)) for tag in tags] if isinstance(tags, list) else []
+        cwe = []
+        for tag in self.tags:
+            match = _CWE.search(tag)
+            if match and f"CWE-{match.group(1)}" not in cwe:
+                cwe.append(f"CWE-{match.group(1)}")
+        self.cwe = cwe
+        self.references = [rule["helpUri"]] if rule.get("helpUri") else []
+        self.recommendation = _first_paragraph(_text(rule.get("help")) or _text(rule.get("fullDescription")))
+        self.is_security = (self.security_severity is not None or bool(cwe)
+                            or any(tag.lower() == "security" for tag in self.tags))
+
+
+_UNKNOWN_RULE = SarifRule({})
+
+
+class SarifRun:
+    """Contexte d'un run : outil (driver) et règles indexées"""
+
+    __slots__ = ("tool_name", "tool_version", "components", "rules_by_id", "default_level", "is_secret")
+
+    def __init__(self, tool: Any, fallback_name: str):
+        tool = tool if isinstance(tool, dict) else {}
+        driver = tool.get("driver") if isinstance(tool.get("driver"), dict) else {}
+        self.tool_name = intern_value(str(driver.get("name") or fallback_name))
+        self.tool_version = str(driver.get("semanticVersion") or driver.get("version") or "unknown")
+
+        # components[0] : driver, puis les extensions (toolComponent.index + 1)
+        self.components: List[List[SarifRule]] = [self._rules(driver)]
+        extensions = tool.get("extensions")
+        for extension in extensions if isinstance(extensions, list) else []:
+            self.components.append(self._rules(extension))
+        self.rules_by_id: Dict[str, SarifRule] = {}
+        for rules in self.components:
+            for rule in rules:
+                self.rules_by_id.setdefault(rule.id, rule)
+
+        # Nom du driver, à défaut l'outil demandé (ex: gitleaks)
+        name = self.tool_name.lower()
+        self.is_secret = any(secret in name for secret in SECRET_TOOLS)
+        self.default_level = TOOL_DEFAULT_LEVELS.get("gitleaks" if self.is_secret else name, DEFAULT_LEVEL)
+
+    @staticmethod
+    def _rules(component: Any) -> List[SarifRule]:
+        rules = component.get("rules") if isinstance(component, dict) else None
+        return [SarifRule(rule) for rule in rules if isinstance(rule, dict)] if isinstance(rules, list) else []
+
+    @property
+    def rule_count(self) -> int:
+        return sum(len(rules) for rules in self.components)
+
+    def rule_for(self, result: Dict[str, Any]) -> SarifRule:
+        reference = result.get("rule") if isinstance(result.get("rule"), dict) else {}
+        index = reference.get("index", result.get("ruleIndex"))
+        component = 0
+        tool_component = reference.get("toolComponent")
+        if isinstance(tool_component, dict) and isinstance(tool_component.get("index"), int):
+            component = tool_component["index"] + 1
+        if isinstance(index, int) and 0 <= component < len(self.components):
+            rules = self.components[component]
+            if 0 <= index < len(rules):
+                return rules[index]
+        rule_id = result.get("ruleId") or reference.get("id")
+        return self.rules_by_id.get(rule_id, _UNKNOWN_RULE)
+
+
+class SarifAdapter(ToolAdapter):
+    """runs[].results[] → SarifFinding (cf. docstring du module)"""
+
+    streaming = True
+
+    def __init__(self, normalizer):
+        super().__init__(normalizer)
+        self.runs: List[SarifRun] = []
+
+    # ------------------------------------------------------------------ en-tête
+
+    def tool_version(self, data: Dict[str, Any]) -> str:
+        runs = data.get("runs")
+        if isinstance(runs, list) and runs and isinstance(runs[0], dict):
+            driver = (runs[0].get("tool") or {}).get("driver") or {}
+            return str(driver.get("semanticVersion") or driver.get("version") or "unknown")
+        return "unknown"
+
+    def read_header(self, input_file: str) -> Dict[str, Any]:
+        """Champs de premier niveau et runs[].tool ; results remplacé par son nombre d'éléments"""
+        header: Dict[str, Any] = {"runs": []}
+        with open(input_file, "r", encoding="utf-8") as f:
+            reader = JsonStreamReader(f)
+            for key in reader.iter_object():
+                if key != "runs":
+                    header[key] = reader.read_value()
+                    continue
+                for _ in reader.iter_array():
+                    run: Dict[str, Any] = {"results": 0}
+                    for run_key in reader.iter_object():
+                        if run_key == "tool":
+                            run["tool"] = reader.read_value()
+                        elif run_key == "results":
+                            run["results"] = sum(1 for _ in reader.iter_array())
+                        else:
+                            # artifacts, invocations, taxonomies... potentiellement volumineux
+                            reader.skip_value()
+                    header["runs"].append(run)
+        return header
+
+    def describe(self, header: Dict[str, Any], normalized: Dict[str, Any]) -> None:
+        runs = header.get("runs") if isinstance(header.get("runs"), list) else []
+        self.runs = [SarifRun(run.get("tool") if isinstance(run, dict) else None, self.normalizer.tool)
+                     for run in runs]
+        normalized["metadata"]["sarif"] = {
+            "version": str(header.get("version", "")),
+            "runs": len(self.runs),
+            "driver": ",".join(dict.fromkeys(run.tool_name for run in self.runs)),
+            "driver_version": ",".join(dict.fromkeys(run.tool_version for run in self.runs)),
+            "rules": sum(run.rule_count for run in self.runs)
+        }
+        normalized["summary"]["suppressed"] = 0
+
+    # ---------------------------------------------------------------- résultats
+
+    def normalize(self, data: Dict[str, Any], normalized: Dict[str, Any]) -> Dict[str, Any]:
+        self.describe(data, normalized)
+        scan_end_time = normalized.get("@timestamp")
+        runs = data.get("runs") if isinstance(data.get("runs"), list) else []
+        for run, raw_run in zip(self.runs, runs):
+            for result in raw_run.get("results") or []:
+                finding = self._normalize_result(result, run, normalized["summary"], scan_end_time)
+                if finding is not None:
+                    normalized["vulnerabilities"].append(finding)
+        self.finalize(normalized)
+        return normalized
+
+    def iter_stream(self, input_file: str, normalized: Dict[str, Any]) -> Iterator[SarifFinding]:
+        scan_end_time = normalized.get("@timestamp")
+
+        with open(input_file, "r", encoding="utf-8") as f:
+            reader = JsonStreamReader(f)
+            for key in reader.iter_object():
+                if key != "runs":
+                    reader.skip_value()
+                    continue
+                for run_index in reader.iter_array():
+                    run = self.runs[run_index]
+                    for run_key in reader.iter_object():
+                        if run_key != "results":
+                            reader.skip_value()
+                            continue
+                        for _ in reader.iter_array():
+                            finding = self._normalize_result(reader.read_value(), run, normalized["summary"],
+                                                             scan_end_time)
+                            if finding is not None:
+                                yield finding
+
+    def finalize(self, normalized: Dict[str, Any]) -> None:
+        self.normalizer._update_severity_distribution(normalized["summary"])
+        normalized["summary"]["severity_distribution"]["info"] = normalized["summary"]["info"]
+
+    def _normalize_result(self, result: Any, run: SarifRun, summary: Dict[str, Any],
+                          scan_end_time: str) -> Optional[SarifFinding]:
+        """Résultat SARIF → finding (None si ignoré) et mise à jour des compteurs du summary"""
+
+        if not isinstance(result, dict) or result.get("kind", "fail") in IGNORED_KINDS:
+            return None
+        suppressions = result.get("suppressions")
+        if result.get("baselineState") == "absent" or (
+                isinstance(suppressions, list)
+                and any(isinstance(s, dict) and s.get("status", "accepted") == "accepted" for s in suppressions)):
+            summary["suppressed"] += 1
+            return None
+
+        rule = run.rule_for(result)
+        rule_id = str(result.get("ruleId") or rule.id or f"{run.tool_name}:unknown")
+        level = intern_value(str(result.get("level") or rule.level or run.default_level))
+        if rule.security_severity is not None:
+            severity = intern_value(severity_from_score(rule.security_severity))
+            score = rule.security_severity
+        else:
+            severity = intern_value(LEVEL_SEVERITY.get(level, "medium"))
+            score = self.normalizer._get_severity_score(severity)
+
+        summary["total_vulnerabilities"] += 1
+        if severity in summary:
+            summary[severity] += 1
+
+        uri, line = "", 0
+        locations = result.get("locations")
+        if isinstance(locations, list) and locations and isinstance(locations[0], dict):
+            physical = locations[0].get("physicalLocation") or {}
+            uri = str((physical.get("artifactLocation") or {}).get("uri") or "")
+            line = (physical.get("region") or {}).get("startLine") or 0
+        location = f"{uri}:{line}" if line else uri
+
+        fingerprints = result.get("fingerprints") or result.get("partialFingerprints")
+        fingerprint = ""
+        if isinstance(fingerprints, dict) and fingerprints:
+            fingerprint = str(fingerprints[sorted(fingerprints)[0]])
+
+        message = _text(result.get("message"))
+        is_security = run.is_secret or rule.is_security
+
+        return SarifFinding(
+            id=str(result.get("guid") or f"{rule_id}:{location}"),
+            rule_id=rule_id,
+            title=rule.title or message.split("\n", 1)[0],
+            message=message,
+            severity=severity,
+            original_severity=level,
+            tool_name=run.tool_name,
+            component=uri,
+            line=line,
+            cwe=rule.cwe,
+            tags=rule.tags,
+            references=rule.references,
+            fingerprint=fingerprint,
+            mitigation_recommendation=rule.recommendation or f"Review and fix: {message}",
+            unified=self.normalizer._create_unified_block(
+                tool_id=rule_id,
+                tool_type="secret" if run.is_secret else "code",
+                severity=severity,
+                score=score,
+                is_security_issue=is_security,
+                is_vulnerability=is_security,
+                category="security" if is_security else "quality",
+                is_fixable=bool(result.get("fixes")),
+                fix_version="",
+                can_auto_upgrade=False,
+                is_exploitable=False,
+                exploit_maturity="not-applicable",
+                component=uri,
+                location=location,
+                creation_time=None,
+                current_time=scan_end_time
+            )
+        )
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Sortie NDJSON en shards pour split_reports.py / normalize-reports.py
+
+Au lieu d'un *-split.ndjson unique (lu séquentiellement par un seul harvester
+Filebeat), les findings sont répartis dans des shards bornés en documents
+(--shard-docs) et/ou en taille (--shard-mb) :
+
+    trivy-backend-split-00001.ndjson[.gz]
+    trivy-backend-split-00002.ndjson[.gz]
+    ...
+    trivy-backend-split-report.ndjson[.gz]   parent vulnerability_report, publié en dernier
+
+- Chaque shard est écrit par son propre thread (<shard>.tmp → rename) : l'écriture
+  et la compression d'un shard terminé se poursuivent pendant que le suivant se
+  remplit (--shard-writers shards en cours au maximum)
+- Le parent est renommé après tous les shards : un rapport visible est complet
+- --gzip : shards compressés (.ndjson.gz). Filebeat 7.17 ne lit pas le gzip :
+  les inputs ne ramassent que les shards non compressés, les .gz servent à
+  l'archivage (ou à un Filebeat 8.x avec support gzip du filestream)
+- Les fichiers d'une exécution précédente de la même sortie (shards en trop, autre
+  format, NDJSON unique) sont supprimés
+
+Interface commune des sorties (cf. split_reports.NdjsonFileSink, es_bulk.BulkSink) :
+bind_report(header), write(doc), close() -> nb de documents, abort().
+"""
+
+import glob
+import gzip
+import os
+import queue
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from json_stream import encode_document, write_document
+
+# Morceaux transmis aux threads d'écriture (1 Mo), et nombre en attente par shard
+CHUNK_SIZE = 1 << 20
+QUEUE_CHUNKS = 8
+DEFAULT_WRITERS = 2
+GZIP_LEVEL = 6
+
+
+def shard_stem(output_file: str) -> str:
+    """trivy-backend-split.ndjson → trivy-backend-split"""
+    return output_file[:-len(".ndjson")] if output_file.endswith(".ndjson") else output_file
+
+
+class _ShardWriter(threading.Thread):
+    """Écrit un shard à partir des morceaux reçus, puis le renomme atomiquement"""
+
+    def __init__(self, path: str, compress: bool):
+        super().__init__(name=f"shard-{os.path.basename(path)}", daemon=True)
+        self.path = path
+        self.temp_path = path + ".tmp"
+        self.compress = compress
+        self.error: Optional[BaseException] = None
+        self.aborted = False
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(QUEUE_CHUNKS)
+        self.start()
+
+    def run(self) -> None:
+        try:
+            with open(self.temp_path, "wb") as raw:
+                out = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=GZIP_LEVEL, mtime=0) \
+                    if self.compress else raw
+                while True:
+                    chunk = self._queue.get()
+                    if chunk is None:
+                        break
+                    out.write(chunk)
+                if self.compress:
+                    out.close()
+            if self.aborted:
+                os.remove(self.temp_path)
+            else:
+                os.replace(self.temp_path, self.path)
+        except BaseException as e:
+            self.error = e
+            # Vide la file : le producteur ne doit pas rester bloqué sur put()
+            while self._queue.get() is not None:
+                pass
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+
+    def put(self, chunk: bytes) -> None:
+        if self.error is not None:
+            raise self.error
+        self._queue.put(chunk)
+
+    def finish(self) -> None:
+        self._queue.put(None)
+
+    def wait(self) -> None:
+        self.join()
+        if self.error is not None:
+            raise IOError(f"Écriture du shard {self.path}: {self.error}")
+
+
+class ShardedNdjsonSink:
+    """Findings répartis en shards NDJSON (éventuellement gzip), parent dans son propre fichier"""
+
+    def __init__(self, output_file: str, max_docs: Optional[int] = None, max_mb: Optional[float] = None,
+                 compress: bool = False, writers: int = DEFAULT_WRITERS):
+        self.stem = shard_stem(output_file)
+        self.max_docs = max_docs
+        self.max_bytes = int(max_mb * 1024 * 1024) if max_mb else None
+        self.compress = compress
+        self.writers = max(1, writers)
+        self.suffix = ".ndjson.gz" if compress else ".ndjson"
+        self.count = 0
+        self.shards: List[str] = []
+
+        self._current: Optional[_ShardWriter] = None
+        self._in_flight: List[_ShardWriter] = []
+        self._chunk = bytearray()
+        self._shard_docs = 0
+        self._shard_bytes = 0
+        self._report_path = f"{self.stem}-report{self.suffix}"
+        self._report_temp = None
+
+        output_dir = os.path.dirname(output_file)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        limits = []
+        if max_docs:
+            limits.append(f"{max_docs} documents")
+        if self.max_bytes:
+            limits.append(f"{max_mb:g} Mo")
+        print(f" Écriture des documents en shards {self.stem}-NNNNN{self.suffix} "
+              f"({' / '.join(limits) or 'sans limite'} par shard, {self.writers} en parallèle)")
+
+    def bind_report(self, header: Dict[str, Any]) -> None:
+        pass
+
+    def write(self, doc: Any) -> None:
+        if isinstance(doc, dict) and doc.get("doc_type") == "vulnerability_report":
+            self._write_report(doc)
+            self.count += 1
+            return
+        if self._current is None:
+            self._open_shard()
+        line = encode_document(doc, "vulnerabilities")
+        self._chunk += line
+        self._chunk += b"\n"
+        self._shard_docs += 1
+        self._shard_bytes += len(line) + 1
+        self.count += 1
+        if len(self._chunk) >= CHUNK_SIZE:
+            self._flush_chunk()
+        if ((self.max_docs and self._shard_docs >= self.max_docs)
+                or (self.max_bytes and self._shard_bytes >= self.max_bytes)):
+            self._close_shard()
+
+    def _write_report(self, doc: Dict[str, Any]) -> None:
+        """Le parent est sérialisé tout de suite (son spool peut être fermé ensuite), publié à close()"""
+        temp_path = self._report_path + ".tmp"
+        with open(temp_path, "wb") as raw:
+            out = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=GZIP_LEVEL, mtime=0) \
+                if self.compress else raw
+            write_document(doc, out, "vulnerabilities")
+            out.write(b"\n")
+            if self.compress:
+                out.close()
+        self._report_temp = temp_path
+
+    def _open_shard(self) -> None:
+        # Shards en cours bornés : on attend le plus ancien (mémoire et fichiers ouverts limités)
+        while len(self._in_flight) >= self.writers:
+            self._in_flight.pop(0).wait()
+        path = f"{self.stem}-{len(self.shards) + 1:05d}{self.suffix}"
+        self.shards.append(path)
+        self._current = _ShardWriter(path, self.compress)
+        self._in_flight.append(self._current)
+        self._shard_docs = 0
+        self._shard_bytes = 0
+
+    def _flush_chunk(self) -> None:
+        if self._chunk:
+            self._current.put(bytes(self._chunk))
+            self._chunk.clear()
+
+    def _close_shard(self) -> None:
+        self._flush_chunk()
+        self._current.finish()
+        self._current = None
+
+    def close(self) -> int:
+        if self._current is not None:
+            self._close_shard()
+        for writer in self._in_flight:
+            writer.wait()
+        self._in_flight = []
+        if self._report_temp is not None:
+            os.replace(self._report_temp, self._report_path)
+            self._report_temp = None
+        self._remove_stale()
+        print(f" {self.count} documents écrits ({len(self.shards)} shard(s) + rapport)")
+        print(f"Succès. Fichiers générés : {self.stem}-*{self.suffix}")
+        return self.count
+
+    def _remove_stale(self) -> None:
+        """Sorties précédentes de la même cible : shards au-delà des shards écrits, rapport
+        de l'autre format (gzip ou non), NDJSON unique d'une exécution sans shards"""
+        written = set(self.shards)
+        written.add(self._report_path)
+        pattern = re.compile(re.escape(os.path.basename(self.stem)) + r"(-\d{5}|-report)?\.ndjson(\.gz)?$")
+        for path in glob.glob(f"{glob.escape(self.stem)}*.ndjson*"):
+            if path not in written and pattern.match(os.path.basename(path)):
+                os.remove(path)
+
+    def abort(self) -> None:
+        for writer in self._in_flight:
+            writer.aborted = True
+            writer.finish()
+        for writer in self._in_flight:
+            writer.join()
+        self._in_flight = []
+        self._current = None
+        # Pas de rapport partiel : les shards déjà renommés sont retirés aussi
+        for path in self.shards + [self._report_temp or ""]:
+            if path and os.path.exists(path):
+                os.remove(path)
+        self._report_temp = None
+
+
+def add_shard_arguments(parser) -> None:
+    """Options CLI communes (split_reports.py, normalize-reports.py, batch_normalize.py)"""
+    parser.add_argument("--shard-docs", type=int, help="Sortie en shards : documents max par shard")
+    parser.add_argument("--shard-mb", type=float, help="Sortie en shards : taille max par shard (Mo, non compressé)")
+    parser.add_argument("--shard-writers", type=int, default=DEFAULT_WRITERS,
+                        help="Shards écrits en parallèle (défaut: %(default)s)")
+    parser.add_argument("--gzip", action="store_true", help="Shards compressés (.ndjson.gz, implique les shards)")
+
+
+def shard_options_from_args(args) -> Optional[Dict[str, Any]]:
+    """Options de ShardedNdjsonSink, None sans option de shard (sortie NDJSON unique)"""
+    if not (args.shard_docs or args.shard_mb or args.gzip):
+        return None
+    return {"max_docs": args.shard_docs, "max_mb": args.shard_mb,
+            "compress": args.gzip, "writers": args.shard_writers}
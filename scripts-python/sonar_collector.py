@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Collecte des issues SonarQube par l'API Web (remplace les curl + merge-sonar.py du Jenkinsfile)
+
+L'ancien stage ne lisait que la première page de api/issues/search (ps=500) et
+récupérait toutes les issues avant que le normaliseur n'écarte celles qui ne sont
+pas OPEN. Le collecteur :
+
+- filtre côté serveur (statuses=OPEN, types VULNERABILITY/BUG/CODE_SMELL) et
+  ajoute les hotspots à revoir (api/hotspots/search, status=TO_REVIEW) ;
+- parcourt toutes les pages en parallèle sur un pool de threads borné, chaque
+  thread gardant sa connexion HTTP persistante (SonarSession) ;
+- respecte la fenêtre de 10 000 résultats de l'API : une requête dont le total
+  dépasse la fenêtre est découpée par type, puis par sévérité, puis par
+  intervalle de date de création (bissection createdAfter/createdBefore) ;
+- livre les issues page par page, dans un ordre stable, au normaliseur
+  (`detailed_issues` du rapport brut est un itérateur) : rien n'est écrit sur disque,
+  sauf avec --save-raw (rapport brut recopié au fil de la collecte, pour archivage).
+
+Le rapport brut a la forme produite par merge-sonar.py (projectKey, projectName,
+status, detailed_issues, global_measures). Utilisé par normalize-reports.py :
+
+    python3 normalize-reports.py - out.json sonarqube '<metadata>' --sonar-project babyfoot-backend \\
+        --sonar-project-name "Babyfoot Backend" --split-output out-split.ndjson
+
+Identifiants : variables d'environnement SONAR_HOST_URL / SONAR_AUTH_TOKEN
+(posées par withSonarQubeEnv), jeton envoyé comme `curl -u TOKEN:`.
+"""
+
+import base64
+import http.client
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+ISSUE_TYPES = ("VULNERABILITY", "BUG", "CODE_SMELL")
+ISSUE_SEVERITIES = ("BLOCKER", "CRITICAL", "MAJOR", "MINOR", "INFO")
+MEASURE_KEYS = ("bugs", "vulnerabilities", "code_smells", "coverage", "duplicated_lines_density", "sqale_index",
+                "sqale_rating", "reliability_rating", "security_rating", "ncloc", "security_hotspots")
+
+# Limites de l'API Web : 500 résultats par page, p * ps <= 10 000
+MAX_PAGE_SIZE = 500
+RESULT_WINDOW = 10000
+DEFAULT_WORKERS = 4
+DEFAULT_TIMEOUT = 60
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+RETRYABLE_STATUSES = frozenset((429, 502, 503, 504))
+
+# Bornes de la bissection par date de création (createdAfter inclus, createdBefore exclu)
+EARLIEST_CREATION = datetime(2000, 1, 1, tzinfo=timezone.utc)
+MIN_DATE_SPAN = timedelta(seconds=1)
+
+# vulnerabilityProbability d'un hotspot → sévérité d'issue (compté à part par le normaliseur)
+HOTSPOT_SEVERITIES = {"HIGH": "CRITICAL", "MEDIUM": "MAJOR", "LOW": "MINOR"}
+
+
+class SonarError(Exception):
+    """Échec définitif d'une requête à l'API SonarQube"""
+
+
+class SonarSession:
+    """
+    Client HTTP partagé par les threads du pool : une connexion persistante par
+    thread (http.client n'est pas thread-safe), fermées ensemble par close().
+    """
+
+    def __init__(self, base_url: str, token: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES, backoff: float = DEFAULT_BACKOFF):
+        url = urlsplit(base_url if "://" in base_url else f"http://{base_url}")
+        if url.scheme not in ("http", "https"):
+            raise ValueError(f"URL SonarQube invalide: {base_url}")
+        self._scheme = url.scheme
+        self._host = url.hostname or "localhost"
+        self._port = url.port
+        self._prefix = url.path.rstrip("/")
+        self._timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self._headers = {"Accept": "application/json"}
+        if token:
+            credentials = base64.b64encode(f"{token}:".encode("utf-8")).decode("ascii")
+            self._headers["Authorization"] = f"Basic {credentials}"
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[http.client.HTTPConnection] = []
+        self.requests = 0
+
+    def get_json(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET sur l'API Web ; renvoi avec backoff si SonarQube est saturé"""
+        target = f"{self._prefix}/{path}?{urlencode(params)}"
+        attempt = 0
+        while True:
+            status, payload = self._request(target)
+            if status in RETRYABLE_STATUSES and attempt < self.max_retries:
+                time.sleep(self.backoff * (2 ** attempt))
+                attempt += 1
+                continue
+            if status >= 300:
+                raise SonarError(f"{path} HTTP {status}: {payload[:500].decode('utf-8', 'replace')}")
+            try:
+                return json.loads(payload)
+            except ValueError as e:
+                raise SonarError(f"Réponse invalide de {path}: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+
+    def _request(self, target: str) -> Tuple[int, bytes]:
+        """GET sur la connexion du thread (une reconnexion en cas de coupure)"""
+        for attempt in (0, 1):
+            conn = self._connect()
+            try:
+                conn.request("GET", target, headers=self._headers)
+                response = conn.getresponse()
+                payload = response.read()
+                with self._lock:
+                    self.requests += 1
+                return response.status, payload
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise SonarError(f"SonarQube injoignable ({self._host}): {e}")
+        raise AssertionError("unreachable")
+
+    def _connect(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self._scheme == "https" else http.client.HTTPConnection
+            conn = cls(self._host, self._port, timeout=self._timeout)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+
+def _sonar_date(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%S+0000")
+
+
+def hotspot_as_issue(hotspot: Dict[str, Any]) -> Dict[str, Any]:
+    """Hotspot à revoir sous la forme d'une issue SECURITY_HOTSPOT (comptée à part par le normaliseur)"""
+    return {
+        "key": hotspot.get("key", ""),
+        "rule": hotspot.get("ruleKey", ""),
+        "severity": HOTSPOT_SEVERITIES.get(str(hotspot.get("vulnerabilityProbability", "")).upper(), "MINOR"),
+        "component": hotspot.get("component", ""),
+        "line": hotspot.get("line"),
+        "message": hotspot.get("message", ""),
+        "status": "OPEN",
+        "type": "SECURITY_HOTSPOT",
+        "securityCategory": hotspot.get("securityCategory", ""),
+        "creationDate": hotspot.get("creationDate"),
+        "updateDate": hotspot.get("updateDate")
+    }
+
+
+class _Page:
+    """Page en cours de téléchargement ; `query` n'est posé que sur la première page d'une requête"""
+
+    __slots__ = ("future", "query")
+
+    def __init__(self, future: Future, query: Optional[Dict[str, Any]] = None):
+        self.future = future
+        self.query = query
+
+
+class SonarCollector:
+    """Issues OPEN et hotspots TO_REVIEW d'un projet, pages téléchargées en parallèle"""
+
+    def __init__(self, session: SonarSession, project_key: str, workers: int = DEFAULT_WORKERS,
+                 page_size: int = MAX_PAGE_SIZE, hotspots: bool = True, raw_file: Optional[str] = None):
+        self.session = session
+        self.raw_file = raw_file
+        self.project_key = project_key
+        self.workers = max(1, workers)
+        self.page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        self.hotspots = hotspots
+        self.issues = 0
+        self.queries = 0
+        self.truncated = 0
+        self.seen_keys: set = set()
+
+    def collect_report(self, project_name: str = "") -> Dict[str, Any]:
+        """
+        Rapport brut au format de merge-sonar.py. `detailed_issues` est un
+        itérateur : les pages sont téléchargées pendant la normalisation (et
+        recopiées dans `raw_file` si posé).
+        """
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            measures = pool.submit(self.session.get_json, "api/measures/component",
+                                   {"component": self.project_key, "metricKeys": ",".join(MEASURE_KEYS)})
+            gate = pool.submit(self.session.get_json, "api/qualitygates/project_status",
+                               {"projectKey": self.project_key})
+            try:
+                measures_data, gate_data = measures.result(), gate.result()
+            except Exception:
+                self.session.close()
+                raise
+        report = {
+            "projectKey": self.project_key,
+            "projectName": project_name or measures_data.get("component", {}).get("name", self.project_key),
+            "status": gate_data.get("projectStatus", {}).get("status", "UNKNOWN"),
+            "summary": {},
+            "detailed_issues": self.iter_issues(),
+            "global_measures": measures_data.get("component", {}).get("measures", [])
+        }
+        if self.raw_file:
+            header = {key: value for key, value in report.items() if key != "detailed_issues"}
+            report["detailed_issues"] = iter_saved_issues(header, report["detailed_issues"], self.raw_file)
+        return report
+
+    def iter_issues(self) -> Iterator[Dict[str, Any]]:
+        """Issues puis hotspots, page par page dans l'ordre des requêtes (doublons de pagination écartés)"""
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sonar")
+        try:
+            root = {"componentKeys": self.project_key, "types": ",".join(ISSUE_TYPES), "statuses": "OPEN"}
+            for issue in self._iter_pages(pool, "api/issues/search", "issues", root, splittable=True):
+                yield issue
+            if self.hotspots:
+                query = {"projectKey": self.project_key, "status": "TO_REVIEW"}
+                for hotspot in self._iter_pages(pool, "api/hotspots/search", "hotspots", query, splittable=False):
+                    yield hotspot_as_issue(hotspot)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            self.session.close()
+        print(f" SonarQube: {self.issues} issues/hotspots collectés ({self.queries} requêtes, "
+              f"{self.session.requests} appels API, {self.workers} threads)")
+        if self.truncated:
+            print(f"  Fenêtre de {RESULT_WINDOW} résultats non découpable : {self.truncated} issues non collectées")
+
+    def _fetch(self, path: str, query: Dict[str, Any], page: int) -> Dict[str, Any]:
+        params = {name: value for name, value in query.items() if not name.startswith("_")}
+        return self.session.get_json(path, dict(params, p=page, ps=self.page_size))
+
+    def _iter_pages(self, pool: ThreadPoolExecutor, path: str, key: str, root: Dict[str, Any],
+                    splittable: bool) -> Iterator[Dict[str, Any]]:
+        """
+        File ordonnée de pages : la première page d'une requête donne le total ;
+        les pages suivantes (ou les premières pages des sous-requêtes si le total
+        dépasse la fenêtre) sont soumises au pool et insérées en tête de file.
+        """
+        pending: Deque[_Page] = deque([self._submit_query(pool, path, root)])
+        while pending:
+            page = pending.popleft()
+            data = page.future.result()
+            if page.query is not None:
+                total = int(data.get("paging", {}).get("total", data.get("total", 0)) or 0)
+                subqueries = self._split(page.query, total) if splittable and total > RESULT_WINDOW else None
+                if subqueries:
+                    pending.extendleft(reversed([self._submit_query(pool, path, q) for q in subqueries]))
+                    continue
+                if total > RESULT_WINDOW:
+                    self.truncated += total - RESULT_WINDOW
+                last_page = -(-min(total, RESULT_WINDOW) // self.page_size)
+                pending.extendleft(reversed([_Page(pool.submit(self._fetch, path, page.query, number))
+                                             for number in range(2, last_page + 1)]))
+            for item in data.get(key, []):
+                item_key = item.get("key")
+                if item_key:
+                    if item_key in self.seen_keys:
+                        continue
+                    self.seen_keys.add(item_key)
+                self.issues += 1
+                yield item
+
+    def _submit_query(self, pool: ThreadPoolExecutor, path: str, query: Dict[str, Any]) -> _Page:
+        self.queries += 1
+        return _Page(pool.submit(self._fetch, path, query, 1), query)
+
+    def _split(self, query: Dict[str, Any], total: int) -> Optional[List[Dict[str, Any]]]:
+        """Sous-requêtes disjointes : par type, puis par sévérité, puis moitiés de l'intervalle de création"""
+        types = query["types"].split(",")
+        if len(types) > 1:
+            return [dict(query, types=issue_type) for issue_type in types]
+        if "severities" not in query:
+            return [dict(query, severities=severity) for severity in ISSUE_SEVERITIES]
+        after = query.get("_after", EARLIEST_CREATION)
+        before = query.get("_before", datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=1))
+        if before - after <= MIN_DATE_SPAN:
+            print(f"  {total} issues créées à la même seconde ({_sonar_date(after)}) : "
+                  f"seules les {RESULT_WINDOW} premières sont lisibles")
+            return None
+        middle = after + (before - after) // 2
+        middle = middle.replace(microsecond=0)
+        return [self._date_range(query, after, middle), self._date_range(query, middle, before)]
+
+    @staticmethod
+    def _date_range(query: Dict[str, Any], after: datetime, before: datetime) -> Dict[str, Any]:
+        return dict(query, _after=after, _before=before,
+                    createdAfter=_sonar_date(after), createdBefore=_sonar_date(before))
+
+
+def iter_saved_issues(header: Dict[str, Any], issues: Iterator[Dict[str, Any]],
+                      raw_file: str) -> Iterator[Dict[str, Any]]:
+    """
+    `issues` recopiées au fil de l'eau dans raw_file, rapport brut complet au format de
+    merge-sonar.py (`header` + detailed_issues) : <raw_file>.tmp renommé une fois la collecte terminée.
+    """
+    temp_file = raw_file + ".tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        try:
+            f.write(json.dumps(header, ensure_ascii=False)[:-1] + ', "detailed_issues": [')
+            for index, issue in enumerate(issues):
+                f.write((", " if index else "") + json.dumps(issue, ensure_ascii=False))
+                yield issue
+            f.write("]}")
+        except BaseException:
+            f.close()
+            os.remove(temp_file)
+            raise
+    os.replace(temp_file, raw_file)
+    print(f" Rapport brut SonarQube archivé : {raw_file}")
+
+
+def add_collector_arguments(parser) -> None:
+    """Options CLI de la collecte (normalize-reports.py)"""
+    parser.add_argument("--sonar-project", metavar="KEY",
+                        help="Collecte les issues du projet par l'API SonarQube (entrée `-`, outil sonarqube)")
+    parser.add_argument("--sonar-project-name", default="",
+                        help="Nom du projet dans le rapport (défaut: nom SonarQube du composant)")
+    parser.add_argument("--sonar-url", default=os.environ.get("SONAR_HOST_URL"),
+                        help="URL du serveur SonarQube (défaut: $SONAR_HOST_URL)")
+    parser.add_argument("--sonar-workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Requêtes de pages en parallèle (défaut: {DEFAULT_WORKERS})")
+    parser.add_argument("--sonar-no-hotspots", action="store_true",
+                        help="Ne pas collecter les hotspots TO_REVIEW")
+    parser.add_argument("--save-raw", metavar="JSON",
+                        help="Avec --sonar-project : écrit aussi le rapport brut collecté (archivage)")
+
+
+def collector_from_args(args) -> Optional[SonarCollector]:
+    if not args.sonar_project:
+        return None
+    session = SonarSession(args.sonar_url, os.environ.get("SONAR_AUTH_TOKEN"))
+    return SonarCollector(session, args.sonar_project, workers=args.sonar_workers,
+                          hotspots=not args.sonar_no_hotspots, raw_file=args.save_raw)
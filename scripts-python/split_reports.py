@@ -1,10 +1,25 @@
 #!/usr/bin/env python3
-import json
+import argparse
 import sys
 import os
-import uuid
-import copy
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple, Union
+
+from json_stream import JsonStreamReader, ArraySpool, write_document
+from json_codec import CODEC
+from es_bulk import add_bulk_arguments, sink_from_args
+from shard_sink import ShardedNdjsonSink, add_shard_arguments, shard_options_from_args
+from delta import DeltaTracker, resolve_previous_report
+from findings import as_plain
+from rollups import iter_rollup_documents
+from lifecycle_store import iter_resolved_documents
+from ref_dictionary import ReferenceDictionary, add_dictionary_argument
+from projection import FieldProjection, FindingIndex, add_projection_arguments, load_projection
+from doc_ids import DocumentIds, report_document_id
+import perf
+
+# Tampon d'écriture NDJSON (1 Mo)
+WRITE_BUFFER_SIZE = 1 << 20
 
 def flatten(prefix: str, data: Dict, output: Dict):
     """
@@ -23,110 +38,485 @@ def flatten(prefix: str, data: Dict, output: Dict):
 def ensure_dict(obj):
     return obj if isinstance(obj, dict) else {}
 
-def split_and_write(input_file: str, output_file: str):
+
+def report_tool(report_data: Dict[str, Any]) -> str:
+    """metadata.tool du rapport normalisé ('' si absent)"""
+    return str(ensure_dict(report_data.get("metadata")).get("tool") or "")
+
+# Blocs du parent injectés dans chaque finding (préfixe = clé du parent)
+PARENT_CONTEXT_KEYS = ("metadata", "service", "tool", "build", "git", "pipeline")
+
+
+class ParentContext:
+    """
+    Contexte parent (metadata/service/tool/build/git/pipeline) aplati une seule
+    fois par rapport : identique pour tous les findings, il est fusionné tel quel
+    dans chaque document (dict) ou recollé sous forme de fragment JSON pré-sérialisé (bytes).
+    `projection` (projection.FieldProjection) s'applique au contexte puis à chaque finding,
+    `ids` (doc_ids.DocumentIds) fournit le doc_id de chaque document.
+    """
+
+    __slots__ = ("fields", "fragment", "projection", "ids")
+
+    def __init__(self, report_data: Dict[str, Any], projection: Optional[FieldProjection] = None,
+                 ids: Optional[DocumentIds] = None):
+        flat: Dict[str, Any] = {}
+        for key in PARENT_CONTEXT_KEYS:
+            block = ensure_dict(report_data.get(key, {}))
+            if block:
+                flatten(key, block, flat)
+        if projection is not None:
+            projection.apply(flat)
+        self.projection = projection
+        self.ids = ids
+        self.fields = MappingProxyType(flat)
+        # b'"metadata.tool": "trivy", ...' sans accolades (b'' si contexte vide)
+        self.fragment = CODEC.dumpb(flat)[1:-1]
+
+
+def _finding_fields(vuln_item: Any, report_id: str, delta_status: Optional[str] = None,
+                    dictionary: Optional[ReferenceDictionary] = None,
+                    projection: Optional[FieldProjection] = None,
+                    doc_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Champs propres au finding (vulnerability.* dont vulnerability.unified.*),
+    filtrés par `projection` puis encodés avec `dictionary`
+    """
+    child_doc = {
+        "doc_type": "vulnerability_finding",
+        "report_id": report_id
+    }
+    if doc_id:
+        child_doc["doc_id"] = doc_id
+    if delta_status:
+        child_doc["delta_status"] = delta_status
+    # flatten vuln fields under vulnerability.* (la source n'est pas modifiée)
+    vuln_item = as_plain(vuln_item)
+    if isinstance(vuln_item, dict):
+        flatten("vulnerability", vuln_item, child_doc)
+    if projection is not None:
+        projection.apply(child_doc)
+    if dictionary is not None:
+        dictionary.encode(child_doc)
+    return child_doc
+
+
+def _finding_id(vuln_item: Any, context: ParentContext) -> Optional[str]:
+    return context.ids.finding_id(vuln_item) if context.ids is not None else None
+
+
+def build_finding_document(vuln_item: Any, report_id: str, context: ParentContext,
+                           delta_status: Optional[str] = None,
+                           dictionary: Optional[ReferenceDictionary] = None) -> Dict[str, Any]:
+    """Construit un document finding aplati (dict)"""
+    child_doc = _finding_fields(vuln_item, report_id, delta_status, dictionary, context.projection,
+                                _finding_id(vuln_item, context))
+    child_doc.update(context.fields)
+    return child_doc
+
+
+def serialize_finding_document(vuln_item: Any, report_id: str, context: ParentContext,
+                               delta_status: Optional[str] = None,
+                               dictionary: Optional[ReferenceDictionary] = None) -> bytes:
+    """
+    Ligne JSON du finding, identique à CODEC.dumpb(build_finding_document(...)) :
+    seuls les champs du finding sont sérialisés, le fragment parent est recollé.
+    """
+    serialized = CODEC.dumpb(_finding_fields(vuln_item, report_id, delta_status, dictionary, context.projection,
+                                             _finding_id(vuln_item, context)))
+    if not context.fragment:
+        return serialized
+    return b"".join((serialized[:-1], CODEC.item_separator, context.fragment, b"}"))
+
+
+def _iter_finding_documents(findings: Iterable[Any], report_id: str, context: ParentContext,
+                            delta=None, dictionary: Optional[ReferenceDictionary] = None,
+                            report_data: Optional[Dict[str, Any]] = None, cross_tool=None) -> Iterator[bytes]:
+    """
+    Findings sérialisés. Avec `delta` (delta.DeltaTracker), seuls les findings
+    nouveaux sont produits, suivis des findings corrigés depuis le build précédent,
+    clôturés à la date du rapport courant (`report_data`, lu une fois `findings`
+    épuisé : @timestamp et liste `resolved` de la base de cycle de vie).
+    `dictionary` : encodage des références (ref_dictionary.py).
+    `cross_tool` (dedup.CrossToolView) : seuls les findings canoniques dont ce rapport
+    a la charge sont produits, summary de `report_data` mis à jour à l'épuisement.
+    """
+    report_data = ensure_dict(report_data)
+    for status, vuln_item in _iter_classified(findings, delta, cross_tool, report_data):
+        yield serialize_finding_document(vuln_item, report_id, context, status, dictionary)
+
+
+def _iter_classified(findings: Iterable[Any], delta, cross_tool,
+                     report_data: Dict[str, Any]) -> Iterator[Tuple[Optional[str], Any]]:
+    """(delta_status, finding) à produire : filtre delta puis sélection canonique inter-outils"""
+    if delta is None and cross_tool is None:
+        for vuln_item in findings:
+            yield None, vuln_item
+        return
+
+    for vuln_item in findings:
+        # Tous les findings sont classés (persisting exact), y compris ceux cédés à un autre outil
+        status = delta.classify(vuln_item) if delta is not None else None
+        if cross_tool is not None:
+            vuln_item = cross_tool.canonical(vuln_item)
+            if vuln_item is None:
+                continue
+        if status in (None, "new"):
+            yield status, vuln_item
+    if cross_tool is not None and isinstance(report_data.get("summary"), dict):
+        cross_tool.update_summary(report_data["summary"])
+    if delta is not None:
+        for vuln_item in delta.iter_fixed(report_data.get("@timestamp"), report_data.get("resolved")):
+            yield "fixed", vuln_item
+
+
+def _iter_report_tail(report_data: Dict[str, Any], report_id: str, context: ParentContext,
+                      dictionary: Optional[ReferenceDictionary]) -> Iterator[Dict[str, Any]]:
+    """
+    Documents écrits après les findings, avant le parent : dictionnaire des références,
+    agrégats, findings résolus par ce build (base de cycle de vie, liste `resolved`)
+    """
+    ids = context.ids
+    if dictionary is not None:
+        for doc in dictionary.iter_documents(report_id, context.fields):
+            if ids is not None:
+                doc["doc_id"] = ids.document_id("reference_dictionary", doc["dictionary.offset"])
+            yield doc
+    for doc in iter_rollup_documents(report_data.get("rollups"), report_id, context.fields):
+        if ids is not None:
+            doc["doc_id"] = ids.document_id("vulnerability_rollup", doc["rollup.dimension"])
+        yield doc
+    for doc in iter_resolved_documents(report_data.get("resolved"), report_id, context.fields):
+        if ids is not None:
+            doc["doc_id"] = ids.document_id("resolved_finding", doc["resolved"].get("fingerprint"))
+        yield doc
+
+
+def _parent_document(report_data: Dict[str, Any], report_id: str, delta=None,
+                     index: Optional[FindingIndex] = None) -> Dict[str, Any]:
+    """
+    Parent vulnerability_report (copie superficielle, sans `rollups` ni `resolved`,
+    émis en documents à part). Avec `index` (parent allégé), `vulnerabilities` est
+    remplacé par le bloc `findings`.
+    """
+    parent_doc = dict(report_data)
+    parent_doc.pop("rollups", None)
+    parent_doc.pop("resolved", None)
+    if index is not None:
+        parent_doc.pop("vulnerabilities", None)
+        parent_doc["findings"] = index.as_dict()
+    parent_doc["report_id"] = report_id
+    parent_doc["doc_id"] = report_id
+    parent_doc["doc_type"] = "vulnerability_report"
+    if delta is not None:
+        parent_doc["delta"] = delta.summary()
+    return parent_doc
+
+
+def iter_split_documents(report_data: Dict[str, Any], report_id: str, delta=None,
+                         dictionary: Optional[ReferenceDictionary] = None,
+                         projection: Optional[FieldProjection] = None,
+                         lean_parent: bool = False, cross_tool=None) -> Iterator[Union[bytes, Dict[str, Any]]]:
+    """
+    Génère les documents NDJSON au fil de l'eau, sans copie profonde :
+    - N documents findings (aplatis, lignes JSON), construits un par un
+    - avec `dictionary`, les documents reference_dictionary (cf. ref_dictionary.py)
+    - les documents vulnerability_rollup tirés de `rollups` (cf. rollups.py)
+    - les documents resolved_finding tirés de `resolved` (cf. lifecycle_store.py)
+    - 1 document parent vuln_report (sans `rollups` ni `resolved`), produit en dernier
+
+    report_data est en lecture seule : le parent est une copie superficielle.
+    `delta` : delta.DeltaTracker (mode delta, cf. _iter_finding_documents).
+    `projection` : champs émis (projection.FieldProjection), `lean_parent` : parent
+    sans `vulnerabilities` (cf. projection.py). `cross_tool` : dedup.CrossToolView
+    (findings canoniques inter-outils, summary du rapport mis à jour en place).
     """
-    - Produit 1 document parent vuln_report (intact)
+    vulnerabilities = report_data.get("vulnerabilities", [])
+
+    if not (isinstance(vulnerabilities, list) and len(vulnerabilities) > 0):
+        print(" Aucune vulnérabilité trouvée dans ce rapport.")
+        vulnerabilities = []
+    else:
+        print(f" Génération de {len(vulnerabilities)} findings...")
+    context = ParentContext(report_data, projection, DocumentIds(report_id, report_tool(report_data)))
+    index = FindingIndex(report_tool(report_data)) if lean_parent else None
+    if vulnerabilities or delta is not None:
+        findings = index.collect(vulnerabilities) if index is not None else vulnerabilities
+        yield from perf.timed_iter(_iter_finding_documents(findings, report_id, context, delta, dictionary,
+                                                           report_data, cross_tool), "flatten")
+    yield from _iter_report_tail(report_data, report_id, context, dictionary)
+    yield _parent_document(report_data, report_id, delta, index)
+
+
+def iter_split_documents_stream(input_file: str, report_id: str, header: Optional[Dict[str, Any]] = None,
+                                delta=None, dictionary: Optional[ReferenceDictionary] = None,
+                                projection: Optional[FieldProjection] = None, lean_parent: bool = False,
+                                cross_tool=None) -> Iterator[Union[bytes, Dict[str, Any]]]:
+    """
+    Variante en flux de iter_split_documents (mémoire constante) :
+    le rapport normalisé n'est jamais chargé en entier. Les vulnérabilités
+    sont décodées une par une ; chacune produit son finding et est recopiée
+    dans un spool disque qui sert à écrire le parent intact en dernier
+    (pas de spool avec `lean_parent`).
+    `header` : résultat de read_report_header si déjà lu.
+    """
+    if header is None:
+        header = read_report_header(input_file)
+
+    count = header.get("vulnerabilities", 0)
+    if count:
+        print(f" Génération de {count} findings...")
+    else:
+        print(" Aucune vulnérabilité trouvée dans ce rapport.")
+
+    findings = perf.timed_iter(_iter_report_vulnerabilities(input_file), "load")
+    if lean_parent:
+        yield from iter_documents_from_findings(header, findings, report_id, None, delta, dictionary,
+                                                projection, lean_parent, cross_tool)
+        return
+    with ArraySpool(os.path.dirname(os.path.abspath(input_file))) as spool:
+        yield from iter_documents_from_findings(header, findings, report_id, spool, delta, dictionary, projection,
+                                                cross_tool=cross_tool)
+
+
+def _iter_report_vulnerabilities(input_file: str) -> Iterator[Any]:
+    with open(input_file, "r", encoding="utf-8") as f:
+        reader = JsonStreamReader(f)
+        for key in reader.iter_object():
+            if key != "vulnerabilities":
+                reader.skip_value()
+                continue
+            yield from reader.iter_items()
+
+
+def iter_documents_from_findings(header: Dict[str, Any], findings: Iterable[Any], report_id: str,
+                                 spool: Optional[ArraySpool], delta=None,
+                                 dictionary: Optional[ReferenceDictionary] = None,
+                                 projection: Optional[FieldProjection] = None,
+                                 lean_parent: bool = False, cross_tool=None) -> Iterator[Union[bytes, Dict[str, Any]]]:
+    """
+    Documents NDJSON à partir d'un flux de findings (mode fusionné normalize+split).
+
+    `header` est le rapport sans ses vulnérabilités : son contexte (metadata...)
+    doit être complet avant le premier finding, summary/metrics/rollups peuvent
+    l'être à l'épuisement de `findings`. Chaque finding est recopié dans `spool`,
+    qui remplace `vulnerabilities` dans le parent produit en dernier, après les
+    documents reference_dictionary, vulnerability_rollup et
+    resolved_finding. Avec `lean_parent`,
+    le parent porte l'index des findings à la place (`spool` facultatif).
+    """
+    context = ParentContext(header, projection, DocumentIds(report_id, report_tool(header)))
+    if spool is not None:
+        findings = perf.timed_iter(_spooled(findings, spool), "serialize")
+    index = FindingIndex(report_tool(header)) if lean_parent else None
+    if index is not None:
+        findings = index.collect(findings)
+    yield from perf.timed_iter(_iter_finding_documents(findings, report_id, context, delta, dictionary, header,
+                                                       cross_tool), "flatten")
+    yield from _iter_report_tail(header, report_id, context, dictionary)
+
+    parent_doc = _parent_document(header, report_id, delta, index)
+    if index is None and "vulnerabilities" in parent_doc:
+        parent_doc["vulnerabilities"] = spool
+    yield parent_doc
+
+
+def _spooled(findings: Iterable[Any], spool: ArraySpool) -> Iterator[Any]:
+    for vuln_item in findings:
+        spool.append(vuln_item)
+        yield vuln_item
+
+
+class NdjsonFileSink:
+    """
+    Sortie par défaut des documents : <output>.tmp (gros tampon) puis
+    renommage atomique (Filebeat ignore les .tmp).
+
+    Interface commune des sorties (cf. es_bulk.BulkSink) :
+    bind_report(header), write(doc), close() -> nb de documents, abort().
+    """
+
+    def __init__(self, output_file: str):
+        self.output_file = output_file
+        self.temp_output_file = output_file + ".tmp"
+        self.count = 0
+        print(f" Écriture des documents dans {self.temp_output_file}...")
+        self._fp = open(self.temp_output_file, "wb", buffering=WRITE_BUFFER_SIZE)
+
+    def bind_report(self, header: Dict[str, Any]) -> None:
+        pass
+
+    def write(self, doc: Union[bytes, Dict[str, Any]]) -> None:
+        write_document(doc, self._fp, "vulnerabilities")
+        self._fp.write(b"\n")
+        self.count += 1
+
+    def close(self) -> int:
+        self._fp.close()
+        if os.path.exists(self.output_file):
+            os.remove(self.output_file)
+        os.rename(self.temp_output_file, self.output_file)
+        print(f" {self.count} documents écrits")
+        print(f"Succès. Fichier généré : {self.output_file}")
+        return self.count
+
+    def abort(self) -> None:
+        self._fp.close()
+        if os.path.exists(self.temp_output_file):
+            os.remove(self.temp_output_file)
+
+
+def write_documents(documents: Iterable[Union[bytes, Dict[str, Any]]], sink) -> int:
+    """Envoie chaque document vers la sortie dès qu'il est produit. Retourne le nombre de documents."""
+    try:
+        # Temps exclusif : production des documents (flatten, normalize...) comptée à part
+        with perf.stage("write"):
+            for doc in documents:
+                sink.write(doc)
+        with perf.stage("fsync_rename"):
+            count = sink.close()
+        perf.count("documents", count)
+        return count
+    except BaseException:
+        sink.abort()
+        raise
+
+
+def write_ndjson_atomic(documents: Iterable[Union[bytes, Dict[str, Any]]], output_file: str) -> int:
+    """
+    Écrit chaque document (dict ou ligne JSON déjà sérialisée) dès qu'il est
+    produit dans <output>.tmp (gros tampon),
+    puis renomme atomiquement. Retourne le nombre de documents écrits.
+    """
+    return write_documents(documents, NdjsonFileSink(output_file))
+
+
+def read_report_header(input_file: str) -> Dict[str, Any]:
+    """Pré-lecture des champs du parent (vulnerabilities sauté, remplacé par son nombre d'éléments)"""
+    header: Dict[str, Any] = {}
+    with open(input_file, "r", encoding="utf-8") as f:
+        reader = JsonStreamReader(f)
+        for key in reader.iter_object():
+            if key == "vulnerabilities":
+                header[key] = sum(1 for _ in reader.iter_array())
+            else:
+                header[key] = reader.read_value()
+    return header
+
+
+def split_and_write(input_file: str, output_file: str, stream: bool = False, sink=None,
+                    delta_previous: Optional[str] = None, ref_dictionary: bool = False,
+                    projection: Optional[str] = None, lean_parent: bool = False, cross_tool=None):
+    """
+    - Produit 1 document parent vuln_report (intact, ou allégé avec lean_parent)
     - Produit N documents findings (aplatis)
+    - Produit les documents vulnerability_rollup du rapport (`rollups`, cf. rollups.py)
+      et resolved_finding des findings clôturés par ce build (`resolved`, cf. lifecycle_store.py)
       - Tous les champs du finding sont à la racine et préfixés :
          - 'vulnerability.*' pour champs venant du vuln element
          - 'metadata.*' pour métadonnées du parent (si présentes)
          - 'service.*' et 'tool.*' (si présents au parent)
-      - Ajoute report_id sur parent ET sur chaque finding (report_id)
+      - Ajoute report_id sur parent ET sur chaque finding (report_id), et doc_id
+        (_id du document) sur chaque document : identifiants stables d'une
+        exécution à l'autre (cf. doc_ids.py)
+    - Chaque finding est écrit dès sa construction, le parent en dernier
+    - stream=True : le rapport normalisé est lu en flux (mémoire constante)
+    - sink : sortie des documents (défaut : NDJSON atomique dans output_file,
+      shard_sink.ShardedNdjsonSink pour des shards, ou es_bulk.BulkSink pour
+      envoyer directement vers Elasticsearch)
+    - delta_previous : mode delta, rapport normalisé du build précédent
+      ("auto" : même chemin dans le build précédent, cf. delta.py)
+    - ref_dictionary : références/recommandations des findings remplacées par des
+      identifiants, table dans des documents reference_dictionary (cf. ref_dictionary.py)
+    - projection : fichier de règles allow/deny des champs émis, par outil ;
+      lean_parent : parent sans `vulnerabilities`, avec l'index des findings (cf. projection.py)
+    - cross_tool : dedup.CrossToolView, fusion Snyk/Trivy d'un service (cf. batch_normalize.py) :
+      seuls les findings canoniques de ce rapport sont émis, avec `sources`, et le summary
+      du parent compte les findings bruts et dédupliqués
+    - Retourne le rapport lu (en-tête seul avec stream=True)
     """
     try:
-        print(f" Lecture du rapport normalisé: {input_file}")
-        with open(input_file, "r", encoding="utf-8") as f:
-            report_data = json.load(f)
+        perf.count("input_bytes", os.path.getsize(input_file))
+        if stream:
+            print(f" Lecture en flux du rapport normalisé: {input_file}")
+            with perf.stage("load"):
+                report_data = read_report_header(input_file)
+        else:
+            print(f" Lecture du rapport normalisé: {input_file}")
+            with open(input_file, "rb") as f, perf.stage("load"):
+                report_data = CODEC.loads(f.read())
     except Exception as e:
         print(f"Erreur de lecture/parsing du fichier {input_file}: {e}")
         sys.exit(1)
 
-    # --- 1) assigner report_id (ne pas muter report_data initial)
-    report_id = str(uuid.uuid4())
-    report_data_with_id = copy.deepcopy(report_data)
-    report_data_with_id["report_id"] = report_id
-
-    vulnerabilities = report_data_with_id.get("vulnerabilities", [])
-    output_documents = []
-
-    # --- 2) préparer parent doc (intact)
-    parent_doc = copy.deepcopy(report_data_with_id)
-    parent_doc["doc_type"] = "vulnerability_report"
-
-    # --- 3) creation des findings aplatis
-    if isinstance(vulnerabilities, list) and len(vulnerabilities) > 0:
-        print(f" Génération de {len(vulnerabilities)} findings...")
-        # pre-extract some parent-level metadata to inject into each finding:
-        parent_metadata = ensure_dict(report_data_with_id.get("metadata", {}))
-        parent_service = ensure_dict(report_data_with_id.get("service", {}))
-        parent_tool = ensure_dict(report_data_with_id.get("tool", {}))
-        # also include build, git, pipeline top-level if exist
-        parent_build = ensure_dict(report_data_with_id.get("build", {}))
-        parent_git = ensure_dict(report_data_with_id.get("git", {}))
-        parent_pipeline = ensure_dict(report_data_with_id.get("pipeline", {}))
-
-        for vuln_item in vulnerabilities:
-            vuln_copy = copy.deepcopy(vuln_item)  # safety
-            child_doc = {
-                "doc_type": "vulnerability_finding",
-                "report_id": report_id
-            }
-
-            # flatten vuln fields under vulnerability.*
-            if isinstance(vuln_copy, dict):
-                flatten("vulnerability", vuln_copy, child_doc)
-
-            # ensure unified is also flattened under vulnerability.unified.* (no duplication)
-            unified = vuln_copy.get("unified") if isinstance(vuln_copy, dict) else None
-            if isinstance(unified, dict):
-                flatten("vulnerability.unified", unified, child_doc)
-
-            # Inject parent metadata into the finding under 'metadata.*'
-            if parent_metadata:
-                flatten("metadata", parent_metadata, child_doc)
-
-            # also inject parent service/tool/build/git/pipeline in explicit fields
-            if parent_service:
-                flatten("service", parent_service, child_doc)
-            if parent_tool:
-                flatten("tool", parent_tool, child_doc)
-            if parent_build:
-                flatten("build", parent_build, child_doc)
-            if parent_git:
-                flatten("git", parent_git, child_doc)
-            if parent_pipeline:
-                flatten("pipeline", parent_pipeline, child_doc)
-
-            # keep the parent report_id in child (already set)
-            child_doc["report_id"] = report_id
-
-            output_documents.append(child_doc)
-    else:
-        print(" Aucune vulnérabilité trouvée dans ce rapport.")
+    if lean_parent and "resolved" not in report_data:
+        # Sans `vulnerabilities` au parent, seuls les documents resolved_finding portent les résolutions
+        print(f"Erreur : --lean-parent nécessite un rapport normalisé avec --state-dir "
+              f"(liste `resolved`): {input_file}")
+        sys.exit(1)
 
-    # --- 4) append parent doc at the end (intact)
-    output_documents.append(parent_doc)
+    report_id = report_document_id(report_data)
+    try:
+        field_projection = load_projection(projection, report_tool(report_data))
+    except (OSError, ValueError) as e:
+        print(f"Erreur de lecture des règles de projection {projection}: {e}")
+        sys.exit(1)
 
-    # --- 5) write NDJSON atomically
-    temp_output_file = output_file + ".tmp"
     try:
-        print(f" Écriture de {len(output_documents)} documents dans {temp_output_file}...")
-        with open(temp_output_file, "w", encoding="utf-8") as f:
-            for doc in output_documents:
-                f.write(json.dumps(doc, ensure_ascii=False) + "\n")
-
-        if os.path.exists(output_file):
-            os.remove(output_file)
-        os.rename(temp_output_file, output_file)
-        print(f"Succès. Fichier généré : {output_file}")
+        if sink is None:
+            sink = NdjsonFileSink(output_file)
+        sink.bind_report(report_data)
+        delta = None
+        if delta_previous:
+            delta = DeltaTracker(report_tool(report_data), resolve_previous_report(delta_previous, input_file))
+        dictionary = ReferenceDictionary() if ref_dictionary else None
+        if stream:
+            documents = iter_split_documents_stream(input_file, report_id, report_data, delta, dictionary,
+                                                    field_projection, lean_parent, cross_tool)
+        else:
+            documents = iter_split_documents(report_data, report_id, delta, dictionary, field_projection, lean_parent,
+                                             cross_tool)
+        write_documents(documents, sink)
     except Exception as e:
         print(f"Erreur d'écriture : {e}")
-        if os.path.exists(temp_output_file):
-            os.remove(temp_output_file)
         sys.exit(1)
+    return report_data
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="split_reports.py",
+        usage="python3 split_reports.py <input_json> <output_ndjson> [--stream] [--delta-previous JSON|auto] "
+              "[--ref-dictionary] [--lean-parent] [--projection JSON] [--shard-docs N] [--shard-mb MB] [--gzip] [--es-url URL] "
+              "[--profile [--profile-cpu] [--profile-memory]]"
+    )
+    parser.add_argument("input_file")
+    parser.add_argument("output_file", help="NDJSON de sortie (ignoré avec --es-url)")
+    parser.add_argument("--stream", action="store_true", help="Lecture du rapport normalisé en flux")
+    parser.add_argument("--delta-previous", metavar="JSON|auto",
+                        help="Mode delta : n'émettre que les findings nouveaux/corrigés par rapport à ce "
+                             "rapport normalisé (auto : même fichier dans le build précédent)")
+    add_dictionary_argument(parser)
+    add_projection_arguments(parser)
+    add_shard_arguments(parser)
+    add_bulk_arguments(parser)
+    perf.add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python3 split_reports.py <input_json> <output_ndjson>")
+    args = parse_args(sys.argv[1:])
+    if args.profile:
+        perf.start("split_reports", args.profile_cpu, args.profile_memory)
+    bulk_sink = sink_from_args(args)
+    shard_options = shard_options_from_args(args)
+    sink = bulk_sink
+    if sink is None and shard_options:
+        sink = ShardedNdjsonSink(args.output_file, **shard_options)
+    report_data = split_and_write(args.input_file, args.output_file, stream=args.stream, sink=sink,
+                                  delta_previous=args.delta_previous, ref_dictionary=args.ref_dictionary,
+                                  projection=args.projection, lean_parent=args.lean_parent)
+    if args.profile:
+        perf.finish(report_data, args.output_file, "stream" if args.stream else "memory")
+    if bulk_sink is not None and bulk_sink.failed:
         sys.exit(1)
-    split_and_write(sys.argv[1], sys.argv[2])
@@ -0,0 +1,87 @@
+"""
+Serveur HTTP local pour les tests (stub d'Elasticsearch, de SonarQube...)
+
+Chaque requête est passée à `handler(request)` qui retourne (statut, corps) ;
+le corps est un objet JSON ou des octets. Connexions HTTP/1.1 persistantes :
+`connections` compte les connexions TCP ouvertes par les clients.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+class StubRequest:
+    __slots__ = ("method", "path", "query", "headers", "body")
+
+    def __init__(self, method: str, target: str, headers, body: bytes):
+        url = urlsplit(target)
+        self.method = method
+        self.path = url.path
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self.headers = headers
+        self.body = body
+
+
+class StubServer:
+    """Serveur démarré dans un thread (gestionnaire de contexte), URL dans `url`"""
+
+    def __init__(self, handler: Callable[[StubRequest], Tuple[int, Any]]):
+        self.handler = handler
+        self.requests: List[StubRequest] = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request = StubRequest(self.command, self.path, self.headers, self.rfile.read(length))
+                with stub._lock:
+                    stub.requests.append(request)
+                status, body = stub.handler(request)
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def strict_json(data: bytes) -> Dict[str, Any]:
+    """json.loads qui rejette les clés dupliquées (comme Elasticsearch)"""
+    def pairs(items):
+        keys = [key for key, _ in items]
+        duplicates = sorted({key for key in keys if keys.count(key) > 1})
+        if duplicates:
+            raise ValueError(f"clés dupliquées {duplicates}")
+        return dict(items)
+    return json.loads(data, object_pairs_hook=pairs)
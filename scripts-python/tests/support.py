@@ -0,0 +1,47 @@
+"""
+Utilitaires communs des tests : chemins d'import, métadonnées de build, normaliseur
+"""
+
+import importlib.util
+import json
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.dirname(TESTS_DIR)
+for path in (SCRIPTS_DIR, os.path.join(SCRIPTS_DIR, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+METADATA = {
+    "service": "backend", "build_id": "42", "scan_type": "container",
+    "scan_start_time": 1737453600000, "scan_end_time": 1737453660000,
+    "code_introduction_time": 1737450000000, "git_commit": "abc1234", "git_branch": "main",
+    "git_author": "dev@example.com", "environment": "test"
+}
+
+
+def load_normalizer():
+    """Module normalize-reports.py (nom de fichier non importable tel quel)"""
+    spec = importlib.util.spec_from_file_location("normalize_reports", os.path.join(SCRIPTS_DIR, "normalize-reports.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def drop_vulnerabilities(raw_file: str, output_file: str, every: int) -> int:
+    """Copie du rapport Trivy sans un finding sur `every` (corrigés au build suivant), retourne leur nombre"""
+    with open(raw_file, encoding="utf-8") as f:
+        raw = json.load(f)
+    dropped = 0
+    for result in raw["Results"]:
+        kept = []
+        for index, vuln in enumerate(result.get("Vulnerabilities") or []):
+            if index % every:
+                kept.append(vuln)
+            else:
+                dropped += 1
+        result["Vulnerabilities"] = kept
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(raw, f)
+    return dropped
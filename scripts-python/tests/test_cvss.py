@@ -0,0 +1,88 @@
+"""
+Scores de base CVSS v3.0 / v3.1 calculés depuis les vecteurs (cvss.py)
+
+    python3 -m pytest tests/test_cvss.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from support import METADATA, load_normalizer
+from cvss import CvssScorer, _roundup_v30, _roundup_v31, base_score
+
+# Vecteurs et scores de base du calculateur FIRST
+REFERENCE_VECTORS = {
+    "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H": 9.8,
+    "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:C/C:H/I:H/A:H": 10.0,
+    "CVSS:3.1/AV:N/AC:L/PR:L/UI:N/S:C/C:L/I:L/A:N": 6.4,
+    "CVSS:3.1/AV:L/AC:L/PR:L/UI:N/S:U/C:H/I:H/A:H": 7.8,
+    "CVSS:3.1/AV:N/AC:H/PR:N/UI:R/S:U/C:L/I:N/A:N": 3.1,
+    "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:N/I:N/A:N": 0.0,
+    "CVSS:3.0/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:N/A:N": 7.5,
+}
+
+
+class BaseScoreTest(unittest.TestCase):
+
+    def test_reference_vectors(self):
+        for vector, expected in REFERENCE_VECTORS.items():
+            with self.subTest(vector=vector):
+                self.assertEqual(base_score(vector), expected)
+
+    def test_roundup_v30_and_v31(self):
+        # Annexe A de la spécification v3.1 : Roundup sans erreur de virgule flottante
+        self.assertEqual(_roundup_v31(4.000000000000001), 4.0)
+        self.assertEqual(_roundup_v30(4.000000000000001), 4.1)
+        self.assertEqual((_roundup_v30(4.02), _roundup_v31(4.02)), (4.1, 4.1))
+        body = "AV:N/AC:L/PR:L/UI:N/S:C/C:L/I:L/A:N"
+        self.assertEqual(base_score(f"CVSS:3.0/{body}"), base_score(f"CVSS:3.1/{body}"))
+
+    def test_invalid_and_v4_vectors(self):
+        scorer = CvssScorer()
+        for vector in ("CVSS:4.0/AV:N/AC:L/AT:N/PR:N/UI:N/VC:H/VI:H/VA:H/SC:N/SI:N/SA:N",
+                       "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H",
+                       "CVSS:3.1/AV:X/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H",
+                       "CVSS:3.1/AV:N/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H",
+                       "AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H", "", None):
+            with self.subTest(vector=vector):
+                self.assertIsNone(scorer.score(vector))
+        self.assertEqual(scorer.v4_vectors, 1)
+        self.assertEqual(scorer.distinct, 4)
+
+
+class SnykFallbackTest(unittest.TestCase):
+
+    def test_score_from_cvssv3_when_cvss_score_is_missing(self):
+        vulnerabilities = [
+            {"id": "SNYK-JAVA-1", "title": "RCE", "severity": "critical", "packageName": "org.example:core",
+             "version": "1.0.0", "CVSSv3": "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H"},
+            {"id": "SNYK-JAVA-2", "title": "XSS", "severity": "medium", "packageName": "org.example:web",
+             "version": "2.0.0", "cvssScore": 5.4, "CVSSv3": "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H"},
+            {"id": "SNYK-JAVA-3", "title": "DoS", "severity": "high", "packageName": "org.example:io",
+             "version": "3.0.0", "CVSSv3": "CVSS:4.0/AV:N/AC:L/AT:N/PR:N/UI:N/VC:N/VI:N/VA:H/SC:N/SI:N/SA:N"}]
+        normalize = load_normalizer()
+        with tempfile.TemporaryDirectory() as workdir, redirect_stdout(StringIO()) as log:
+            raw = os.path.join(workdir, "snyk-raw.json")
+            with open(raw, "w", encoding="utf-8") as f:
+                json.dump({"vulnerabilities": vulnerabilities}, f)
+            normalized = normalize.run_normalization(raw, os.path.join(workdir, "snyk-normalized.json"), "snyk",
+                                                     dict(METADATA, tool="snyk", scan_type="sca"))
+
+        scores = {vuln["id"]: (vuln["cvss_score"], vuln["unified"]["severity_score"])
+                  for vuln in normalized["vulnerabilities"]}
+        self.assertEqual(scores["SNYK-JAVA-1"], (9.8, 9.8))
+        self.assertEqual(scores["SNYK-JAVA-2"], (5.4, 5.4))
+        # v4.0 non calculé : score d'après la sévérité (high → 7.0)
+        self.assertEqual(scores["SNYK-JAVA-3"][1], 7.0)
+        self.assertIn("1 vecteurs CVSS:4.0 non calculés", log.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Fusion inter-outils (batch_normalize.py --dedup) : un finding remonté par Snyk et
+Trivy n'est émis qu'une fois, summary des parents recalculés
+
+    python3 -m pytest tests/test_dedup.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from support import SCRIPTS_DIR
+
+SHARED = ("CVE-2024-1000", "org.example:core", "1.2.0")
+
+
+def snyk_vulnerability(cve, package, version, severity):
+    return {"id": f"SNYK-JAVA-{cve}", "title": f"Issue {cve}", "severity": severity,
+            "packageName": package, "version": version, "from": ["backend@1.0.0", f"{package}@{version}"],
+            "identifiers": {"CVE": [cve], "CWE": [], "GHSA": []}, "fixedIn": []}
+
+
+def trivy_vulnerability(cve, package, version, severity):
+    return {"VulnerabilityID": cve, "PkgName": package, "InstalledVersion": version, "FixedVersion": "",
+            "Title": f"Issue {cve}", "Severity": severity}
+
+
+class CrossToolDedupTest(unittest.TestCase):
+
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def _documents(self, path):
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def _run(self, stream: bool):
+        with tempfile.TemporaryDirectory() as workdir:
+            build_dir = os.path.join(workdir, "build-7")
+            self._write(os.path.join(build_dir, "snyk", "scans", "snyk-backend-raw.json"), {"vulnerabilities": [
+                snyk_vulnerability(*SHARED, "medium"),
+                snyk_vulnerability("CVE-2024-2000", "org.example:web", "3.0.1", "low")]})
+            self._write(os.path.join(build_dir, "trivy", "scans", "trivy-backend-raw.json"), {"Results": [
+                {"Target": "app.jar", "Vulnerabilities": [trivy_vulnerability(*SHARED, "HIGH"),
+                                                          trivy_vulnerability("CVE-2024-3000", "libssl", "3.0",
+                                                                              "CRITICAL")]},
+                {"Target": "lib/app.jar", "Vulnerabilities": [trivy_vulnerability(*SHARED, "HIGH")]}]})
+            command = [sys.executable, os.path.join(SCRIPTS_DIR, "batch_normalize.py"), build_dir, "--dedup",
+                       "--workers", "2"] + (["--stream"] if stream else [])
+            process = subprocess.run(command, capture_output=True, text=True)
+            self.assertEqual(process.returncode, 0, process.stdout + process.stderr)
+            self.assertFalse(os.path.exists(os.path.join(build_dir, "dedup-backend.json")))
+            return {tool: self._documents(os.path.join(build_dir, tool, "scans", f"{tool}-backend-split.ndjson"))
+                    for tool in ("snyk", "trivy")}
+
+    def test_shared_finding_emitted_once(self):
+        for stream in (False, True):
+            with self.subTest(stream=stream):
+                documents = self._run(stream)
+                findings = {tool: [doc for doc in docs if doc["doc_type"] == "vulnerability_finding"]
+                            for tool, docs in documents.items()}
+                shared = {tool: [doc for doc in docs if doc["vulnerability.cve"] == [SHARED[0]]]
+                          for tool, docs in findings.items()}
+                self.assertEqual((len(shared["snyk"]), len(shared["trivy"])), (1, 0))
+                self.assertEqual(shared["snyk"][0]["vulnerability.sources"], ["snyk", "trivy"])
+                self.assertEqual(shared["snyk"][0]["vulnerability.unified.severity"], "high")
+                self.assertEqual(len(findings["snyk"]), 2)
+                self.assertEqual(len(findings["trivy"]), 1)
+
+    def test_parent_summaries_count_raw_and_emitted(self):
+        documents = self._run(stream=False)
+        snyk, trivy = (documents[tool][-1]["summary"] for tool in ("snyk", "trivy"))
+        self.assertEqual((snyk["raw_total_vulnerabilities"], snyk["total_vulnerabilities"],
+                          snyk["cross_tool_duplicates"]), (2, 2, 0))
+        self.assertEqual((trivy["raw_total_vulnerabilities"], trivy["total_vulnerabilities"],
+                          trivy["cross_tool_duplicates"]), (3, 1, 1))
+        self.assertEqual(trivy["critical"], 1)
+        self.assertEqual(trivy["high"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
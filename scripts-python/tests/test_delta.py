@@ -0,0 +1,74 @@
+"""
+Mode delta : findings `fixed` clôturés (status, resolution_date, MTTR du cycle de vie)
+
+    python3 -m pytest tests/test_delta.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from support import METADATA, drop_vulnerabilities, load_normalizer
+from generate_reports import generate_report
+
+
+class DeltaFixedTest(unittest.TestCase):
+
+    def _documents(self, path):
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def _run(self, with_state_dir: bool, stream: bool):
+        normalize = load_normalizer()
+        with tempfile.TemporaryDirectory() as workdir, redirect_stdout(StringIO()):
+            state_dir = os.path.join(workdir, "state") if with_state_dir else None
+            builds = [os.path.join(workdir, f"build-{n}") for n in (1, 2)]
+            raw_previous = generate_report("trivy", 200, os.path.join(builds[0], "trivy-raw.json"))
+            os.makedirs(builds[1])
+            raw_current = os.path.join(builds[1], "trivy-raw.json")
+            dropped = drop_vulnerabilities(raw_previous, raw_current, 5)
+
+            normalize.run_normalization(raw_previous, os.path.join(builds[0], "trivy-normalized.json"), "trivy",
+                                        METADATA, stream=stream, state_dir=state_dir)
+            split_output = os.path.join(builds[1], "trivy-split.ndjson")
+            normalize.run_normalization(raw_current, os.path.join(builds[1], "trivy-normalized.json"), "trivy",
+                                        METADATA, stream=stream, split_output=split_output,
+                                        delta_previous="auto", state_dir=state_dir)
+            documents = self._documents(split_output)
+        return dropped, documents
+
+    def _check(self, with_state_dir: bool, stream: bool):
+        dropped, documents = self._run(with_state_dir, stream)
+        parent = documents[-1]
+        fixed = [doc for doc in documents if doc.get("delta_status") == "fixed"]
+        self.assertEqual(parent["delta"]["fixed"], dropped)
+        self.assertEqual(len(fixed), dropped)
+        for doc in fixed:
+            self.assertEqual(doc["vulnerability.unified.status"], "closed")
+            self.assertEqual(doc["vulnerability.unified.resolution_date"], parent["@timestamp"])
+        return documents, fixed
+
+    def test_fixed_findings_are_closed(self):
+        for stream in (False, True):
+            with self.subTest(stream=stream):
+                self._check(False, stream)
+
+    def test_fixed_findings_carry_lifecycle_mttr(self):
+        for stream in (False, True):
+            with self.subTest(stream=stream):
+                documents, fixed = self._check(True, stream)
+                mttr = {doc["resolved"]["vulnerability_id"]: doc["resolved"]["unified"]["mttr_hours"]
+                        for doc in documents if doc["doc_type"] == "resolved_finding"}
+                for doc in fixed:
+                    self.assertEqual(doc["vulnerability.unified.mttr_hours"],
+                                     mttr[doc["vulnerability.unified.vulnerability_id"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Tests de es_bulk.BulkSink contre un stub local de l'API _bulk
+
+Le stub rejette, comme Elasticsearch, les documents à clés dupliquées et peut
+refuser temporairement (429) des documents donnés.
+
+    python3 -m pytest tests/          (ou python3 -m unittest discover tests)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from support import METADATA, load_normalizer
+from es_bulk import BulkSink
+from generate_reports import generate_report
+from split_reports import split_and_write
+from stub_http import StubServer, strict_json
+
+
+class BulkStub:
+    """_bulk : documents indexés par _id, `reject_once` : _id refusés (429) à leur premier envoi"""
+
+    def __init__(self, reject_once=()):
+        self.reject_once = set(reject_once)
+        self.documents = {}
+        self.actions = []
+        self.bodies = []
+
+    def __call__(self, request):
+        if request.path != "/_bulk":
+            return 404, {"error": "not found"}
+        self.bodies.append(request.body)
+        lines = request.body.splitlines()
+        items = []
+        for action_line, source_line in zip(lines[0::2], lines[1::2]):
+            action = json.loads(action_line)["index"]
+            self.actions.append(action)
+            doc_id = action.get("_id")
+            if doc_id in self.reject_once:
+                self.reject_once.discard(doc_id)
+                items.append({"index": {"_id": doc_id, "status": 429,
+                                        "error": {"type": "es_rejected_execution_exception"}}})
+                continue
+            try:
+                self.documents[doc_id or str(len(self.documents))] = strict_json(source_line)
+            except ValueError as e:
+                items.append({"index": {"_id": doc_id, "status": 400,
+                                        "error": {"type": "mapper_parsing_exception", "reason": str(e)}}})
+                continue
+            items.append({"index": {"_id": doc_id, "status": 201}})
+        errors = any(item["index"]["status"] >= 300 for item in items)
+        return 200, {"took": 1, "errors": errors, "items": items}
+
+
+class BulkSinkTest(unittest.TestCase):
+
+    def _sink(self, server, **options):
+        return BulkSink(server.url, index="pipeline-reports-test", username="", **options)
+
+    def test_split_report_indexes_parent_with_its_own_timestamp(self):
+        normalize = load_normalizer()
+        stub = BulkStub()
+        with tempfile.TemporaryDirectory() as workdir, StubServer(stub) as server, redirect_stdout(StringIO()):
+            raw = generate_report("trivy", 2000, os.path.join(workdir, "trivy-raw.json"))
+            normalized_file = os.path.join(workdir, "trivy-normalized.json")
+            normalized = normalize.run_normalization(raw, normalized_file, "trivy", METADATA)
+            sink = self._sink(server)
+            split_and_write(normalized_file, os.path.join(workdir, "unused.ndjson"), sink=sink)
+
+        self.assertFalse(sink.failed, sink.errors)
+        self.assertEqual(sink.indexed, sink.sent)
+        self.assertEqual(len(stub.documents), sink.sent)
+        parents = [doc for doc in stub.documents.values() if doc["doc_type"] == "vulnerability_report"]
+        self.assertEqual(len(parents), 1)
+        self.assertEqual(parents[0]["@timestamp"], normalized["@timestamp"])
+        self.assertTrue(all("@timestamp" in doc for doc in stub.documents.values()))
+        self.assertEqual({action["pipeline"] for action in stub.actions}, {"trivy-pipeline"})
+        # Une seule connexion persistante pour toutes les requêtes
+        self.assertGreater(sink.requests, 1)
+        self.assertEqual(server.connections, 1)
+
+    def test_batches_are_bounded_by_documents_and_bytes(self):
+        stub = BulkStub()
+        with StubServer(stub) as server, redirect_stdout(StringIO()):
+            sink = self._sink(server, pipeline="snyk-pipeline", max_docs=10)
+            for n in range(25):
+                sink.write({"doc_id": f"d{n}", "doc_type": "vulnerability_finding"})
+            sink.close()
+            self.assertEqual([body.count(b"\n") // 2 for body in stub.bodies], [10, 10, 5])
+
+            stub.bodies.clear()
+            sink = self._sink(server, pipeline="snyk-pipeline", max_bytes=1000)
+            for n in range(25):
+                sink.write({"doc_id": f"e{n}", "padding": "x" * 100})
+            sink.close()
+        self.assertGreater(len(stub.bodies), 3)
+        self.assertTrue(all(len(body) <= 1000 for body in stub.bodies))
+        self.assertEqual(len(stub.documents), 50)
+
+    def test_only_rejected_documents_are_resent(self):
+        stub = BulkStub(reject_once={"d3", "d7"})
+        with StubServer(stub) as server, redirect_stdout(StringIO()):
+            sink = self._sink(server, pipeline="snyk-pipeline", backoff=0)
+            for n in range(10):
+                sink.write({"doc_id": f"d{n}"})
+            sink.close()
+        self.assertEqual(len(stub.bodies), 2)
+        self.assertEqual([action["_id"] for action in stub.actions[10:]], ["d3", "d7"])
+        self.assertEqual((sink.indexed, sink.retried, sink.failed), (10, 2, False))
+
+    def test_permanent_rejections_fail_the_sink(self):
+        stub = BulkStub()
+        with StubServer(stub) as server, redirect_stdout(StringIO()):
+            sink = self._sink(server, pipeline="snyk-pipeline")
+            sink.write({"doc_id": "ok"})
+            sink.write(b'{"doc_id": "dup", "a": 1, "a": 2}')
+            sink.close()
+        self.assertEqual(sink.indexed, 1)
+        self.assertTrue(sink.failed)
+        self.assertEqual(len(sink.errors), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
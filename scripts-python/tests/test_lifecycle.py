@@ -0,0 +1,93 @@
+"""
+Base de cycle de vie : findings disparus émis en documents resolved_finding
+
+    python3 -m pytest tests/test_lifecycle.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from support import METADATA, drop_vulnerabilities, load_normalizer
+from generate_reports import generate_report
+from split_reports import split_and_write
+
+
+class ResolvedFindingTest(unittest.TestCase):
+
+    def _build(self, normalize, workdir, raw, build_id, state_dir, fused, lean_parent=False):
+        metadata = dict(METADATA, build_id=build_id)
+        normalized_file = os.path.join(workdir, f"trivy-normalized-{build_id}.json")
+        split_output = os.path.join(workdir, f"trivy-split-{build_id}.ndjson")
+        if fused:
+            normalize.run_normalization(raw, normalized_file, "trivy", metadata, stream=True,
+                                        split_output=split_output, state_dir=state_dir, lean_parent=lean_parent)
+        else:
+            normalize.run_normalization(raw, normalized_file, "trivy", metadata, state_dir=state_dir)
+            split_and_write(normalized_file, split_output, lean_parent=lean_parent)
+        with open(split_output, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_resolutions_become_resolved_finding_documents(self):
+        normalize = load_normalizer()
+        for fused in (False, True):
+            with self.subTest(fused=fused), tempfile.TemporaryDirectory() as workdir, redirect_stdout(StringIO()):
+                state_dir = os.path.join(workdir, "state")
+                raw_first = generate_report("trivy", 150, os.path.join(workdir, "trivy-raw-1.json"))
+                raw_second = os.path.join(workdir, "trivy-raw-2.json")
+                dropped = drop_vulnerabilities(raw_first, raw_second, 4)
+
+                first = self._build(normalize, workdir, raw_first, "1", state_dir, fused)
+                second = self._build(normalize, workdir, raw_second, "2", state_dir, fused)
+
+                self.assertFalse([doc for doc in first if doc["doc_type"] == "resolved_finding"])
+                parent = second[-1]
+                resolved = [doc for doc in second if doc["doc_type"] == "resolved_finding"]
+                self.assertEqual(parent["doc_type"], "vulnerability_report")
+                self.assertNotIn("resolved", parent)
+                self.assertEqual(parent["metrics"]["mttr"]["trivy"]["resolved_count"], dropped)
+                self.assertEqual(len(resolved), dropped)
+                self.assertEqual(len({doc["doc_id"] for doc in resolved}), dropped)
+                for doc in resolved:
+                    self.assertEqual(doc["@timestamp"], parent["@timestamp"])
+                    self.assertEqual(doc["report_id"], parent["report_id"])
+                    self.assertEqual(doc["metadata.service"], "backend")
+                    self.assertEqual(doc["resolved"]["unified"]["status"], "closed")
+                    self.assertEqual(doc["resolved"]["unified"]["resolution_date"], parent["@timestamp"])
+                    self.assertGreaterEqual(doc["resolved"]["unified"]["mttr_hours"], 0.0)
+
+    def test_lean_parent_keeps_resolutions(self):
+        normalize = load_normalizer()
+        for fused in (False, True):
+            with self.subTest(fused=fused), tempfile.TemporaryDirectory() as workdir, redirect_stdout(StringIO()):
+                state_dir = os.path.join(workdir, "state")
+                raw_first = generate_report("trivy", 80, os.path.join(workdir, "trivy-raw-1.json"))
+                raw_second = os.path.join(workdir, "trivy-raw-2.json")
+                dropped = drop_vulnerabilities(raw_first, raw_second, 4)
+
+                self._build(normalize, workdir, raw_first, "1", state_dir, fused, lean_parent=True)
+                second = self._build(normalize, workdir, raw_second, "2", state_dir, fused, lean_parent=True)
+                self.assertNotIn("vulnerabilities", second[-1])
+                self.assertEqual(sum(1 for doc in second if doc["doc_type"] == "resolved_finding"), dropped)
+
+    def test_lean_parent_requires_lifecycle_store(self):
+        normalize = load_normalizer()
+        with tempfile.TemporaryDirectory() as workdir, redirect_stdout(StringIO()):
+            raw = generate_report("trivy", 20, os.path.join(workdir, "trivy-raw.json"))
+            normalized_file = os.path.join(workdir, "trivy-normalized.json")
+            with self.assertRaises(ValueError):
+                normalize.run_normalization(raw, normalized_file, "trivy", METADATA, stream=True,
+                                            split_output=os.path.join(workdir, "split.ndjson"), lean_parent=True)
+            normalize.run_normalization(raw, normalized_file, "trivy", METADATA)
+            with self.assertRaises(SystemExit):
+                split_and_write(normalized_file, os.path.join(workdir, "split.ndjson"), lean_parent=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Recommandations : cache SonarQube par (règle, type), phrase Snyk par identifiant d'avis
+
+    python3 -m pytest tests/test_recommendations.py
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import support  # noqa: F401  (chemins d'import de scripts-python)
+from recommendations import SONARQUBE_DUPLICATION, RecommendationEngine
+
+
+class SonarQubeRecommendationTest(unittest.TestCase):
+
+    def test_issues_of_a_rule_share_a_cache_entry(self):
+        engine = RecommendationEngine()
+        messages = [f'Rename this field "field{index}" to match the regular expression on line {index * 7}.'
+                    for index in range(50)]
+        texts = [engine.sonarqube({"rule": "java:S116", "type": "CODE_SMELL", "message": message})
+                 for message in messages]
+        self.assertEqual(texts, [f"Improve code quality: {message}" for message in messages])
+        self.assertEqual(engine.counters(), (49, 1))
+
+    def test_duplication(self):
+        engine = RecommendationEngine()
+        duplicated = [{"rule": "java:S1192", "type": "CODE_SMELL", "message": 'Define a constant for "a" (3 times).'},
+                      {"rule": "common-java:DuplicatedBlocks", "type": "CODE_SMELL", "message": "2 blocks"},
+                      {"rule": "py:S9999", "type": "CODE_SMELL", "message": "Remove this Duplicated code."}]
+        for issue in duplicated:
+            self.assertEqual(engine.sonarqube(issue), SONARQUBE_DUPLICATION)
+        # Branches ou méthodes identiques : texte de la règle, pas d'extraction de fonction
+        message = "This branch's code block is the same as the block for the branch on line 12."
+        identical = {"rule": "java:S1871", "type": "CODE_SMELL", "message": message}
+        self.assertEqual(engine.sonarqube(identical), f"Improve code quality: {message}")
+
+
+class SnykRecommendationTest(unittest.TestCase):
+
+    def test_description_sentence_memoized_by_advisory_id(self):
+        engine = RecommendationEngine()
+        description = "## Overview\nRemote code execution. Upgrade the parser to the latest release. Details."
+        paths = [{"id": "SNYK-JAVA-ORGEXAMPLE-1", "description": description} for _ in range(3)]
+        self.assertEqual([engine.snyk(vuln) for vuln in paths], ["Upgrade the parser to the latest release"] * 3)
+        self.assertEqual(engine.counters(), (2, 1))
+        # Sans identifiant : description analysée directement, hors cache
+        self.assertEqual(engine.snyk({"description": description}), "Upgrade the parser to the latest release")
+        self.assertEqual(engine.counters(), (2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
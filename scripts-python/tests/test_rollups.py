@@ -0,0 +1,64 @@
+"""
+Agrégats --rollups : optionnels, un document vulnerability_rollup par dimension
+
+    python3 -m pytest tests/test_rollups.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from support import METADATA, load_normalizer
+from generate_reports import generate_report
+from rollups import DIMENSIONS, MAX_KEYS
+
+
+class RollupDocumentTest(unittest.TestCase):
+
+    def _split(self, rollups: bool, stream: bool):
+        normalize = load_normalizer()
+        with tempfile.TemporaryDirectory() as workdir, redirect_stdout(StringIO()):
+            raw = generate_report("trivy", 3000, os.path.join(workdir, "trivy-raw.json"))
+            normalized_file = os.path.join(workdir, "trivy-normalized.json")
+            split_output = os.path.join(workdir, "trivy-split.ndjson")
+            normalize.run_normalization(raw, normalized_file, "trivy", METADATA, stream=stream,
+                                        split_output=split_output, rollups=rollups)
+            with open(normalized_file, encoding="utf-8") as f:
+                normalized = json.load(f)
+            with open(split_output, encoding="utf-8") as f:
+                return normalized, [json.loads(line) for line in f]
+
+    def test_rollups_are_opt_in(self):
+        normalized, documents = self._split(rollups=False, stream=True)
+        self.assertNotIn("rollups", normalized)
+        self.assertFalse([doc for doc in documents if doc["doc_type"] == "vulnerability_rollup"])
+
+    def test_one_document_per_dimension(self):
+        for stream in (False, True):
+            with self.subTest(stream=stream):
+                normalized, documents = self._split(rollups=True, stream=stream)
+                findings = sum(1 for doc in documents if doc["doc_type"] == "vulnerability_finding")
+                rollup_documents = [doc for doc in documents if doc["doc_type"] == "vulnerability_rollup"]
+                rollups = {doc["rollup.dimension"]: doc for doc in rollup_documents}
+                self.assertIn("rollups", normalized)
+                self.assertLessEqual(set(rollups), set(DIMENSIONS))
+                self.assertEqual(len(rollups), len(rollup_documents))
+                self.assertEqual(len({doc["doc_id"] for doc in rollups.values()}), len(rollups))
+                for doc in rollups.values():
+                    self.assertLessEqual(len(doc["rollup.buckets"]), MAX_KEYS)
+                    self.assertEqual(doc["metadata.tool"], "trivy")
+                self.assertEqual(sum(bucket["total"] for bucket in rollups["type"]["rollup.buckets"]), findings)
+                fixable = {bucket["key"]: bucket for bucket in rollups["fixable"]["rollup.buckets"]}
+                self.assertEqual(fixable.get("true", {}).get("fixable", 0),
+                                 sum(bucket["fixable"] for bucket in rollups["type"]["rollup.buckets"]))
+                self.assertNotIn("rollups", documents[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
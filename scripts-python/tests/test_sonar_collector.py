@@ -0,0 +1,185 @@
+"""
+Tests de sonar_collector.SonarCollector contre un stub local de l'API Web SonarQube
+
+Le stub applique les filtres (statuses, types, severities, createdAfter/createdBefore),
+la pagination et, comme SonarQube, refuse toute page au-delà de la fenêtre de
+10 000 résultats (p * ps > 10 000).
+
+    python3 -m pytest tests/test_sonar_collector.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from bisect import bisect_left
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from support import METADATA, load_normalizer
+from sonar_collector import ISSUE_SEVERITIES, RESULT_WINDOW, SonarCollector, SonarError, SonarSession
+from stub_http import StubServer
+
+PROJECT = "babyfoot-backend"
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_issues(count, types=(("CODE_SMELL", 8), ("BUG", 1), ("VULNERABILITY", 1)), closed_every=10,
+                same_second=0):
+    """
+    `count` issues réparties par type (poids) et sévérité (MAJOR majoritaire), une
+    sur `closed_every` CLOSED ; `same_second` issues CODE_SMELL/MAJOR de plus créées
+    à la même seconde (fenêtre non découpable).
+    """
+    weighted = [issue_type for issue_type, weight in types for _ in range(weight)]
+    severities = ("MAJOR",) * 6 + ISSUE_SEVERITIES
+    issues = []
+    for index in range(count):
+        created = START + timedelta(minutes=7 * index)
+        issues.append(_issue(index, weighted[index % len(weighted)], severities[index % len(severities)],
+                             created, "CLOSED" if closed_every and index % closed_every == 0 else "OPEN"))
+    for index in range(count, count + same_second):
+        issues.append(_issue(index, "CODE_SMELL", "MAJOR", START - timedelta(days=30), "OPEN"))
+    return issues
+
+
+def _issue(index, issue_type, severity, created, status):
+    return {"key": f"AX{index:07d}", "rule": f"java:S{100 + index % 40}", "severity": severity,
+            "component": f"{PROJECT}:src/main/java/Service{index % 300}.java", "line": index % 500 + 1,
+            "message": f"Issue {index}", "status": status, "type": issue_type,
+            "creationDate": created.strftime(DATE_FORMAT)}
+
+
+class SonarStub:
+    """api/issues/search, api/hotspots/search, mesures et quality gate d'un projet"""
+
+    def __init__(self, issues, hotspots=(), fail_once=()):
+        self.issues = sorted(issues, key=lambda issue: (issue["creationDate"], issue["key"]))
+        self.dates = [datetime.strptime(issue["creationDate"], DATE_FORMAT) for issue in self.issues]
+        self.hotspots = list(hotspots)
+        self.fail_once = set(fail_once)
+        self.pages = []
+
+    def __call__(self, request):
+        query = request.query
+        page, size = int(query.get("p", 1)), int(query.get("ps", 100))
+        if request.path == "/api/measures/component":
+            return 200, {"component": {"name": "Babyfoot Backend",
+                                       "measures": [{"metric": "bugs", "value": "3"}]}}
+        if request.path == "/api/qualitygates/project_status":
+            return 200, {"projectStatus": {"status": "OK"}}
+        if request.path == "/api/hotspots/search":
+            matches = [h for h in self.hotspots if h["status"] == query.get("status")]
+            return 200, self._page(matches, page, size, "hotspots")
+        if request.path != "/api/issues/search":
+            return 404, {"errors": [{"msg": "Unknown url"}]}
+        if page * size > RESULT_WINDOW:
+            return 400, {"errors": [{"msg": f"Can return only the first {RESULT_WINDOW} results. "
+                                            f"{page * size}th result asked."}]}
+        signature = tuple(sorted(query.items()))
+        if signature in self.fail_once:
+            self.fail_once.discard(signature)
+            return 503, {"errors": [{"msg": "Service unavailable"}]}
+        self.pages.append(signature)
+        return 200, self._page(self._matches(query), page, size, "issues")
+
+    def _matches(self, query):
+        first, last = 0, len(self.issues)
+        if "createdAfter" in query:
+            first = bisect_left(self.dates, datetime.strptime(query["createdAfter"], DATE_FORMAT))
+        if "createdBefore" in query:
+            last = bisect_left(self.dates, datetime.strptime(query["createdBefore"], DATE_FORMAT))
+        types = set(query["types"].split(","))
+        severities = set(query["severities"].split(",")) if "severities" in query else None
+        statuses = set(query["statuses"].split(","))
+        return [issue for issue in self.issues[first:last]
+                if issue["type"] in types and issue["status"] in statuses
+                and (severities is None or issue["severity"] in severities)]
+
+    @staticmethod
+    def _page(matches, page, size, key):
+        return {"paging": {"pageIndex": page, "pageSize": size, "total": len(matches)},
+                key: matches[(page - 1) * size:page * size]}
+
+
+class SonarCollectorTest(unittest.TestCase):
+
+    def _collect(self, stub, workers=4):
+        with StubServer(stub) as server, redirect_stdout(StringIO()) as log:
+            collector = SonarCollector(SonarSession(server.url, "token", backoff=0), PROJECT, workers=workers)
+            issues = list(collector.iter_issues())
+        return collector, issues, log.getvalue()
+
+    def test_collects_every_open_issue_beyond_the_result_window(self):
+        issues = make_issues(30000)
+        hotspots = [{"key": f"HS{index}", "ruleKey": "java:S2068", "vulnerabilityProbability": "HIGH",
+                     "component": f"{PROJECT}:src/Config.java", "message": "Password",
+                     "status": "TO_REVIEW" if index % 2 else "REVIEWED"} for index in range(1200)]
+        stub = SonarStub(issues, hotspots)
+        collector, collected, _ = self._collect(stub)
+
+        open_keys = [issue["key"] for issue in issues if issue["status"] == "OPEN"]
+        issue_keys = [issue["key"] for issue in collected if issue["type"] != "SECURITY_HOTSPOT"]
+        self.assertGreater(len(open_keys), 2 * RESULT_WINDOW)
+        self.assertEqual(len(issue_keys), len(set(issue_keys)))
+        self.assertEqual(set(issue_keys), set(open_keys))
+        self.assertEqual(sum(1 for issue in collected if issue["type"] == "SECURITY_HOTSPOT"), 600)
+        self.assertEqual(collector.truncated, 0)
+        # CODE_SMELL/MAJOR dépasse à elle seule la fenêtre : découpage par date de création
+        self.assertTrue(any(("createdAfter" in dict(page)) for page in stub.pages))
+
+    def test_order_is_stable_across_worker_counts(self):
+        issues = make_issues(12000)
+        orders = [[issue["key"] for issue in self._collect(SonarStub(issues), workers)[1]] for workers in (1, 6)]
+        self.assertEqual(orders[0], orders[1])
+
+    def test_retries_unavailable_pages(self):
+        root = (("componentKeys", PROJECT), ("p", "2"), ("ps", "500"), ("statuses", "OPEN"),
+                ("types", "VULNERABILITY,BUG,CODE_SMELL"))
+        issues = make_issues(3000)
+        stub = SonarStub(issues, fail_once=[root])
+        _, collected, _ = self._collect(stub)
+        self.assertEqual(len(collected), sum(1 for issue in issues if issue["status"] == "OPEN"))
+        self.assertFalse(stub.fail_once)
+
+    def test_same_second_overflow_is_reported(self):
+        collector, collected, log = self._collect(SonarStub(make_issues(0, same_second=RESULT_WINDOW + 250)))
+        self.assertEqual(len(collected), RESULT_WINDOW)
+        self.assertEqual(collector.truncated, 250)
+        self.assertIn("250 issues non collectées", log)
+
+    def test_permanent_error_fails_the_collection(self):
+        with StubServer(lambda request: (401, {"errors": [{"msg": "Unauthorized"}]})) as server, \
+                redirect_stdout(StringIO()):
+            collector = SonarCollector(SonarSession(server.url, "bad", backoff=0), PROJECT)
+            with self.assertRaises(SonarError):
+                list(collector.iter_issues())
+            self.assertEqual(len(server.requests), 1)
+
+    def test_save_raw_archives_the_collected_report(self):
+        issues = make_issues(1500)
+        normalize = load_normalizer()
+        with tempfile.TemporaryDirectory() as workdir, StubServer(SonarStub(issues)) as server, \
+                redirect_stdout(StringIO()):
+            raw_file = os.path.join(workdir, "sonarqube-backend-raw.json")
+            collector = SonarCollector(SonarSession(server.url, "token"), PROJECT, raw_file=raw_file)
+            metadata = dict(METADATA, tool="sonarqube", scan_type="sast")
+            normalized = normalize.run_normalization("-", os.path.join(workdir, "sonarqube-backend-normalized.json"),
+                                                     "sonarqube", metadata, raw_data=collector.collect_report())
+            with open(raw_file, encoding="utf-8") as f:
+                raw = json.load(f)
+            self.assertFalse(os.path.exists(raw_file + ".tmp"))
+
+        self.assertEqual(raw["projectKey"], PROJECT)
+        self.assertEqual(raw["status"], "OK")
+        self.assertEqual(len(raw["detailed_issues"]), sum(1 for issue in issues if issue["status"] == "OPEN"))
+        self.assertEqual(normalized["summary"]["total_vulnerabilities"], len(raw["detailed_issues"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
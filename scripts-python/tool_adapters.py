@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Registre des adaptateurs d'outils de ReportNormalizer
+
+snyk, trivy et sonarqube sont normalisés par les méthodes de ReportNormalizer.
+Les autres formats passent par un adaptateur, enregistré ici sous la forme
+"module:Classe" et importé seulement quand l'outil est demandé : un build
+Trivy ne charge pas le code SARIF.
+
+    register_adapter("bandit", "bandit_adapter:BanditAdapter")
+
+Un outil absent du registre n'est plus recopié tel quel (raw_data) dans le
+rapport : il produit un rapport sans findings marqué `metadata.unsupported_tool`.
+"""
+
+import importlib
+from typing import Any, Dict, Iterator, List, Optional
+
+# Outils normalisés directement par ReportNormalizer
+BUILTIN_TOOLS = ("snyk", "trivy", "sonarqube")
+
+# outil → "module:Classe" (importé à la première utilisation)
+_REGISTRY: Dict[str, str] = {
+    "sarif": "sarif_adapter:SarifAdapter",
+    "codeql": "sarif_adapter:SarifAdapter",
+    "semgrep": "sarif_adapter:SarifAdapter",
+    "gitleaks": "sarif_adapter:SarifAdapter"
+}
+_loaded: Dict[str, type] = {}
+
+
+def register_adapter(tool: str, target: str) -> None:
+    """Associe un outil à un adaptateur "module:Classe" (remplace l'éventuel précédent)"""
+    _REGISTRY[tool.lower()] = target
+    _loaded.pop(tool.lower(), None)
+
+
+def adapter_class(tool: str) -> Optional[type]:
+    """Classe d'adaptateur de l'outil (importée à la demande), None si l'outil est inconnu"""
+    tool = tool.lower()
+    if tool in _loaded:
+        return _loaded[tool]
+    target = _REGISTRY.get(tool)
+    if target is None:
+        return None
+    module_name, _, class_name = target.partition(":")
+    cls = getattr(importlib.import_module(module_name), class_name)
+    _loaded[tool] = cls
+    return cls
+
+
+def supported_tools() -> List[str]:
+    return list(BUILTIN_TOOLS) + sorted(_REGISTRY)
+
+
+class ToolAdapter:
+    """
+    Interface d'un adaptateur. `normalizer` est le ReportNormalizer appelant
+    (metadata, _create_unified_block, _get_severity_score, summary...).
+
+    - normalize(data, normalized) : rapport brut chargé en mémoire
+    - avec streaming = True (option --stream) :
+        read_header(input_file)        champs nécessaires au parent, sans les résultats
+        describe(header, normalized)   metadata complétées avant le premier finding
+        iter_stream(input_file, normalized)  findings un par un
+        finalize(normalized)           summary complété à l'épuisement du flux
+    """
+
+    streaming = False
+
+    def __init__(self, normalizer):
+        self.normalizer = normalizer
+
+    def tool_version(self, data: Dict[str, Any]) -> str:
+        return "unknown"
+
+    def normalize(self, data: Dict[str, Any], normalized: Dict[str, Any]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def read_header(self, input_file: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def describe(self, header: Dict[str, Any], normalized: Dict[str, Any]) -> None:
+        pass
+
+    def iter_stream(self, input_file: str, normalized: Dict[str, Any]) -> Iterator[Any]:
+        raise NotImplementedError
+
+    def finalize(self, normalized: Dict[str, Any]) -> None:
+        pass